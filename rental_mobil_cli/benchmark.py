@@ -0,0 +1,432 @@
+"""
+============================================
+BENCHMARK & UJI BEBAN - RENTAL MOBIL CLI
+============================================
+Script untuk mengukur performa dan menguji
+keamanan concurrency komponen database CLI.
+
+Penggunaan:
+    python benchmark.py sequence [threads] [proses] [jumlah]
+    python benchmark.py mapper [jumlah]
+    python benchmark.py stream [batch_size]
+    python benchmark.py bulk [jumlah] [chunk_size]
+    python benchmark.py load [threads] [iterasi]
+    python benchmark.py rollup [ulang]
+============================================
+"""
+
+import sys
+import os
+import time
+import threading
+import tracemalloc
+import multiprocessing
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Add current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+
+def _allocate_codes(jumlah: int, threads: int) -> list:
+    """Alokasikan `jumlah` kode per thread dari satu BlockSequenceAllocator"""
+    from database.connection import DatabaseManager
+    from database.sequence import SequenceAllocator, BlockSequenceAllocator
+
+    # Prefix terpisah agar counter kode penyewaan asli tidak ikut bertambah
+    allocator = BlockSequenceAllocator(
+        SequenceAllocator(DatabaseManager(), prefix='BENCHMARK'),
+        block_size=Config.SEQUENCE_BLOCK_SIZE
+    )
+    hasil = []
+    lock = threading.Lock()
+
+    def worker():
+        lokal = [allocator.next_value() for _ in range(jumlah)]
+        with lock:
+            hasil.extend(lokal)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return hasil
+
+
+def _allocate_codes_process(args):
+    """Entry point untuk worker multiprocessing"""
+    jumlah, threads = args
+    return _allocate_codes(jumlah, threads)
+
+
+def benchmark_sequence(threads: int = 8, proses: int = 4, jumlah: int = 250):
+    """
+    Uji concurrency sequence allocator: beberapa proses, masing-masing
+    dengan beberapa thread, mengambil kode secara paralel. Semua nilai
+    harus unik.
+    """
+    total = threads * proses * jumlah
+    print(f"🔄 Mengalokasikan {total} sequence "
+          f"({proses} proses x {threads} thread x {jumlah})...")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(proses) as pool:
+        per_proses = pool.map(_allocate_codes_process, [(jumlah, threads)] * proses)
+    durasi = time.perf_counter() - start
+
+    semua = [nilai for hasil in per_proses for nilai in hasil]
+    duplikat = [nilai for nilai, count in Counter(semua).items() if count > 1]
+
+    print(f"   Total nilai    : {len(semua)}")
+    print(f"   Nilai unik     : {len(set(semua))}")
+    print(f"   Duplikat       : {len(duplikat)}")
+    print(f"   Durasi         : {durasi * 1000:.2f} ms "
+          f"({durasi * 1_000_000 / max(len(semua), 1):.2f} µs/kode)")
+
+    if duplikat:
+        print(f"❌ GAGAL: ditemukan duplikat, contoh: {duplikat[:10]}")
+        return False
+
+    print("✅ Semua sequence unik")
+    return True
+
+
+class _PenyewaanDict:
+    """Entity penyewaan gaya lama (atribut di __dict__), pembanding untuk benchmark mapper"""
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def _dummy_rows(jumlah: int) -> list:
+    """Buat row tuple penyewaan sesuai urutan kolom PenyewaanRepository.mapper"""
+    today = date.today()
+    now = datetime.now()
+    return [
+        (i, i % 50 + 1, i % 1000 + 1, today, today + timedelta(days=3), None, 3,
+         Decimal('900000.00'), Decimal('0.00'), 'aktif', f"RENT-{today:%Y%m}-{i:06d}", now, now)
+        for i in range(1, jumlah + 1)
+    ]
+
+
+def _ukur(label: str, fungsi):
+    """Jalankan fungsi, cetak durasi dan puncak alokasi memori"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    hasil = fungsi()
+    durasi = time.perf_counter() - start
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   {label:<30}: {durasi * 1000:9.2f} ms | puncak memori {puncak / 1024 / 1024:8.2f} MB")
+    return hasil, durasi, puncak
+
+
+def benchmark_mapper(jumlah: int = 100_000):
+    """
+    Bandingkan pemetaan row penyewaan: dict row + entity ber-__dict__ (cara lama)
+    dengan tuple row + entity __slots__ lewat RowMapper, termasuk versi lazy.
+    Row dibuat di memori agar yang diukur hanya biaya mapping dan objek.
+    """
+    from models.repositories import PenyewaanRepository
+
+    mapper = PenyewaanRepository.mapper
+    rows = _dummy_rows(jumlah)
+    print(f"🔄 Memetakan {jumlah} row penyewaan...")
+
+    def cara_lama():
+        dict_rows = [dict(zip(mapper.columns, row)) for row in rows]
+        return [
+            _PenyewaanDict(**dict(data, total_biaya=float(data['total_biaya']),
+                                  denda=float(data['denda'])))
+            for data in dict_rows
+        ]
+
+    def lazy():
+        total = 0.0
+        for penyewaan in mapper.iter_map(rows):
+            total += penyewaan.total_biaya
+        return total
+
+    lama, durasi_lama, memori_lama = _ukur("dict + __dict__ entity", cara_lama)
+    del lama
+    baru, durasi_baru, memori_baru = _ukur("tuple + RowMapper (__slots__)", lambda: mapper.map_all(rows))
+    del baru
+    _, durasi_lazy, memori_lazy = _ukur("RowMapper.iter_map (lazy)", lazy)
+
+    print(f"   Hemat memori (list)  : {(1 - memori_baru / memori_lama) * 100:.1f}%")
+    print(f"   Lebih cepat (list)   : {durasi_lama / durasi_baru:.2f}x")
+    print(f"   Memori lazy vs list  : {memori_lazy / 1024:.1f} KB vs {memori_baru / 1024 / 1024:.2f} MB")
+    return True
+
+
+def benchmark_stream(batch_size: int = 1000):
+    """
+    Bandingkan find_all() (fetchall) dengan iter_all() (cursor streaming)
+    pada tabel penyewaan di database yang sedang dipakai.
+    """
+    from database.connection import DatabaseManager
+    from models.repositories import PenyewaanRepository
+
+    repo = PenyewaanRepository(DatabaseManager())
+    print(f"🔄 Membaca seluruh tabel penyewaan (batch_size={batch_size})...")
+
+    def stream():
+        jumlah = 0
+        for _ in repo.iter_all(batch_size=batch_size):
+            jumlah += 1
+        return jumlah
+
+    semua, _, memori_list = _ukur("find_all() (fetchall)", lambda: len(repo.find_all()))
+    _, _, memori_stream = _ukur("iter_all() (streaming)", stream)
+
+    print(f"   Jumlah row           : {semua}")
+    print(f"   Memori stream vs list: {memori_stream / 1024 / 1024:.2f} MB vs {memori_list / 1024 / 1024:.2f} MB")
+    return True
+
+
+def benchmark_bulk(jumlah: int = 5000, chunk_size: int = None):
+    """
+    Bandingkan import mobil satu per satu (create) dengan bulk_create dan
+    bulk_upsert. Data benchmark (plat ZZ ...) dihapus kembali setelah selesai.
+    """
+    from database.connection import DatabaseManager
+    from models.entitas import Mobil
+    from models.repositories import MobilRepository
+
+    db_manager = DatabaseManager()
+    repo = MobilRepository(db_manager)
+    chunk_size = chunk_size or Config.BULK_CHUNK_SIZE
+
+    def armada(suffix: str) -> list:
+        return [Mobil('Benchmark', 'Bulk', 2022, f"ZZ {i} {suffix}", 250000.0)
+                for i in range(1, jumlah + 1)]
+
+    print(f"🔄 Import {jumlah} mobil (chunk_size={chunk_size})...")
+    try:
+        start = time.perf_counter()
+        for mobil in armada('ONE'):
+            repo.create(mobil)
+        durasi_satu = time.perf_counter() - start
+
+        mobils = armada('BLK')
+        start = time.perf_counter()
+        ids = repo.bulk_create(mobils, chunk_size)
+        durasi_bulk = time.perf_counter() - start
+
+        for mobil in mobils:
+            mobil.harga_sewa_per_hari = 275000.0
+        start = time.perf_counter()
+        repo.bulk_upsert(mobils, chunk_size)
+        durasi_upsert = time.perf_counter() - start
+    finally:
+        db_manager.execute_query("DELETE FROM mobil WHERE merk = 'Benchmark' AND plat_nomor LIKE 'ZZ %'")
+
+    print(f"   create() satu per satu : {durasi_satu * 1000:10.2f} ms")
+    print(f"   bulk_create()          : {durasi_bulk * 1000:10.2f} ms ({len(ids)} id)")
+    print(f"   bulk_upsert()          : {durasi_upsert * 1000:10.2f} ms")
+    print(f"   Lebih cepat (create)   : {durasi_satu / durasi_bulk:.1f}x")
+    return True
+
+
+def benchmark_rollup(ulang: int = 20):
+    """
+    Bandingkan statistik bulanan dari scan tabel penyewaan (query view lama)
+    dengan pembacaan rollup revenue_daily. Rollup dibangun ulang dulu agar
+    kedua hasil bisa dicocokkan.
+    """
+    from database.connection import DatabaseManager
+    from services.rollup_service import RevenueRollupService
+
+    db_manager = DatabaseManager()
+    rollup = RevenueRollupService(db_manager)
+    print("🔄 Rebuild rollup revenue_daily...")
+    rollup.rebuild()
+
+    scan_query = """
+    SELECT YEAR(tanggal_sewa) AS tahun, MONTH(tanggal_sewa) AS bulan,
+           COUNT(*) AS jumlah_transaksi, SUM(total_biaya + denda) AS total_pendapatan
+    FROM penyewaan
+    WHERE status IN ('selesai', 'terlambat')
+    GROUP BY YEAR(tanggal_sewa), MONTH(tanggal_sewa)
+    """
+    rollup_query = """
+    SELECT YEAR(tanggal) AS tahun, MONTH(tanggal) AS bulan,
+           SUM(jumlah_transaksi) AS jumlah_transaksi,
+           SUM(total_biaya + total_denda) AS total_pendapatan
+    FROM revenue_daily
+    GROUP BY YEAR(tanggal), MONTH(tanggal)
+    """
+
+    def jalankan(query):
+        start = time.perf_counter()
+        for _ in range(ulang):
+            rows = db_manager.execute_query(query, fetch=True)
+        durasi = (time.perf_counter() - start) / ulang
+        return {(r['tahun'], r['bulan']): (int(r['jumlah_transaksi']), Decimal(r['total_pendapatan']))
+                for r in rows}, durasi
+
+    hasil_scan, durasi_scan = jalankan(scan_query)
+    hasil_rollup, durasi_rollup = jalankan(rollup_query)
+    cocok = hasil_scan == hasil_rollup
+
+    print(f"   Scan penyewaan  : {durasi_scan * 1000:10.2f} ms/query")
+    print(f"   Rollup harian   : {durasi_rollup * 1000:10.2f} ms/query")
+    print(f"   Jumlah bulan    : {len(hasil_rollup)}")
+    print(f"   Hasil sama      : {'✅ ya' if cocok else '❌ tidak'}")
+    if durasi_rollup:
+        print(f"   Lebih cepat     : {durasi_scan / durasi_rollup:.1f}x")
+    return cocok
+
+
+def _rental_service():
+    """Buat RentalService lengkap dengan repository di atas satu DatabaseManager"""
+    from database.connection import DatabaseManager
+    from models.repositories import (
+        MobilRepository, PelangganRepository,
+        PenyewaanRepository, PembayaranRepository
+    )
+    from services.rental_service import RentalService
+
+    db_manager = DatabaseManager()
+    return RentalService(
+        MobilRepository(db_manager), PelangganRepository(db_manager),
+        PenyewaanRepository(db_manager), PembayaranRepository(db_manager)
+    )
+
+
+def benchmark_load(threads: int = 20, iterasi: int = 50):
+    """
+    Uji beban connection pool: N thread menjalankan siklus tulis RentalService
+    (sewa_mobil -> pengembalian_mobil -> bayar_sewa, masing-masing memegang satu
+    koneksi selama transaksi) ditambah pencarian mobil secara bersamaan, lalu
+    tampilkan latensi dan statistik pool (waits, histogram, timeout, errors).
+    Tiap thread memakai mobil & pelanggan benchmark sendiri (plat ZZ LOAD ...),
+    yang dihapus kembali beserta penyewaan/pembayarannya setelah selesai.
+    """
+    from models.entitas import Mobil, Pelanggan
+
+    service = _rental_service()
+    db_manager = service.db_manager
+    pool = db_manager.pool
+
+    mobil_ids = service.mobil_repo.bulk_create(
+        [Mobil('Benchmark', 'Load', 2022, f"ZZ LOAD {i}", 250000.0) for i in range(threads)]
+    )
+    pelanggan_ids = service.pelanggan_repo.bulk_create(
+        [Pelanggan(f"99{i:014d}", f"Benchmark Load {i}") for i in range(threads)]
+    )
+
+    pool.stats.reset()
+    service.mobil_repo.cache.reset_stats()
+
+    latensi, errors = [], []
+    lock = threading.Lock()
+
+    def siklus(mobil_id: int, pelanggan_id: int):
+        hari_ini = date.today()
+        ok, pesan, penyewaan_id = service.sewa_mobil(mobil_id, pelanggan_id, hari_ini, 1)
+        if not ok:
+            raise RuntimeError(f"sewa_mobil: {pesan}")
+        ok, pesan, denda = service.pengembalian_mobil(penyewaan_id, hari_ini)
+        if not ok:
+            raise RuntimeError(f"pengembalian_mobil: {pesan}")
+        penyewaan = service.penyewaan_repo.find_by_id(penyewaan_id)
+        ok, pesan = service.bayar_sewa(penyewaan_id, penyewaan.total_biaya + denda, 'tunai')
+        if not ok:
+            raise RuntimeError(f"bayar_sewa: {pesan}")
+        service.cari_mobil_tersedia()
+
+    def worker(mobil_id: int, pelanggan_id: int):
+        lokal = []
+        for _ in range(iterasi):
+            start = time.perf_counter()
+            try:
+                siklus(mobil_id, pelanggan_id)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            lokal.append(time.perf_counter() - start)
+        with lock:
+            latensi.extend(lokal)
+
+    print(f"🔄 {threads} thread x {iterasi} siklus sewa/kembali/bayar (pool_size={Config.DB_POOL_SIZE})...")
+    try:
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=ids) for ids in zip(mobil_ids, pelanggan_ids)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        durasi = time.perf_counter() - start
+    finally:
+        mobil_in = ', '.join(['%s'] * len(mobil_ids))
+        db_manager.execute_query(
+            "DELETE pb FROM pembayaran pb JOIN penyewaan p ON p.id = pb.penyewaan_id "
+            f"WHERE p.mobil_id IN ({mobil_in})", tuple(mobil_ids)
+        )
+        db_manager.execute_query(f"DELETE FROM penyewaan WHERE mobil_id IN ({mobil_in})", tuple(mobil_ids))
+        db_manager.execute_query(f"DELETE FROM mobil WHERE id IN ({mobil_in})", tuple(mobil_ids))
+        db_manager.execute_query(
+            f"DELETE FROM pelanggan WHERE id IN ({', '.join(['%s'] * len(pelanggan_ids))})",
+            tuple(pelanggan_ids)
+        )
+        # Rollup hari ini dihitung ulang tanpa transaksi benchmark
+        service.rollup_service.refresh_days([date.today()])
+
+    latensi.sort()
+    stats = pool.get_stats()
+    print(f"   Throughput     : {len(latensi) / durasi:.1f} siklus/detik")
+    print(f"   Latensi p50    : {latensi[len(latensi) // 2] * 1000:.2f} ms")
+    print(f"   Latensi p95    : {latensi[int(len(latensi) * 0.95) - 1] * 1000:.2f} ms")
+    print(f"   Error          : {len(errors)}")
+    print(f"   Pool borrowed  : {stats['borrowed']} (peak in use {stats['peak_in_use']})")
+    print(f"   Pool waits     : {stats['waits']} (rata-rata {stats['wait_time_avg_ms']:.2f} ms, "
+          f"maks {stats['wait_time_max_ms']:.2f} ms)")
+    print(f"   Histogram wait : {stats['wait_histogram_ms']}")
+    print(f"   Timeout/errors : {stats['timeouts']}/{stats['errors']} | recycled {stats['recycled']}")
+    cache = service.mobil_repo.cache_stats()
+    print(f"   Cache mobil    : {cache['hits']} hit / {cache['misses']} miss "
+          f"(hit ratio {cache['hit_ratio'] * 100:.1f}%)")
+    return not errors
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("🔧 BENCHMARK - RENTAL MOBIL CLI")
+    print("=" * 50)
+
+    if len(sys.argv) > 1:
+        command = sys.argv[1]
+        args = [int(a) for a in sys.argv[2:]]
+
+        if command == "sequence":
+            ok = benchmark_sequence(*args)
+            sys.exit(0 if ok else 1)
+        elif command == "mapper":
+            benchmark_mapper(*args)
+        elif command == "stream":
+            benchmark_stream(*args)
+        elif command == "bulk":
+            benchmark_bulk(*args)
+        elif command == "load":
+            ok = benchmark_load(*args)
+            sys.exit(0 if ok else 1)
+        elif command == "rollup":
+            ok = benchmark_rollup(*args)
+            sys.exit(0 if ok else 1)
+        else:
+            print(f"Unknown command: {command}")
+            print("Available commands: sequence, mapper, stream, bulk, load, rollup")
+    else:
+        print("\nUsage:")
+        print("  python benchmark.py sequence [threads] [proses] [jumlah]  - Uji concurrency kode penyewaan")
+        print("  python benchmark.py mapper [jumlah]                       - Memori & waktu mapping row penyewaan")
+        print("  python benchmark.py stream [batch_size]                   - Memori find_all() vs iter_all() penyewaan")
+        print("  python benchmark.py bulk [jumlah] [chunk_size]            - Import mobil: create() vs bulk_create()")
+        print("  python benchmark.py load [threads] [iterasi]              - Uji beban connection pool lewat RentalService")
+        print("  python benchmark.py rollup [ulang]                        - Statistik bulanan: scan penyewaan vs rollup")
@@ -11,6 +11,27 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'rental_mobil_db')
     
+    # Connection pool: jumlah koneksi (maks 32), detik menunggu koneksi bebas,
+    # umur maksimal koneksi sebelum di-reconnect (0 = tidak pernah), ping saat dipinjam
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PING = os.getenv('DB_POOL_PING', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Jumlah kode transaksi yang direservasi sekaligus per proses
+    SEQUENCE_BLOCK_SIZE = int(os.getenv('SEQUENCE_BLOCK_SIZE', 10))
+    
+    # Jumlah row per statement INSERT/UPDATE pada operasi bulk repository
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+    
+    # Cache baca data mobil: umur entry (detik, 0 = nonaktif) dan jumlah entry maksimal
+    MOBIL_CACHE_TTL = float(os.getenv('MOBIL_CACHE_TTL', 30))
+    MOBIL_CACHE_SIZE = int(os.getenv('MOBIL_CACHE_SIZE', 256))
+    
+    # Job rollup pendapatan: watermark dimundurkan sekian detik agar transaksi
+    # yang commit terlambat tetap terproses
+    ROLLUP_WATERMARK_OVERLAP = int(os.getenv('ROLLUP_WATERMARK_OVERLAP', 300))
+    
     @classmethod
     def get_db_config(cls):
         """Factory method untuk mendapatkan konfigurasi database"""
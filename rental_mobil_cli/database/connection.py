@@ -1,38 +1,124 @@
+import threading
+import time
 import mysql.connector
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from mysql.connector import Error, pooling
 from config import Config
+from database.pool import PoolStats, PooledConnection, PoolTimeoutError
 
 class DatabaseConnectionPool:
-    """Menggunakan Connection Pool untuk efisiensi koneksi (Singleton Pattern)"""
+    """
+    Menggunakan Connection Pool untuk efisiensi koneksi (Singleton Pattern)
+    
+    - Ukuran, timeout, dan recycle diatur lewat Config (DB_POOL_*)
+    - get_connection() menunggu (antri) sampai ada koneksi bebas atau timeout
+    - Koneksi di-ping saat dipinjam dan di-reconnect jika sudah terlalu lama
+    - Statistik pemakaian tersedia lewat get_stats()
+    """
     _instance = None
     _connection_pool = None
+    _init_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._initialize_pool()
+            with cls._init_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    cls._initialize_pool()
+                    cls._instance = instance
         return cls._instance
     
     @classmethod
     def _initialize_pool(cls):
         """Inisialisasi connection pool"""
+        pool_size = Config.DB_POOL_SIZE
+        if not 1 <= pool_size <= pooling.CNX_POOL_MAXSIZE:
+            raise ValueError(f"DB_POOL_SIZE harus antara 1 dan {pooling.CNX_POOL_MAXSIZE}")
+        
         try:
             db_config = Config.get_db_config()
             cls._connection_pool = pooling.MySQLConnectionPool(
                 pool_name="rental_pool",
-                pool_size=5,
+                pool_size=pool_size,
                 **db_config
             )
-            print("Connection pool created successfully")
+            cls._pool_size = pool_size
+            # Slot pool: acquire menunggu di sini, bukan langsung error "pool exhausted"
+            cls._slots = threading.BoundedSemaphore(pool_size)
+            cls._connected_at = {}
+            cls.stats = PoolStats()
+            print(f"Connection pool created successfully (size={pool_size})")
         except Error as e:
             print(f"Error creating connection pool: {e}")
             raise
     
-    def get_connection(self):
-        """Mendapatkan koneksi dari pool"""
-        if self._connection_pool:
-            return self._connection_pool.get_connection()
-        raise Exception("Connection pool not initialized")
+    def get_connection(self, timeout: Optional[float] = None):
+        """
+        Mendapatkan koneksi dari pool
+        
+        Args:
+            timeout: Detik maksimal menunggu koneksi bebas (default DB_POOL_TIMEOUT)
+        
+        Raises:
+            PoolTimeoutError: Jika tidak ada koneksi bebas sampai timeout
+        """
+        if not self._connection_pool:
+            raise Exception("Connection pool not initialized")
+        
+        timeout = Config.DB_POOL_TIMEOUT if timeout is None else timeout
+        start = time.perf_counter()
+        waited = not self._slots.acquire(blocking=False)
+        if waited and not self._slots.acquire(timeout=timeout):
+            self.stats.record_timeout()
+            raise PoolTimeoutError(
+                f"Tidak ada koneksi bebas dalam {timeout} detik (pool_size={self._pool_size})"
+            )
+        wait_time = time.perf_counter() - start
+        
+        try:
+            cnx = self._connection_pool.get_connection()
+        except Error:
+            self._slots.release()
+            self.stats.record_error()
+            raise
+        
+        try:
+            self._check_health(cnx)
+        except Error:
+            self.stats.record_error()
+            cnx.close()
+            self._slots.release()
+            raise
+        
+        self.stats.record_borrow(waited, wait_time)
+        return PooledConnection(cnx, self._return_slot)
+    
+    def _return_slot(self):
+        """Dipanggil saat koneksi dikembalikan ke pool"""
+        self.stats.record_return()
+        self._slots.release()
+    
+    def _check_health(self, cnx):
+        """Recycle koneksi yang sudah lebih lama dari DB_POOL_RECYCLE, lalu ping"""
+        raw = cnx._cnx
+        now = time.monotonic()
+        connected_at = self._connected_at.setdefault(id(raw), now)
+        
+        if Config.DB_POOL_RECYCLE > 0 and now - connected_at > Config.DB_POOL_RECYCLE:
+            raw.reconnect(attempts=1)
+            self._connected_at[id(raw)] = time.monotonic()
+            self.stats.record_recycle()
+        elif Config.DB_POOL_PING:
+            # Reconnect otomatis jika koneksi diputus server (wait_timeout, restart)
+            if not raw.is_connected():
+                raw.reconnect(attempts=1)
+                self._connected_at[id(raw)] = time.monotonic()
+                self.stats.record_recycle()
+    
+    def get_stats(self) -> Dict:
+        """Statistik pemakaian pool (borrowed, waits, histogram waktu tunggu, errors)"""
+        return self.stats.snapshot(self._pool_size)
     
     @classmethod
     def close_all_connections(cls):
@@ -44,16 +130,99 @@ class DatabaseConnectionPool:
 class DatabaseManager:
     """Manager untuk database operations dengan connection pooling"""
     
+    # Koneksi transaksi aktif per thread, dipakai bersama oleh semua DatabaseManager
+    _local = threading.local()
+    
     def __init__(self):
         self.pool = DatabaseConnectionPool()
     
-    def execute_query(self, query: str, params: tuple = None, fetch: bool = False):
-        """Execute query dengan optional fetch result"""
+    def _acquire(self):
+        """
+        Ambil koneksi untuk satu operasi.
+        
+        Returns:
+            Tuple (connection, pinned). pinned=True berarti koneksi milik
+            transaction() yang sedang aktif: jangan commit/rollback/close.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            return connection, True
+        return self.pool.get_connection(), False
+    
+    def _release(self, connection, pinned: bool):
+        """Kembalikan koneksi ke pool (kecuali koneksi transaksi)"""
+        if not pinned:
+            connection.close()
+    
+    def in_transaction(self) -> bool:
+        """Apakah thread ini sedang berada di dalam transaction()"""
+        return getattr(self._local, 'connection', None) is not None
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: semua query repository di dalam blok ini memakai satu
+        koneksi dan di-commit sekali di akhir (rollback jika terjadi error).
+        
+        Blok transaction() bersarang ikut transaksi terluar.
+        
+        Contoh:
+            with db_manager.transaction():
+                mobil = mobil_repo.find_by_id_for_update(mobil_id)
+                penyewaan_repo.create(penyewaan)
+                mobil_repo.update_status(mobil_id, 'disewa')
+        """
+        if self.in_transaction():
+            yield self._local.connection
+            return
+        
+        connection = self.pool.get_connection()
+        self._local.connection = connection
+        self._local.on_commit = []
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            connection.start_transaction()
+            yield connection
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            callbacks = self._local.on_commit
+            self._local.connection = None
+            self._local.on_commit = []
+            connection.close()
+        
+        for callback in callbacks:
+            callback()
+    
+    def on_commit(self, callback):
+        """
+        Jalankan callback setelah transaksi aktif di-commit (langsung jika
+        tidak sedang di dalam transaction()). Dipakai misalnya untuk
+        invalidasi cache agar tidak terisi data yang belum di-commit.
+        """
+        if self.in_transaction():
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+    
+    def execute_query(self, query: str, params: tuple = None, fetch: bool = False,
+                      dictionary: bool = True):
+        """
+        Execute query dengan optional fetch result
+        
+        Args:
+            dictionary: True untuk row berupa dict, False untuk row tuple
+                        (lebih hemat, dipakai oleh RowMapper)
+        """
         connection = None
+        pinned = False
         cursor = None
         try:
-            connection = self.pool.get_connection()
-            cursor = connection.cursor(dictionary=True)
+            connection, pinned = self._acquire()
+            cursor = connection.cursor(dictionary=dictionary)
             
             if params:
                 cursor.execute(query, params)
@@ -63,31 +232,76 @@ class DatabaseManager:
             if fetch:
                 # Return last insert id untuk INSERT queries
                 if 'INSERT' in query.upper():
-                    connection.commit()
+                    if not pinned:
+                        connection.commit()
                     return cursor.lastrowid
                 else:
                     result = cursor.fetchall()
                     return result
             else:
-                connection.commit()
+                if not pinned:
+                    connection.commit()
                 return cursor.rowcount
                 
         except Error as e:
+            if connection and not pinned:
+                connection.rollback()
+            raise e
+        finally:
+            if cursor:
+                cursor.close()
             if connection:
+                self._release(connection, pinned)
+    
+    def execute_batch(self, operations: Sequence[Tuple[str, object]]) -> List[Tuple[int, int]]:
+        """
+        Execute beberapa query dalam satu koneksi dan satu transaksi (satu commit).
+        
+        Args:
+            operations: List (query, params). Jika params berupa list of tuple,
+                        query dijalankan dengan executemany().
+        
+        Returns:
+            List (lastrowid, rowcount) untuk setiap operasi, sesuai urutan
+        """
+        connection = None
+        pinned = False
+        cursor = None
+        try:
+            connection, pinned = self._acquire()
+            cursor = connection.cursor()
+            
+            results = []
+            for query, params in operations:
+                if isinstance(params, list):
+                    cursor.executemany(query, params)
+                elif params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                results.append((cursor.lastrowid, cursor.rowcount))
+            
+            if not pinned:
+                connection.commit()
+            return results
+                
+        except Error as e:
+            if connection and not pinned:
                 connection.rollback()
             raise e
         finally:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
+                self._release(connection, pinned)
     
     def execute_query_one(self, query: str, params: tuple = None):
         """Execute query dan return satu row"""
         connection = None
+        pinned = False
         cursor = None
         try:
-            connection = self.pool.get_connection()
+            connection, pinned = self._acquire()
             cursor = connection.cursor(dictionary=True)
             
             if params:
@@ -104,14 +318,15 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
+                self._release(connection, pinned)
     
     def execute_query_many(self, query: str, params: tuple = None):
         """Execute query dan return semua rows"""
         connection = None
+        pinned = False
         cursor = None
         try:
-            connection = self.pool.get_connection()
+            connection, pinned = self._acquire()
             cursor = connection.cursor(dictionary=True)
             
             if params:
@@ -128,18 +343,74 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
+                self._release(connection, pinned)
+    
+    def stream_query(self, query: str, params: tuple = None, dictionary: bool = False,
+                     batch_size: int = 1000) -> Iterator:
+        """
+        Execute SELECT dan hasilkan row satu per satu (generator).
+        
+        Memakai cursor unbuffered: row dibaca dari server per batch, bukan
+        fetchall(), sehingga memori tetap kecil untuk result set besar.
+        Koneksi tetap dipinjam dari pool sampai generator habis atau ditutup,
+        dan tidak boleh dipakai untuk query lain selama iterasi berjalan.
+        """
+        for batch in self.iter_batches(query, params, batch_size, dictionary):
+            yield from batch
+    
+    def iter_batches(self, query: str, params: tuple = None, batch_size: int = 1000,
+                     dictionary: bool = False) -> Iterator[List]:
+        """
+        Execute SELECT dan hasilkan row per batch (list berisi maksimal batch_size row).
+        
+        Cocok untuk laporan/ekspor: konsumen memproses satu batch lalu
+        membuangnya sebelum batch berikutnya dibaca dari server.
+        Di dalam transaction(), koneksi transaksi yang dipakai, jadi iterasi
+        harus selesai sebelum query lain dijalankan di transaksi tersebut.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size minimal 1")
+        
+        connection = None
+        pinned = False
+        cursor = None
+        try:
+            connection, pinned = self._acquire()
+            cursor = connection.cursor(buffered=False, dictionary=dictionary)
+            
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+                
+        finally:
+            # Konsumen bisa berhenti lebih awal (break / close generator):
+            # sisa row harus dibuang sebelum koneksi dikembalikan ke pool
+            if connection and connection.unread_result:
+                connection.consume_results()
+            if cursor:
+                cursor.close()
+            if connection:
+                self._release(connection, pinned)
     
     def execute_call_procedure(self, procedure_name: str, args: list = None):
         """Execute stored procedure"""
         connection = None
+        pinned = False
         cursor = None
         try:
-            connection = self.pool.get_connection()
+            connection, pinned = self._acquire()
             cursor = connection.cursor()
             
             cursor.callproc(procedure_name, args or [])
-            connection.commit()
+            if not pinned:
+                connection.commit()
             
             # Get result dari procedure
             results = []
@@ -149,11 +420,11 @@ class DatabaseManager:
             return results
                 
         except Error as e:
-            if connection:
+            if connection and not pinned:
                 connection.rollback()
             raise e
         finally:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
\ No newline at end of file
+                self._release(connection, pinned)
\ No newline at end of file
@@ -425,6 +425,38 @@ class DatabaseCreator:
                     INDEX idx_aksi (aksi),
                     INDEX idx_id_record (id_record)
                 ) ENGINE=InnoDB
+            """,
+            
+            'sequence_counter': """
+                CREATE TABLE IF NOT EXISTS sequence_counter (
+                    prefix VARCHAR(50) PRIMARY KEY,
+                    last_value BIGINT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB
+            """,
+            
+            'revenue_daily': """
+                CREATE TABLE IF NOT EXISTS revenue_daily (
+                    tanggal DATE NOT NULL,
+                    mobil_id INT NOT NULL,
+                    metode_pembayaran VARCHAR(20) NOT NULL,
+                    jumlah_transaksi INT NOT NULL DEFAULT 0,
+                    total_biaya DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    total_denda DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    total_dibayar DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    
+                    PRIMARY KEY (tanggal, mobil_id, metode_pembayaran),
+                    INDEX idx_revenue_mobil (mobil_id, tanggal)
+                ) ENGINE=InnoDB
+            """,
+            
+            'rollup_watermark': """
+                CREATE TABLE IF NOT EXISTS rollup_watermark (
+                    nama VARCHAR(50) PRIMARY KEY,
+                    last_processed_at DATETIME NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB
             """
         }
         
@@ -456,12 +488,19 @@ class DatabaseCreator:
                 # Index untuk pencarian mobil
                 "CREATE INDEX idx_mobil_search ON mobil (merk, model, tahun, harga_sewa_per_hari)",
                 
+                # Index untuk cari mobil tersedia (status + awalan merk + harga maksimal)
+                "CREATE INDEX idx_mobil_tersedia ON mobil (status, merk, harga_sewa_per_hari)",
+                
                 # Index untuk laporan berdasarkan tanggal sewa
                 "CREATE INDEX idx_penyewaan_tanggal ON penyewaan (tanggal_sewa)",
                 
                 # Index untuk pelanggan berdasarkan kota
                 "CREATE INDEX idx_pelanggan_kota ON pelanggan (kota, provinsi)",
                 
+                # Index untuk catch-up rollup pendapatan (row yang berubah sejak watermark)
+                "CREATE INDEX idx_penyewaan_updated ON penyewaan (updated_at)",
+                "CREATE INDEX idx_pembayaran_updated ON pembayaran (updated_at)",
+                
                 # Index untuk pembayaran berdasarkan status dan tanggal
                 "CREATE INDEX idx_pembayaran_status_tanggal ON pembayaran (status, tanggal_bayar)",
                 
@@ -767,25 +806,24 @@ class DatabaseCreator:
             ORDER BY p.tanggal_kembali;
             """
             
-            # 3. View: Laporan pendapatan bulanan
+            # 3. View: Laporan pendapatan bulanan (dibaca dari rollup revenue_daily)
             view_pendapatan_bulanan = """
             CREATE OR REPLACE VIEW view_pendapatan_bulanan AS
             SELECT 
-                YEAR(tanggal_sewa) as tahun,
-                MONTH(tanggal_sewa) as bulan,
-                DATE_FORMAT(tanggal_sewa, '%Y-%m') as periode,
-                COUNT(*) as jumlah_transaksi,
+                YEAR(tanggal) as tahun,
+                MONTH(tanggal) as bulan,
+                DATE_FORMAT(tanggal, '%Y-%m') as periode,
+                SUM(jumlah_transaksi) as jumlah_transaksi,
                 SUM(total_biaya) as total_biaya,
-                SUM(denda) as total_denda,
-                SUM(total_biaya + denda) as total_pendapatan,
-                AVG(total_biaya) as rata_rata_transaksi
-            FROM penyewaan
-            WHERE status IN ('selesai', 'terlambat')
-            GROUP BY YEAR(tanggal_sewa), MONTH(tanggal_sewa)
+                SUM(total_denda) as total_denda,
+                SUM(total_biaya + total_denda) as total_pendapatan,
+                SUM(total_biaya) / NULLIF(SUM(jumlah_transaksi), 0) as rata_rata_transaksi
+            FROM revenue_daily
+            GROUP BY YEAR(tanggal), MONTH(tanggal)
             ORDER BY tahun DESC, bulan DESC;
             """
             
-            # 4. View: Statistik mobil
+            # 4. View: Statistik mobil (dibaca dari rollup revenue_daily)
             view_statistik_mobil = """
             CREATE OR REPLACE VIEW view_statistik_mobil AS
             SELECT 
@@ -794,13 +832,20 @@ class DatabaseCreator:
                 m.model,
                 m.plat_nomor,
                 m.status,
-                COUNT(p.id) as total_penyewaan,
-                COALESCE(SUM(p.total_biaya), 0) as total_pendapatan,
-                COALESCE(AVG(p.total_biaya), 0) as rata_pendapatan,
-                COALESCE(MAX(p.tanggal_sewa), m.created_at) as terakhir_disewa
+                COALESCE(r.total_penyewaan, 0) as total_penyewaan,
+                COALESCE(r.total_pendapatan, 0) as total_pendapatan,
+                COALESCE(r.total_pendapatan / NULLIF(r.total_penyewaan, 0), 0) as rata_pendapatan,
+                COALESCE(r.terakhir_disewa, m.created_at) as terakhir_disewa
             FROM mobil m
-            LEFT JOIN penyewaan p ON m.id = p.mobil_id AND p.status IN ('selesai', 'terlambat')
-            GROUP BY m.id
+            LEFT JOIN (
+                SELECT 
+                    mobil_id,
+                    SUM(jumlah_transaksi) as total_penyewaan,
+                    SUM(total_biaya) as total_pendapatan,
+                    MAX(tanggal) as terakhir_disewa
+                FROM revenue_daily
+                GROUP BY mobil_id
+            ) r ON r.mobil_id = m.id
             ORDER BY total_pendapatan DESC;
             """
             
@@ -1700,7 +1745,8 @@ class DatabaseCreator:
         print(f"\n{self.COLORS['BOLD']}Selanjutnya:{self.COLORS['ENDC']}")
         print("1. Jalankan aplikasi: python main.py")
         print("2. Cek database: python database/check_database.py")
-        print("3. Mulai gunakan sistem rental mobil!")
+        print("3. Isi rollup pendapatan: python rollup_job.py rebuild")
+        print("4. Mulai gunakan sistem rental mobil!")
         
         return True
 
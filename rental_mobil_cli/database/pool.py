@@ -0,0 +1,122 @@
+"""
+Komponen pendukung DatabaseConnectionPool: statistik pemakaian pool dan
+proxy koneksi yang mengembalikan slot pool saat close().
+"""
+
+import threading
+from typing import Dict
+from mysql.connector.errors import PoolError
+
+
+class PoolTimeoutError(PoolError):
+    """Tidak ada koneksi bebas dalam batas waktu DB_POOL_TIMEOUT"""
+
+
+class PoolStats:
+    """Counter pemakaian connection pool (thread-safe)"""
+
+    # Batas atas bucket histogram waktu tunggu (milidetik)
+    WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset semua counter ke nol"""
+        with self._lock:
+            self.borrowed = 0
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.waits = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.wait_histogram = {bucket: 0 for bucket in self.WAIT_BUCKETS_MS}
+            self.wait_histogram['>1000'] = 0
+            self.timeouts = 0
+            self.errors = 0
+            self.recycled = 0
+
+    def record_borrow(self, waited: bool, wait_time: float):
+        with self._lock:
+            self.borrowed += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if waited:
+                self.waits += 1
+                self.wait_time_total += wait_time
+                self.wait_time_max = max(self.wait_time_max, wait_time)
+                wait_ms = wait_time * 1000
+                for bucket in self.WAIT_BUCKETS_MS:
+                    if wait_ms <= bucket:
+                        self.wait_histogram[bucket] += 1
+                        break
+                else:
+                    self.wait_histogram['>1000'] += 1
+
+    def record_return(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_recycle(self):
+        with self._lock:
+            self.recycled += 1
+
+    def snapshot(self, pool_size: int) -> Dict:
+        """Salinan statistik saat ini dalam bentuk dict"""
+        with self._lock:
+            return {
+                'pool_size': pool_size,
+                'borrowed': self.borrowed,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'utilisation': self.in_use / pool_size if pool_size else 0,
+                'waits': self.waits,
+                'wait_time_avg_ms': (self.wait_time_total / self.waits * 1000) if self.waits else 0,
+                'wait_time_max_ms': self.wait_time_max * 1000,
+                'wait_histogram_ms': {
+                    (f"<={k}" if isinstance(k, int) else k): v
+                    for k, v in self.wait_histogram.items()
+                },
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'recycled': self.recycled,
+            }
+
+
+class PooledConnection:
+    """
+    Proxy koneksi pool. Semua atribut diteruskan ke koneksi asli;
+    close() mengembalikan koneksi ke pool dan membebaskan slot tepat sekali.
+    """
+
+    def __init__(self, cnx, release):
+        self._cnx = cnx
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        try:
+            cnx.close()
+        finally:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
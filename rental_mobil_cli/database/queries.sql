@@ -16,7 +16,8 @@ CREATE TABLE IF NOT EXISTS mobil (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_status (status),
-    INDEX idx_merk (merk)
+    INDEX idx_merk (merk),
+    INDEX idx_mobil_tersedia (status, merk, harga_sewa_per_hari)
 ) ENGINE=InnoDB;
 
 -- Tabel Pelanggan
@@ -50,7 +51,8 @@ CREATE TABLE IF NOT EXISTS penyewaan (
     FOREIGN KEY (pelanggan_id) REFERENCES pelanggan(id) ON DELETE RESTRICT,
     INDEX idx_status (status),
     INDEX idx_tanggal_sewa (tanggal_sewa),
-    INDEX idx_pelanggan (pelanggan_id)
+    INDEX idx_pelanggan (pelanggan_id),
+    INDEX idx_updated_at (updated_at)
 ) ENGINE=InnoDB;
 
 -- Tabel Pembayaran
@@ -62,9 +64,39 @@ CREATE TABLE IF NOT EXISTS pembayaran (
     status ENUM('pending', 'lunas', 'gagal') DEFAULT 'pending',
     tanggal_bayar TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     bukti_pembayaran TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (penyewaan_id) REFERENCES penyewaan(id) ON DELETE CASCADE,
     INDEX idx_status (status),
-    INDEX idx_tanggal_bayar (tanggal_bayar)
+    INDEX idx_tanggal_bayar (tanggal_bayar),
+    INDEX idx_updated_at (updated_at)
+) ENGINE=InnoDB;
+
+-- Tabel Counter Sequence (kode penyewaan, dll)
+CREATE TABLE IF NOT EXISTS sequence_counter (
+    prefix VARCHAR(50) PRIMARY KEY,
+    last_value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- Tabel Rollup Pendapatan Harian (per tanggal sewa, mobil, metode pembayaran)
+CREATE TABLE IF NOT EXISTS revenue_daily (
+    tanggal DATE NOT NULL,
+    mobil_id INT NOT NULL,
+    metode_pembayaran VARCHAR(20) NOT NULL,
+    jumlah_transaksi INT NOT NULL DEFAULT 0,
+    total_biaya DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_denda DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_dibayar DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (tanggal, mobil_id, metode_pembayaran),
+    INDEX idx_revenue_mobil (mobil_id, tanggal)
+) ENGINE=InnoDB;
+
+-- Tabel Watermark Job Rollup
+CREATE TABLE IF NOT EXISTS rollup_watermark (
+    nama VARCHAR(50) PRIMARY KEY,
+    last_processed_at DATETIME NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 ) ENGINE=InnoDB;
 
 -- Sample data
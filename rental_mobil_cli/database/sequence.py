@@ -0,0 +1,149 @@
+"""
+Sequence allocator untuk kode transaksi (misal: kode penyewaan).
+
+Menggantikan pencarian MAX sequence dengan membaca seluruh tabel. Nilai
+sequence disimpan di tabel `sequence_counter` (satu baris per prefix) dan
+diambil secara atomik dengan satu `INSERT ... ON DUPLICATE KEY UPDATE`
+(tanpa SELECT ... FOR UPDATE pada baris yang belum ada, jadi tidak ada gap
+lock/deadlock saat prefix baru dipakai pertama kali), sehingga aman dipakai
+dari beberapa proses sekaligus.
+"""
+
+import threading
+from typing import Optional, Tuple
+from mysql.connector import Error
+
+
+class SequenceAllocator:
+    """Mengalokasikan nilai sequence dari tabel counter (satu baris per prefix)"""
+
+    CREATE_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS sequence_counter (
+        prefix VARCHAR(50) PRIMARY KEY,
+        last_value BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB
+    """
+
+    def __init__(self, db_manager, prefix: str, seed_query: Optional[str] = None):
+        """
+        Args:
+            db_manager: DatabaseManager yang menyediakan connection pool
+            prefix: Kunci counter (misal 'RENT')
+            seed_query: Query opsional yang mengembalikan nilai awal counter
+                        (dipakai sekali saat baris counter belum ada)
+        """
+        self.db_manager = db_manager
+        self.prefix = prefix
+        self.seed_query = seed_query
+        self._table_ready = False
+        self._row_ready = False
+
+    def _ensure_table(self, cursor):
+        """Buat tabel counter jika belum ada (sekali per instance)"""
+        if not self._table_ready:
+            cursor.execute(self.CREATE_TABLE_QUERY)
+            self._table_ready = True
+
+    def _seed_value(self, cursor) -> int:
+        """Hitung nilai awal counter dari data yang sudah ada"""
+        if not self.seed_query:
+            return 0
+        cursor.execute(self.seed_query)
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def reserve(self, count: int = 1) -> Tuple[int, int]:
+        """
+        Reservasi `count` nilai berurutan secara atomik.
+
+        Menggunakan koneksi sendiri dari pool (bukan koneksi transaksi
+        pemanggil) agar lock baris counter dilepas secepat mungkin. Jangan
+        dipanggil dari dalam DatabaseManager.transaction(): koneksi kedua
+        dari pool bisa menunggu selamanya jika pool penuh oleh transaksi.
+
+        Returns:
+            Tuple (nilai_pertama, nilai_terakhir) dari range yang direservasi
+        """
+        if count < 1:
+            raise ValueError("Jumlah reservasi sequence minimal 1")
+
+        connection = None
+        cursor = None
+        try:
+            connection = self.db_manager.pool.get_connection()
+            cursor = connection.cursor()
+            self._ensure_table(cursor)
+
+            seed = 0
+            if not self._row_ready:
+                # Cek biasa (tanpa FOR UPDATE, tidak mengambil gap lock);
+                # seed dari data lama hanya dihitung jika baris counter belum ada
+                cursor.execute(
+                    "SELECT 1 FROM sequence_counter WHERE prefix = %s", (self.prefix,)
+                )
+                if cursor.fetchone() is None:
+                    seed = self._seed_value(cursor)
+
+            # Satu statement: insert baris baru atau tambah counter yang ada.
+            # LAST_INSERT_ID(expr) menyimpan nilai akhir per koneksi.
+            cursor.execute(
+                "INSERT INTO sequence_counter (prefix, last_value) "
+                "VALUES (%s, LAST_INSERT_ID(%s)) "
+                "ON DUPLICATE KEY UPDATE last_value = LAST_INSERT_ID(last_value + %s)",
+                (self.prefix, seed + count, count)
+            )
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            new_last_value = int(cursor.fetchone()[0])
+            connection.commit()
+            self._row_ready = True
+
+            return new_last_value - count + 1, new_last_value
+
+        except Error as e:
+            if connection:
+                connection.rollback()
+            raise e
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+
+    def next_value(self) -> int:
+        """Ambil satu nilai sequence berikutnya"""
+        first, _ = self.reserve(1)
+        return first
+
+
+class BlockSequenceAllocator:
+    """
+    Allocator in-process yang mereservasi sequence per blok.
+
+    Satu round trip ke database untuk setiap `block_size` nilai; sisanya
+    dilayani dari memori. Nilai yang belum terpakai saat proses berhenti
+    akan hilang (menjadi gap), tetapi tidak pernah dipakai dua kali.
+    """
+
+    def __init__(self, allocator: SequenceAllocator, block_size: int = 10):
+        if block_size < 1:
+            raise ValueError("Ukuran blok sequence minimal 1")
+        self.allocator = allocator
+        self.block_size = block_size
+        self._next = 0
+        self._end = -1
+        self._lock = threading.Lock()
+
+    def next_value(self) -> int:
+        """Ambil nilai berikutnya dari blok lokal, reservasi blok baru jika habis"""
+        with self._lock:
+            if self._next > self._end:
+                self._next, self._end = self.allocator.reserve(self.block_size)
+            value = self._next
+            self._next += 1
+            return value
+
+    def remaining(self) -> int:
+        """Jumlah nilai yang masih tersisa di blok lokal"""
+        with self._lock:
+            return max(0, self._end - self._next + 1)
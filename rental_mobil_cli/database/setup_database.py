@@ -53,7 +53,8 @@ def setup_database_simple():
                 harga_sewa_per_hari DECIMAL(10,2) NOT NULL,
                 status ENUM('tersedia', 'disewa', 'perbaikan') DEFAULT 'tersedia',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_mobil_tersedia (status, merk, harga_sewa_per_hari)
             )
             """,
             
@@ -89,7 +90,8 @@ def setup_database_simple():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (mobil_id) REFERENCES mobil(id),
-                FOREIGN KEY (pelanggan_id) REFERENCES pelanggan(id)
+                FOREIGN KEY (pelanggan_id) REFERENCES pelanggan(id),
+                INDEX idx_updated_at (updated_at)
             )
             """,
             
@@ -106,7 +108,45 @@ def setup_database_simple():
                 bukti_pembayaran TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (penyewaan_id) REFERENCES penyewaan(id)
+                FOREIGN KEY (penyewaan_id) REFERENCES penyewaan(id),
+                INDEX idx_updated_at (updated_at)
+            )
+            """,
+            
+            # Tabel counter untuk sequence kode transaksi
+            """
+            DROP TABLE IF EXISTS sequence_counter;
+            CREATE TABLE sequence_counter (
+                prefix VARCHAR(50) PRIMARY KEY,
+                last_value BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+            """,
+            
+            # Tabel rollup pendapatan harian (per tanggal, mobil, metode pembayaran)
+            """
+            DROP TABLE IF EXISTS revenue_daily;
+            CREATE TABLE revenue_daily (
+                tanggal DATE NOT NULL,
+                mobil_id INT NOT NULL,
+                metode_pembayaran VARCHAR(20) NOT NULL,
+                jumlah_transaksi INT NOT NULL DEFAULT 0,
+                total_biaya DECIMAL(14,2) NOT NULL DEFAULT 0,
+                total_denda DECIMAL(14,2) NOT NULL DEFAULT 0,
+                total_dibayar DECIMAL(14,2) NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (tanggal, mobil_id, metode_pembayaran),
+                INDEX idx_revenue_mobil (mobil_id, tanggal)
+            )
+            """,
+            
+            # Tabel watermark job rollup
+            """
+            DROP TABLE IF EXISTS rollup_watermark;
+            CREATE TABLE rollup_watermark (
+                nama VARCHAR(50) PRIMARY KEY,
+                last_processed_at DATETIME NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )
             """
         ]
@@ -162,6 +202,9 @@ def setup_database_simple():
         print("2. pelanggan  - Data customer")
         print("3. penyewaan  - Transaksi rental (Tabel utama)")
         print("4. pembayaran - Transaksi pembayaran")
+        print("5. sequence_counter - Counter kode transaksi")
+        print("6. revenue_daily - Rollup pendapatan harian")
+        print("7. rollup_watermark - Watermark job rollup")
         
         # Tampilkan jumlah data
         cursor.execute("SELECT COUNT(*) FROM mobil")
@@ -42,7 +42,7 @@ class RentalMobilApp:
         print("3. Sewa Mobil")
         print("4. Pengembalian Mobil")
         print("5. Pembayaran")
-        print("6. Laporan Harian")
+        print("6. Laporan Penyewaan")
         print("7. Cari Mobil Tersedia")
         print("8. Setup Database")
         print("0. Keluar")
@@ -407,8 +407,8 @@ class RentalMobilApp:
             print(f"Error: {e}")
     
     def laporan_harian_menu(self):
-        """Menu laporan harian"""
-        print("\n--- Laporan Harian ---")
+        """Menu laporan harian / mingguan / bulanan"""
+        print("\n--- Laporan Penyewaan ---")
         
         try:
             tanggal_str = input("Tanggal (YYYY-MM-DD) [kosongkan untuk hari ini]: ").strip()
@@ -416,28 +416,33 @@ class RentalMobilApp:
                 tanggal = date.fromisoformat(tanggal_str)
             else:
                 tanggal = date.today()
+            periode = input("Periode (harian/mingguan/bulanan) [harian]: ").strip().lower() or 'harian'
             
-            laporan = self.rental_service.laporan_penyewaan_harian(tanggal)
+            laporan = self.rental_service.laporan_penyewaan(tanggal, periode, detail=True)
             
             if 'error' in laporan:
                 print(f"Error: {laporan['error']}")
                 return
             
-            print(f"\nLaporan Penyewaan Tanggal: {tanggal}")
+            if periode == 'harian':
+                print(f"\nLaporan Penyewaan Tanggal: {tanggal}")
+            else:
+                print(f"\nLaporan Penyewaan {periode.capitalize()}: "
+                      f"{laporan['tanggal_mulai']} s/d {laporan['tanggal_akhir']}")
             print(f"Total Transaksi: {laporan['total_transaksi']}")
             print(f"Total Biaya Sewa: Rp {laporan['total_biaya']:,.2f}")
             print(f"Total Denda: Rp {laporan['total_denda']:,.2f}")
             print(f"Total Pendapatan: Rp {laporan['total_pendapatan']:,.2f}")
             print("-"*50)
             
-            if laporan['transaksi']:
+            if laporan['total_transaksi']:
                 print("\nDetail Transaksi:")
                 for trans in laporan['transaksi']:
-                    print(f"ID: {trans['id']} | {trans['merk']} {trans['model']} "
+                    print(f"ID: {trans['id']} | {trans['tanggal_sewa']} | {trans['merk']} {trans['model']} "
                           f"({trans['plat_nomor']}) | Pelanggan: {trans['nama_pelanggan']} | "
                           f"Biaya: Rp {float(trans['total_biaya']):,.2f}")
             else:
-                print("Tidak ada transaksi pada tanggal ini.")
+                print("Tidak ada transaksi pada periode ini.")
                 
         except Exception as e:
             print(f"Error: {e}")
@@ -4,9 +4,14 @@ from dataclasses import dataclass
 from typing import Optional
 from utils.validators import Validator
 
-@dataclass
+@dataclass(slots=True)
 class Entity(ABC):
-    """Abstract Base Class untuk semua entities (Open/Closed Principle)"""
+    """
+    Abstract Base Class untuk semua entities (Open/Closed Principle)
+    
+    Entity memakai __slots__ (tanpa __dict__ per instance) agar hemat memori
+    saat repository memuat ribuan row sekaligus.
+    """
     id: Optional[int] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -19,6 +24,8 @@ class Entity(ABC):
 class Mobil(Entity):
     """Entity untuk Mobil"""
     
+    __slots__ = ('merk', 'model', 'tahun', 'plat_nomor', 'harga_sewa_per_hari', 'status')
+    
     def __init__(self, merk: str, model: str, tahun: int, plat_nomor: str, 
                  harga_sewa_per_hari: float, status: str = 'tersedia', **kwargs):
         super().__init__(**kwargs)
@@ -44,6 +51,8 @@ class Mobil(Entity):
 class Pelanggan(Entity):
     """Entity untuk Pelanggan"""
     
+    __slots__ = ('nik', 'nama', 'alamat', 'no_telepon', 'email')
+    
     def __init__(self, nik: str, nama: str, alamat: str = '', 
                  no_telepon: str = '', email: str = '', **kwargs):
         super().__init__(**kwargs)
@@ -68,6 +77,10 @@ class Pelanggan(Entity):
 class Penyewaan(Entity):
     """Entity untuk Penyewaan"""
     
+    __slots__ = ('mobil_id', 'pelanggan_id', 'tanggal_sewa', 'tanggal_kembali',
+                 'tanggal_pengembalian', 'total_hari', 'total_biaya', 'denda',
+                 'status', 'kode_penyewaan')
+    
     def __init__(self, mobil_id: int, pelanggan_id: int, tanggal_sewa: date,
                  tanggal_kembali: date, total_hari: int, total_biaya: float,
                  tanggal_pengembalian: Optional[date] = None, denda: float = 0,
@@ -106,6 +119,8 @@ class Penyewaan(Entity):
 class Pembayaran(Entity):
     """Entity untuk Pembayaran"""
     
+    __slots__ = ('penyewaan_id', 'jumlah', 'metode_pembayaran', 'status', 'bukti_pembayaran')
+    
     def __init__(self, penyewaan_id: int, jumlah: float, 
                  metode_pembayaran: str, status: str = 'pending',
                  bukti_pembayaran: str = '', **kwargs):
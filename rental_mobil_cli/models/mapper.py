@@ -0,0 +1,75 @@
+"""
+Row mapper untuk repositories.
+
+Memetakan row hasil query (tuple, bukan dict) ke entity secara deklaratif:
+setiap entity cukup mendefinisikan daftar kolom dan konverternya sekali,
+lalu mapper yang sama dipakai oleh semua method find_*.
+"""
+
+from typing import Any, Callable, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+
+T = TypeVar('T')
+
+# Kolom bisa berupa nama saja, atau (nama, konverter) jika nilainya perlu diubah
+ColumnSpec = Union[str, Tuple[str, Optional[Callable[[Any], Any]]]]
+
+
+def to_float(value) -> Optional[float]:
+    """Konversi DECIMAL dari MySQL ke float (None tetap None)"""
+    return float(value) if value is not None else None
+
+
+class RowMapper(Generic[T]):
+    """
+    Mapper kolom -> atribut entity.
+
+    Entity dibuat tanpa memanggil __init__ (semua atribut di-set langsung
+    dari kolom), sehingga cocok dengan entity berbasis __slots__ dan jauh
+    lebih murah dibanding membangun dict per row.
+    """
+
+    def __init__(self, entity_class: Type[T], table: str, columns: Sequence[ColumnSpec]):
+        self.entity_class = entity_class
+        self.table = table
+        self.columns: List[str] = []
+        self.converters: List[Tuple[int, Callable[[Any], Any]]] = []
+
+        for index, spec in enumerate(columns):
+            name, converter = (spec, None) if isinstance(spec, str) else spec
+            self.columns.append(name)
+            if converter is not None:
+                self.converters.append((index, converter))
+
+        self.select_list = ', '.join(self.columns)
+
+    def select(self, where: str = '') -> str:
+        """Bangun query SELECT dengan urutan kolom yang sesuai mapper"""
+        query = f"SELECT {self.select_list} FROM {self.table}"
+        return f"{query} WHERE {where}" if where else query
+
+    def map_row(self, row: Sequence[Any]) -> T:
+        """Petakan satu row (tuple) menjadi entity"""
+        if self.converters:
+            row = list(row)
+            for index, converter in self.converters:
+                row[index] = converter(row[index])
+
+        entity = self.entity_class.__new__(self.entity_class)
+        for name, value in zip(self.columns, row):
+            setattr(entity, name, value)
+        return entity
+
+    def map_one(self, rows: Sequence[Sequence[Any]]) -> Optional[T]:
+        """Petakan row pertama, None jika hasil kosong"""
+        return self.map_row(rows[0]) if rows else None
+
+    def map_all(self, rows: Iterable[Sequence[Any]]) -> List[T]:
+        """Petakan semua row menjadi list entity"""
+        map_row = self.map_row
+        return [map_row(row) for row in rows]
+
+    def iter_map(self, rows: Iterable[Sequence[Any]]) -> Iterator[T]:
+        """Versi lazy dari map_all: entity dibuat satu per satu saat diiterasi"""
+        map_row = self.map_row
+        for row in rows:
+            yield map_row(row)
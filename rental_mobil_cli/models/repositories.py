@@ -1,16 +1,220 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic
+from typing import Dict, Iterator, List, Optional, Sequence, TypeVar, Generic
+from config import Config
 from database.connection import DatabaseManager
 from models.entitas import Mobil, Pelanggan, Penyewaan, Pembayaran
+from models.mapper import RowMapper, to_float
+from utils.cache import TTLCache
 
 T = TypeVar('T')
 
 class Repository(ABC, Generic[T]):
     """Abstract Base Class untuk repositories (Interface Segregation Principle)"""
     
+    # Mapper kolom -> entity, didefinisikan oleh setiap repository turunan
+    mapper: RowMapper = None
+    
+    # Kolom untuk operasi bulk: kolom INSERT, kolom UPDATE, dan kunci unik
+    # yang dipakai bulk_upsert (ON DUPLICATE KEY) serta pencarian id
+    insert_columns: tuple = ()
+    update_columns: tuple = ()
+    unique_key: str = 'id'
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
     
+    def _find_one(self, where: str, params: tuple = None) -> Optional[T]:
+        """SELECT satu entity dengan kondisi WHERE"""
+        rows = self.db_manager.execute_query(
+            self.mapper.select(where), params, fetch=True, dictionary=False
+        )
+        return self.mapper.map_one(rows)
+    
+    def find_by_id_for_update(self, id: int) -> Optional[T]:
+        """
+        SELECT ... FOR UPDATE: kunci row sampai transaksi selesai.
+        Hanya bermakna di dalam db_manager.transaction().
+        """
+        return self._find_one("id = %s FOR UPDATE", (id,))
+    
+    def _find_many(self, where: str = '', params: tuple = None) -> List[T]:
+        """SELECT banyak entity dengan kondisi WHERE (opsional)"""
+        rows = self.db_manager.execute_query(
+            self.mapper.select(where), params, fetch=True, dictionary=False
+        )
+        return self.mapper.map_all(rows)
+    
+    def _iter_many(self, where: str = '', params: tuple = None,
+                   batch_size: int = 1000) -> Iterator[T]:
+        """
+        Versi streaming dari _find_many: row dibaca per batch dari server
+        dan entity dibuat saat diiterasi (memori tidak bergantung jumlah row)
+        """
+        rows = self.db_manager.stream_query(
+            self.mapper.select(where), params, batch_size=batch_size
+        )
+        return self.mapper.iter_map(rows)
+    
+    def iter_all(self, batch_size: int = 1000) -> Iterator[T]:
+        """Counterpart streaming dari find_all()"""
+        return self._iter_many(batch_size=batch_size)
+    
+    # ========== BULK OPERATIONS ==========
+    
+    @staticmethod
+    def _chunks(items: Sequence, chunk_size: Optional[int]):
+        """Bagi list menjadi potongan berukuran chunk_size"""
+        size = chunk_size or Config.BULK_CHUNK_SIZE
+        if size < 1:
+            raise ValueError("chunk_size minimal 1")
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+    
+    @staticmethod
+    def _validate_bulk(entities: Sequence[T]):
+        """Validasi semua entity sekaligus, kumpulkan semua error dalam satu ValueError"""
+        errors = []
+        for index, entity in enumerate(entities):
+            try:
+                entity.validate()
+            except ValueError as e:
+                errors.append(f"  - Data ke-{index + 1}: {e}")
+        
+        if errors:
+            raise ValueError(f"Validasi gagal untuk {len(errors)} data:\n" + "\n".join(errors))
+    
+    def _insert_query(self, columns: Sequence[str], row_count: int, upsert: bool = False) -> str:
+        """Bangun INSERT multi-row VALUES (opsional ON DUPLICATE KEY UPDATE)"""
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        query = (f"INSERT INTO {self.mapper.table} ({', '.join(columns)}) "
+                 f"VALUES {', '.join([placeholders] * row_count)}")
+        if upsert:
+            updates = [f"{col} = VALUES({col})"
+                       for col in self.update_columns if col != self.unique_key]
+            query += " ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+        return query
+    
+    def _ids_by_unique_key(self, keys: Sequence) -> dict:
+        """Ambil mapping kunci unik -> id untuk data yang baru ditulis"""
+        ids = {}
+        for chunk in self._chunks(list(keys), None):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = (f"SELECT {self.unique_key}, id FROM {self.mapper.table} "
+                     f"WHERE {self.unique_key} IN ({placeholders})")
+            for key, id in self.db_manager.execute_query(query, tuple(chunk), fetch=True,
+                                                         dictionary=False):
+                ids[key] = id
+        return ids
+    
+    def _insert_operations(self, entities: Sequence[T], columns: Sequence[str],
+                           chunk_size: Optional[int], upsert: bool = False):
+        """Bangun operasi INSERT multi-row per chunk untuk execute_batch"""
+        chunks = list(self._chunks(entities, chunk_size))
+        operations = [
+            (self._insert_query(columns, len(chunk), upsert),
+             tuple(getattr(entity, col) for entity in chunk for col in columns))
+            for chunk in chunks
+        ]
+        return chunks, operations
+    
+    @staticmethod
+    def _ids_from_lastrowid(chunks, results) -> List[int]:
+        """
+        Id hasil INSERT multi-row tanpa kunci unik: berurutan mulai dari lastrowid
+        (dijamin pada innodb_autoinc_lock_mode 0/1, default MySQL 5.x & MariaDB)
+        """
+        return [first_id + offset
+                for chunk, (first_id, _) in zip(chunks, results)
+                for offset in range(len(chunk))]
+    
+    def bulk_create(self, entities: Sequence[T], chunk_size: Optional[int] = None) -> List[int]:
+        """
+        Insert banyak entity dengan INSERT multi-row VALUES per chunk,
+        semua chunk dalam satu transaksi.
+        
+        Returns:
+            List id yang di-generate, sesuai urutan entities (juga di-set ke entity.id)
+        """
+        entities = list(entities)
+        if not entities:
+            return []
+        self._validate_bulk(entities)
+        
+        chunks, operations = self._insert_operations(entities, self.insert_columns, chunk_size)
+        results = self.db_manager.execute_batch(operations)
+        
+        keys = [getattr(e, self.unique_key) for e in entities] if self.unique_key in self.insert_columns else []
+        if keys and None not in keys:
+            ids_by_key = self._ids_by_unique_key(keys)
+            ids = [ids_by_key[key] for key in keys]
+        else:
+            ids = self._ids_from_lastrowid(chunks, results)
+        
+        for entity, id in zip(entities, ids):
+            entity.id = id
+        return ids
+    
+    def bulk_update(self, entities: Sequence[T], chunk_size: Optional[int] = None) -> int:
+        """
+        Update banyak entity (berdasarkan id) dengan executemany per chunk,
+        semua chunk dalam satu transaksi.
+        
+        Returns:
+            Jumlah row yang berubah
+        """
+        entities = list(entities)
+        if not entities:
+            return 0
+        self._validate_bulk(entities)
+        
+        columns = self.update_columns
+        query = (f"UPDATE {self.mapper.table} SET "
+                 + ", ".join(f"{col} = %s" for col in columns) + " WHERE id = %s")
+        operations = [
+            (query, [tuple(getattr(entity, col) for col in columns) + (entity.id,)
+                     for entity in chunk])
+            for chunk in self._chunks(entities, chunk_size)
+        ]
+        results = self.db_manager.execute_batch(operations)
+        return sum(rowcount for _, rowcount in results)
+    
+    def bulk_upsert(self, entities: Sequence[T], chunk_size: Optional[int] = None) -> List[int]:
+        """
+        INSERT ... ON DUPLICATE KEY UPDATE berdasarkan unique_key, per chunk
+        dalam satu transaksi. Jika kuncinya id, entity tanpa id di-insert
+        sebagai data baru.
+        
+        Returns:
+            List id data (baru maupun yang di-update), sesuai urutan entities
+        """
+        entities = list(entities)
+        if not entities:
+            return []
+        self._validate_bulk(entities)
+        
+        key = self.unique_key
+        if key == 'id':
+            baru = [e for e in entities if e.id is None]
+            lama = [e for e in entities if e.id is not None]
+            columns = (key,) + self.insert_columns
+        else:
+            baru, lama = [], entities
+            columns = self.insert_columns
+        
+        chunks_baru, operations = self._insert_operations(baru, self.insert_columns, chunk_size)
+        _, upserts = self._insert_operations(lama, columns, chunk_size, upsert=True)
+        results = self.db_manager.execute_batch(operations + upserts)
+        
+        for entity, id in zip(baru, self._ids_from_lastrowid(chunks_baru, results)):
+            entity.id = id
+        if key != 'id':
+            ids_by_key = self._ids_by_unique_key([getattr(e, key) for e in lama])
+            for entity in lama:
+                entity.id = ids_by_key[getattr(entity, key)]
+        
+        return [entity.id for entity in entities]
+    
     @abstractmethod
     def create(self, entity: T) -> int:
         pass
@@ -32,7 +236,57 @@ class Repository(ABC, Generic[T]):
         pass
 
 class MobilRepository(Repository[Mobil]):
-    """Repository untuk entity Mobil"""
+    """
+    Repository untuk entity Mobil
+    
+    Method baca (find_by_id, find_all, search_available) dilayani lewat
+    cache TTL+LRU bersama satu proses; setiap penulisan meng-invalidate cache.
+    """
+    
+    mapper = RowMapper(Mobil, 'mobil', [
+        'id', 'merk', 'model', 'tahun', 'plat_nomor',
+        ('harga_sewa_per_hari', to_float), 'status', 'created_at', 'updated_at'
+    ])
+    insert_columns = ('merk', 'model', 'tahun', 'plat_nomor', 'harga_sewa_per_hari', 'status')
+    update_columns = insert_columns
+    unique_key = 'plat_nomor'
+    
+    cache = TTLCache(ttl=Config.MOBIL_CACHE_TTL, max_size=Config.MOBIL_CACHE_SIZE)
+    
+    # ========== CACHE ==========
+    
+    def _cached(self, key: tuple, loader):
+        """
+        Read-through cache. Di dalam transaksi cache dilewati agar data yang
+        belum di-commit tidak ikut tersimpan. Hasil selalu berupa salinan,
+        sehingga perubahan pada entity tidak mengubah isi cache.
+        """
+        if self.db_manager.in_transaction():
+            return loader()
+        
+        result = self.cache.get_or_load(key, loader)
+        if isinstance(result, list):
+            return [copy.copy(mobil) for mobil in result]
+        return copy.copy(result)
+    
+    def _invalidate_cache(self, mobil_id: Optional[int] = None):
+        """Invalidasi cache sekarang dan sekali lagi setelah transaksi di-commit"""
+        def invalidate():
+            if mobil_id is None:
+                self.cache.clear()
+            else:
+                self.cache.invalidate(('id', mobil_id))
+                self.cache.invalidate_where(lambda key: key[0] != 'id')
+        
+        invalidate()
+        self.db_manager.on_commit(invalidate)
+    
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        """Counter hit/miss cache mobil"""
+        return cls.cache.stats()
+    
+    # ========== CRUD ==========
     
     def create(self, mobil: Mobil) -> int:
         mobil.validate()
@@ -44,50 +298,21 @@ class MobilRepository(Repository[Mobil]):
                  mobil.harga_sewa_per_hari, mobil.status)
         
         result = self.db_manager.execute_query(query, params, fetch=True)
+        self._invalidate_cache()
         return result
     
     def find_by_id(self, id: int) -> Optional[Mobil]:
-        query = "SELECT * FROM mobil WHERE id = %s"
-        result = self.db_manager.execute_query(query, (id,), fetch=True)
-        
-        if result:
-            data = result[0]
-            return Mobil(
-                id=data['id'],
-                merk=data['merk'],
-                model=data['model'],
-                tahun=data['tahun'],
-                plat_nomor=data['plat_nomor'],
-                harga_sewa_per_hari=float(data['harga_sewa_per_hari']),
-                status=data['status'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-        return None
+        return self._cached(('id', id), lambda: self._find_one("id = %s", (id,)))
     
     def find_all(self, status: Optional[str] = None) -> List[Mobil]:
         if status:
-            query = "SELECT * FROM mobil WHERE status = %s"
-            results = self.db_manager.execute_query(query, (status,), fetch=True)
-        else:
-            query = "SELECT * FROM mobil"
-            results = self.db_manager.execute_query(query, fetch=True)
-        
-        mobils = []
-        for data in results:
-            mobil = Mobil(
-                id=data['id'],
-                merk=data['merk'],
-                model=data['model'],
-                tahun=data['tahun'],
-                plat_nomor=data['plat_nomor'],
-                harga_sewa_per_hari=float(data['harga_sewa_per_hari']),
-                status=data['status'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            mobils.append(mobil)
-        return mobils
+            return self._cached(('all', status), lambda: self._find_many("status = %s", (status,)))
+        return self._cached(('all', None), lambda: self._find_many())
+    
+    def iter_all(self, status: Optional[str] = None, batch_size: int = 1000) -> Iterator[Mobil]:
+        if status:
+            return self._iter_many("status = %s", (status,), batch_size)
+        return self._iter_many(batch_size=batch_size)
     
     def update(self, mobil: Mobil) -> bool:
         mobil.validate()
@@ -101,26 +326,74 @@ class MobilRepository(Repository[Mobil]):
                  mobil.harga_sewa_per_hari, mobil.status, mobil.id)
         
         rows_affected = self.db_manager.execute_query(query, params)
+        self._invalidate_cache(mobil.id)
         return rows_affected > 0
     
     def delete(self, id: int) -> bool:
         query = "DELETE FROM mobil WHERE id = %s"
         rows_affected = self.db_manager.execute_query(query, (id,))
+        self._invalidate_cache(id)
         return rows_affected > 0
     
+    def bulk_create(self, entities: Sequence[Mobil], chunk_size: Optional[int] = None) -> List[int]:
+        ids = super().bulk_create(entities, chunk_size)
+        self._invalidate_cache()
+        return ids
+    
+    def bulk_update(self, entities: Sequence[Mobil], chunk_size: Optional[int] = None) -> int:
+        rows_affected = super().bulk_update(entities, chunk_size)
+        self._invalidate_cache()
+        return rows_affected
+    
+    def bulk_upsert(self, entities: Sequence[Mobil], chunk_size: Optional[int] = None) -> List[int]:
+        ids = super().bulk_upsert(entities, chunk_size)
+        self._invalidate_cache()
+        return ids
+    
     def find_available(self) -> List[Mobil]:
         """Method khusus untuk mencari mobil yang tersedia"""
         return self.find_all('tersedia')
     
+    def search_available(self, merk: Optional[str] = None,
+                         harga_max: Optional[float] = None) -> List[Mobil]:
+        """
+        Cari mobil tersedia dengan filter di SQL (memakai index
+        idx_mobil_tersedia: status, merk, harga_sewa_per_hari).
+        
+        Filter merk berupa awalan (prefix), tidak membedakan huruf besar/kecil.
+        """
+        conditions = ["status = 'tersedia'"]
+        params = []
+        if merk:
+            # Escape wildcard LIKE dari input pengguna
+            escaped = merk.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("merk LIKE %s")
+            params.append(f"{escaped}%")
+        if harga_max:
+            conditions.append("harga_sewa_per_hari <= %s")
+            params.append(harga_max)
+        
+        where = " AND ".join(conditions)
+        key = ('search', merk.lower() if merk else None, harga_max)
+        return self._cached(key, lambda: self._find_many(where, tuple(params) or None))
+    
     def update_status(self, mobil_id: int, status: str) -> bool:
         """Update status mobil"""
         query = "UPDATE mobil SET status = %s WHERE id = %s"
         rows_affected = self.db_manager.execute_query(query, (status, mobil_id))
+        self._invalidate_cache(mobil_id)
         return rows_affected > 0
 
 class PelangganRepository(Repository[Pelanggan]):
     """Repository untuk entity Pelanggan"""
     
+    mapper = RowMapper(Pelanggan, 'pelanggan', [
+        'id', 'nik', 'nama', 'alamat', 'no_telepon', 'email', 'created_at', 'updated_at'
+    ])
+    insert_columns = ('nik', 'nama', 'alamat', 'no_telepon', 'email')
+    update_columns = insert_columns
+    unique_key = 'nik'
+    
     def create(self, pelanggan: Pelanggan) -> int:
         pelanggan.validate()
         query = """
@@ -134,41 +407,10 @@ class PelangganRepository(Repository[Pelanggan]):
         return result
     
     def find_by_id(self, id: int) -> Optional[Pelanggan]:
-        query = "SELECT * FROM pelanggan WHERE id = %s"
-        result = self.db_manager.execute_query(query, (id,), fetch=True)
-        
-        if result:
-            data = result[0]
-            return Pelanggan(
-                id=data['id'],
-                nik=data['nik'],
-                nama=data['nama'],
-                alamat=data['alamat'],
-                no_telepon=data['no_telepon'],
-                email=data['email'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-        return None
+        return self._find_one("id = %s", (id,))
     
     def find_all(self) -> List[Pelanggan]:
-        query = "SELECT * FROM pelanggan"
-        results = self.db_manager.execute_query(query, fetch=True)
-        
-        pelanggans = []
-        for data in results:
-            pelanggan = Pelanggan(
-                id=data['id'],
-                nik=data['nik'],
-                nama=data['nama'],
-                alamat=data['alamat'],
-                no_telepon=data['no_telepon'],
-                email=data['email'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            pelanggans.append(pelanggan)
-        return pelanggans
+        return self._find_many()
     
     def update(self, pelanggan: Pelanggan) -> bool:
         pelanggan.validate()
@@ -190,26 +432,22 @@ class PelangganRepository(Repository[Pelanggan]):
     
     def find_by_nik(self, nik: str) -> Optional[Pelanggan]:
         """Find pelanggan by NIK"""
-        query = "SELECT * FROM pelanggan WHERE nik = %s"
-        result = self.db_manager.execute_query(query, (nik,), fetch=True)
-        
-        if result:
-            data = result[0]
-            return Pelanggan(
-                id=data['id'],
-                nik=data['nik'],
-                nama=data['nama'],
-                alamat=data['alamat'],
-                no_telepon=data['no_telepon'],
-                email=data['email'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-        return None
+        return self._find_one("nik = %s", (nik,))
 
 class PenyewaanRepository(Repository[Penyewaan]):
     """Repository untuk entity Penyewaan"""
     
+    mapper = RowMapper(Penyewaan, 'penyewaan', [
+        'id', 'mobil_id', 'pelanggan_id', 'tanggal_sewa', 'tanggal_kembali',
+        'tanggal_pengembalian', 'total_hari', ('total_biaya', to_float),
+        ('denda', to_float), 'status', 'kode_penyewaan', 'created_at', 'updated_at'
+    ])
+    insert_columns = ('kode_penyewaan', 'mobil_id', 'pelanggan_id', 'tanggal_sewa',
+                      'tanggal_kembali', 'tanggal_pengembalian', 'total_hari',
+                      'total_biaya', 'denda', 'status')
+    update_columns = insert_columns[1:]
+    unique_key = 'kode_penyewaan'
+    
     def create(self, penyewaan: Penyewaan) -> int:
         penyewaan.validate()
         query = """
@@ -227,51 +465,10 @@ class PenyewaanRepository(Repository[Penyewaan]):
         return result
     
     def find_by_id(self, id: int) -> Optional[Penyewaan]:
-        query = "SELECT * FROM penyewaan WHERE id = %s"
-        result = self.db_manager.execute_query(query, (id,), fetch=True)
-        
-        if result:
-            data = result[0]
-            return Penyewaan(
-                id=data['id'],
-                mobil_id=data['mobil_id'],
-                pelanggan_id=data['pelanggan_id'],
-                tanggal_sewa=data['tanggal_sewa'],
-                tanggal_kembali=data['tanggal_kembali'],
-                tanggal_pengembalian=data['tanggal_pengembalian'],
-                total_hari=data['total_hari'],
-                total_biaya=float(data['total_biaya']),
-                denda=float(data['denda']),
-                status=data['status'],
-                kode_penyewaan=data['kode_penyewaan'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-        return None
+        return self._find_one("id = %s", (id,))
     
     def find_all(self) -> List[Penyewaan]:
-        query = "SELECT * FROM penyewaan"
-        results = self.db_manager.execute_query(query, fetch=True)
-        
-        penyewaans = []
-        for data in results:
-            penyewaan = Penyewaan(
-                id=data['id'],
-                mobil_id=data['mobil_id'],
-                pelanggan_id=data['pelanggan_id'],
-                tanggal_sewa=data['tanggal_sewa'],
-                tanggal_kembali=data['tanggal_kembali'],
-                tanggal_pengembalian=data['tanggal_pengembalian'],
-                total_hari=data['total_hari'],
-                total_biaya=float(data['total_biaya']),
-                denda=float(data['denda']),
-                status=data['status'],
-                kode_penyewaan=data['kode_penyewaan'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            penyewaans.append(penyewaan)
-        return penyewaans
+        return self._find_many()
     
     def update(self, penyewaan: Penyewaan) -> bool:
         penyewaan.validate()
@@ -298,57 +495,30 @@ class PenyewaanRepository(Repository[Penyewaan]):
     
     def find_active_rentals(self) -> List[Penyewaan]:
         """Mencari penyewaan yang masih aktif"""
-        query = "SELECT * FROM penyewaan WHERE status = 'aktif'"
-        results = self.db_manager.execute_query(query, fetch=True)
-        
-        penyewaans = []
-        for data in results:
-            penyewaan = Penyewaan(
-                id=data['id'],
-                mobil_id=data['mobil_id'],
-                pelanggan_id=data['pelanggan_id'],
-                tanggal_sewa=data['tanggal_sewa'],
-                tanggal_kembali=data['tanggal_kembali'],
-                tanggal_pengembalian=data['tanggal_pengembalian'],
-                total_hari=data['total_hari'],
-                total_biaya=float(data['total_biaya']),
-                denda=float(data['denda']),
-                status=data['status'],
-                kode_penyewaan=data['kode_penyewaan'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            penyewaans.append(penyewaan)
-        return penyewaans
+        return self._find_many("status = 'aktif'")
     
     def find_by_customer(self, pelanggan_id: int) -> List[Penyewaan]:
         """Mencari penyewaan berdasarkan pelanggan"""
-        query = "SELECT * FROM penyewaan WHERE pelanggan_id = %s"
-        results = self.db_manager.execute_query(query, (pelanggan_id,), fetch=True)
-        
-        penyewaans = []
-        for data in results:
-            penyewaan = Penyewaan(
-                id=data['id'],
-                mobil_id=data['mobil_id'],
-                pelanggan_id=data['pelanggan_id'],
-                tanggal_sewa=data['tanggal_sewa'],
-                tanggal_kembali=data['tanggal_kembali'],
-                tanggal_pengembalian=data['tanggal_pengembalian'],
-                total_hari=data['total_hari'],
-                total_biaya=float(data['total_biaya']),
-                denda=float(data['denda']),
-                status=data['status'],
-                kode_penyewaan=data['kode_penyewaan'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            penyewaans.append(penyewaan)
-        return penyewaans
+        return self._find_many("pelanggan_id = %s", (pelanggan_id,))
+    
+    def iter_by_date_range(self, tanggal_mulai, tanggal_akhir,
+                           batch_size: int = 1000) -> Iterator[Penyewaan]:
+        """Streaming penyewaan dengan tanggal_sewa di [tanggal_mulai, tanggal_akhir)"""
+        return self._iter_many(
+            "tanggal_sewa >= %s AND tanggal_sewa < %s ORDER BY tanggal_sewa, id",
+            (tanggal_mulai, tanggal_akhir), batch_size
+        )
 
 class PembayaranRepository(Repository[Pembayaran]):
     """Repository untuk entity Pembayaran"""
     
+    mapper = RowMapper(Pembayaran, 'pembayaran', [
+        'id', 'penyewaan_id', ('jumlah', to_float), 'metode_pembayaran', 'status',
+        'bukti_pembayaran', 'created_at', 'updated_at'
+    ])
+    insert_columns = ('penyewaan_id', 'jumlah', 'metode_pembayaran', 'status', 'bukti_pembayaran')
+    update_columns = insert_columns
+    
     def create(self, pembayaran: Pembayaran) -> int:
         pembayaran.validate()
         query = """
@@ -364,41 +534,10 @@ class PembayaranRepository(Repository[Pembayaran]):
         return result
     
     def find_by_id(self, id: int) -> Optional[Pembayaran]:
-        query = "SELECT * FROM pembayaran WHERE id = %s"
-        result = self.db_manager.execute_query(query, (id,), fetch=True)
-        
-        if result:
-            data = result[0]
-            return Pembayaran(
-                id=data['id'],
-                penyewaan_id=data['penyewaan_id'],
-                jumlah=float(data['jumlah']),
-                metode_pembayaran=data['metode_pembayaran'],
-                status=data['status'],
-                bukti_pembayaran=data['bukti_pembayaran'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-        return None
+        return self._find_one("id = %s", (id,))
     
     def find_all(self) -> List[Pembayaran]:
-        query = "SELECT * FROM pembayaran"
-        results = self.db_manager.execute_query(query, fetch=True)
-        
-        pembayarans = []
-        for data in results:
-            pembayaran = Pembayaran(
-                id=data['id'],
-                penyewaan_id=data['penyewaan_id'],
-                jumlah=float(data['jumlah']),
-                metode_pembayaran=data['metode_pembayaran'],
-                status=data['status'],
-                bukti_pembayaran=data['bukti_pembayaran'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            pembayarans.append(pembayaran)
-        return pembayarans
+        return self._find_many()
     
     def update(self, pembayaran: Pembayaran) -> bool:
         pembayaran.validate()
@@ -422,20 +561,4 @@ class PembayaranRepository(Repository[Pembayaran]):
     
     def find_by_rental(self, penyewaan_id: int) -> List[Pembayaran]:
         """Mencari pembayaran berdasarkan penyewaan"""
-        query = "SELECT * FROM pembayaran WHERE penyewaan_id = %s"
-        results = self.db_manager.execute_query(query, (penyewaan_id,), fetch=True)
-        
-        pembayarans = []
-        for data in results:
-            pembayaran = Pembayaran(
-                id=data['id'],
-                penyewaan_id=data['penyewaan_id'],
-                jumlah=float(data['jumlah']),
-                metode_pembayaran=data['metode_pembayaran'],
-                status=data['status'],
-                bukti_pembayaran=data['bukti_pembayaran'],
-                created_at=data['created_at'],
-                updated_at=data['updated_at']
-            )
-            pembayarans.append(pembayaran)
-        return pembayarans
\ No newline at end of file
+        return self._find_many("penyewaan_id = %s", (penyewaan_id,))
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+============================================
+JOB ROLLUP PENDAPATAN - RENTAL MOBIL CLI
+============================================
+Menjaga tabel revenue_daily tetap sinkron dengan
+penyewaan & pembayaran. Jalankan `catchup` secara
+berkala (mis. cron tiap 5 menit) untuk menangkap
+perubahan di luar RentalService.
+
+Penggunaan:
+    python rollup_job.py catchup
+    python rollup_job.py rebuild [YYYY-MM-DD] [YYYY-MM-DD]
+============================================
+"""
+
+import sys
+import os
+import time
+from datetime import date
+
+# Add current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.connection import DatabaseManager, DatabaseConnectionPool
+from services.rollup_service import RevenueRollupService
+
+
+def run_catch_up() -> dict:
+    """Proses hari yang berubah sejak watermark terakhir"""
+    service = RevenueRollupService(DatabaseManager())
+    print("\n🔄 Catch-up rollup pendapatan...")
+    start = time.perf_counter()
+    hasil = service.catch_up()
+    print(f"✅ {hasil['hari_diproses']} hari dihitung ulang dalam "
+          f"{time.perf_counter() - start:.2f}s (watermark: {hasil['watermark']})")
+    return hasil
+
+
+def run_rebuild(awal: date = None, akhir: date = None) -> dict:
+    """Bangun ulang rollup (semua data atau range tanggal)"""
+    service = RevenueRollupService(DatabaseManager())
+    label = f"{awal} s/d {akhir}" if awal and akhir else "semua data"
+    print(f"\n🔄 Rebuild rollup pendapatan ({label})...")
+    start = time.perf_counter()
+    hasil = service.rebuild(awal, akhir)
+    print(f"✅ {hasil['hari_diproses']} hari dihitung ulang dalam "
+          f"{time.perf_counter() - start:.2f}s")
+    return hasil
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("📊 JOB ROLLUP PENDAPATAN")
+    print("=" * 50)
+
+    try:
+        if len(sys.argv) > 1:
+            command = sys.argv[1]
+
+            if command == "catchup":
+                run_catch_up()
+            elif command == "rebuild":
+                tanggal = [date.fromisoformat(a) for a in sys.argv[2:4]]
+                if len(tanggal) == 1:
+                    print("Rebuild range membutuhkan tanggal awal dan akhir")
+                    sys.exit(1)
+                run_rebuild(*tanggal)
+            else:
+                print(f"Unknown command: {command}")
+                print("Available commands: catchup, rebuild")
+        else:
+            print("\nUsage:")
+            print("  python rollup_job.py catchup                    - Proses perubahan sejak watermark")
+            print("  python rollup_job.py rebuild [awal] [akhir]     - Bangun ulang rollup (YYYY-MM-DD)")
+    finally:
+        DatabaseConnectionPool.close_all_connections()
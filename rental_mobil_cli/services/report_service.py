@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+from typing import Dict, Iterator, Tuple
+from database.connection import DatabaseManager
+
+class ReportService:
+    """
+    Service laporan penyewaan.
+
+    - Filter tanggal berupa range (tanggal_sewa >= awal AND tanggal_sewa < akhir)
+      sehingga index idx_tanggal_sewa tetap terpakai
+    - Total dihitung di database dengan SUM()/COUNT(), bukan di Python
+    - Detail transaksi di-stream hanya jika diminta
+    """
+
+    PERIODE = ('harian', 'mingguan', 'bulanan')
+
+    SUMMARY_QUERY = """
+    SELECT
+        COUNT(*) AS total_transaksi,
+        COALESCE(SUM(total_biaya), 0) AS total_biaya,
+        COALESCE(SUM(denda), 0) AS total_denda
+    FROM penyewaan
+    WHERE tanggal_sewa >= %s AND tanggal_sewa < %s
+    """
+
+    DETAIL_QUERY = """
+    SELECT
+        p.id,
+        p.tanggal_sewa,
+        p.tanggal_kembali,
+        p.total_biaya,
+        p.denda,
+        m.merk,
+        m.model,
+        m.plat_nomor,
+        pl.nama as nama_pelanggan
+    FROM penyewaan p
+    JOIN mobil m ON p.mobil_id = m.id
+    JOIN pelanggan pl ON p.pelanggan_id = pl.id
+    WHERE p.tanggal_sewa >= %s AND p.tanggal_sewa < %s
+    ORDER BY p.tanggal_sewa, p.id
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+
+    @classmethod
+    def periode_range(cls, tanggal: date, periode: str = 'harian') -> Tuple[date, date]:
+        """
+        Hitung range [awal, akhir) untuk periode yang memuat tanggal.
+        Minggu dimulai hari Senin.
+        """
+        if periode == 'harian':
+            awal = tanggal
+            akhir = tanggal + timedelta(days=1)
+        elif periode == 'mingguan':
+            awal = tanggal - timedelta(days=tanggal.weekday())
+            akhir = awal + timedelta(days=7)
+        elif periode == 'bulanan':
+            awal = tanggal.replace(day=1)
+            akhir = (awal + timedelta(days=32)).replace(day=1)
+        else:
+            raise ValueError(f"Periode harus salah satu dari: {', '.join(cls.PERIODE)}")
+        return awal, akhir
+
+    def ringkasan(self, awal: date, akhir: date) -> Dict:
+        """Total transaksi, biaya, dan denda untuk range [awal, akhir)"""
+        row = self.db_manager.execute_query_one(self.SUMMARY_QUERY, (awal, akhir))
+        total_biaya = float(row['total_biaya'])
+        total_denda = float(row['total_denda'])
+        return {
+            'total_transaksi': int(row['total_transaksi']),
+            'total_biaya': total_biaya,
+            'total_denda': total_denda,
+            'total_pendapatan': total_biaya + total_denda,
+        }
+
+    def iter_detail(self, awal: date, akhir: date, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream detail transaksi untuk range [awal, akhir) (dict per row)"""
+        return self.db_manager.stream_query(
+            self.DETAIL_QUERY, (awal, akhir), dictionary=True, batch_size=batch_size
+        )
+
+    def laporan(self, tanggal: date, periode: str = 'harian', detail: bool = False) -> Dict:
+        """
+        Laporan penyewaan untuk periode harian, mingguan, atau bulanan.
+
+        Args:
+            tanggal: Tanggal acuan (periode yang memuat tanggal ini)
+            periode: 'harian', 'mingguan', atau 'bulanan'
+            detail: True untuk menyertakan iterator detail transaksi
+                    di key 'transaksi' (di-stream saat diiterasi)
+        """
+        awal, akhir = self.periode_range(tanggal, periode)
+        laporan = {
+            'tanggal': tanggal,
+            'periode': periode,
+            'tanggal_mulai': awal,
+            'tanggal_akhir': akhir - timedelta(days=1),
+        }
+        laporan.update(self.ringkasan(awal, akhir))
+        laporan['transaksi'] = self.iter_detail(awal, akhir) if detail else None
+        return laporan
@@ -0,0 +1,232 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from mysql.connector import Error
+from config import Config
+from database.connection import DatabaseManager
+
+class RevenueRollupService:
+    """
+    Rollup pendapatan harian di tabel `revenue_daily`
+    (satu baris per tanggal sewa, mobil, dan metode pembayaran).
+
+    Rollup dijaga secara inkremental dengan menghitung ulang hanya hari yang
+    terdampak: dari write path RentalService (pengembalian, pembayaran) atau
+    dari catch_up() yang memproses row yang berubah sejak watermark terakhir.
+    Seperti view lama, hanya penyewaan berstatus selesai/terlambat yang dihitung.
+
+    Tabel revenue_daily & rollup_watermark dibuat oleh create_database.py /
+    setup_database.py (DDL tidak dijalankan di sini karena CREATE TABLE
+    melakukan implicit commit pada transaksi yang sedang berjalan).
+    """
+
+    WATERMARK_NAME = 'revenue_daily'
+
+    # Agregasi satu hari. Metode pembayaran diambil dari pembayaran lunas
+    # penyewaan tersebut ('belum_bayar' jika belum ada); subquery berkorelasi
+    # memakai index penyewaan_id sehingga tidak memindai seluruh pembayaran.
+    REFRESH_DAY_QUERY = """
+    INSERT INTO revenue_daily
+        (tanggal, mobil_id, metode_pembayaran, jumlah_transaksi,
+         total_biaya, total_denda, total_dibayar)
+    SELECT
+        %s,
+        x.mobil_id,
+        COALESCE(x.metode_pembayaran, 'belum_bayar'),
+        COUNT(*),
+        SUM(x.total_biaya),
+        SUM(x.denda),
+        COALESCE(SUM(x.dibayar), 0)
+    FROM (
+        SELECT
+            p.mobil_id,
+            p.total_biaya,
+            p.denda,
+            (SELECT MAX(pb.metode_pembayaran) FROM pembayaran pb
+             WHERE pb.penyewaan_id = p.id AND pb.status = 'lunas') AS metode_pembayaran,
+            (SELECT SUM(pb.jumlah) FROM pembayaran pb
+             WHERE pb.penyewaan_id = p.id AND pb.status = 'lunas') AS dibayar
+        FROM penyewaan p
+        WHERE p.tanggal_sewa >= %s AND p.tanggal_sewa < %s
+          AND p.status IN ('selesai', 'terlambat')
+    ) x
+    GROUP BY x.mobil_id, COALESCE(x.metode_pembayaran, 'belum_bayar')
+    """
+
+    # Hari yang terdampak perubahan sejak watermark
+    CHANGED_DAYS_QUERY = """
+    SELECT DISTINCT DATE(p.tanggal_sewa)
+    FROM penyewaan p
+    WHERE p.updated_at > %s
+    UNION
+    SELECT DISTINCT DATE(p.tanggal_sewa)
+    FROM pembayaran pb
+    JOIN penyewaan p ON pb.penyewaan_id = p.id
+    WHERE pb.updated_at > %s
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+
+    # ========== MAINTENANCE ==========
+
+    @staticmethod
+    def _as_date(value) -> date:
+        return value.date() if isinstance(value, datetime) else value
+
+    def refresh_days(self, days: Iterable) -> int:
+        """
+        Hitung ulang rollup untuk hari-hari tertentu (DELETE + INSERT ... SELECT
+        per hari) dalam satu transaksi. Jika dipanggil di dalam transaksi
+        pemanggil, rollup ikut di-commit bersama perubahan datanya.
+
+        Returns:
+            Jumlah hari yang dihitung ulang
+        """
+        days = sorted({self._as_date(day) for day in days if day is not None})
+        if not days:
+            return 0
+
+        with self.db_manager.transaction():
+            for day in days:
+                self.db_manager.execute_query(
+                    "DELETE FROM revenue_daily WHERE tanggal = %s", (day,)
+                )
+                self.db_manager.execute_query(
+                    self.REFRESH_DAY_QUERY, (day, day, day + timedelta(days=1))
+                )
+        return len(days)
+
+    def refresh_for_rental(self, tanggal_sewa) -> bool:
+        """
+        Hook untuk write path RentalService. Dijalankan di dalam SAVEPOINT:
+        jika gagal, hanya rollup yang dibatalkan (transaksi utama tetap jalan)
+        dan hari tersebut akan diperbaiki oleh catch_up().
+        """
+        if not self.db_manager.in_transaction():
+            try:
+                self.refresh_days([tanggal_sewa])
+                return True
+            except Error as e:
+                print(f"Warning: rollup pendapatan gagal diperbarui: {e}")
+                return False
+
+        self.db_manager.execute_query("SAVEPOINT rollup_refresh")
+        try:
+            self.refresh_days([tanggal_sewa])
+            self.db_manager.execute_query("RELEASE SAVEPOINT rollup_refresh")
+            return True
+        except Error as e:
+            self.db_manager.execute_query("ROLLBACK TO SAVEPOINT rollup_refresh")
+            print(f"Warning: rollup pendapatan gagal diperbarui: {e}")
+            return False
+
+    def _get_watermark(self) -> Optional[datetime]:
+        row = self.db_manager.execute_query_one(
+            "SELECT last_processed_at FROM rollup_watermark WHERE nama = %s",
+            (self.WATERMARK_NAME,)
+        )
+        return row['last_processed_at'] if row else None
+
+    def catch_up(self) -> Dict:
+        """
+        Proses hanya row penyewaan/pembayaran yang berubah sejak watermark.
+
+        Watermark dimundurkan ROLLUP_WATERMARK_OVERLAP detik agar transaksi
+        yang commit terlambat tetap ikut terproses (hitung ulang bersifat
+        idempotent). Jika belum ada watermark, seluruh data di-rebuild.
+        """
+        now = self.db_manager.execute_query("SELECT NOW() AS now", fetch=True)[0]['now']
+        watermark = self._get_watermark()
+
+        if watermark is None:
+            hasil = self.rebuild()
+        else:
+            since = watermark - timedelta(seconds=Config.ROLLUP_WATERMARK_OVERLAP)
+            rows = self.db_manager.execute_query(
+                self.CHANGED_DAYS_QUERY, (since, since), fetch=True, dictionary=False
+            )
+            hasil = {'hari_diproses': self.refresh_days(row[0] for row in rows)}
+
+        self.db_manager.execute_query(
+            """
+            INSERT INTO rollup_watermark (nama, last_processed_at) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE last_processed_at = VALUES(last_processed_at)
+            """,
+            (self.WATERMARK_NAME, now)
+        )
+        hasil['watermark'] = now
+        return hasil
+
+    def rebuild(self, awal: Optional[date] = None, akhir: Optional[date] = None) -> Dict:
+        """
+        Bangun ulang rollup untuk range tanggal [awal, akhir] (default: semua data).
+        Dipakai untuk inisialisasi atau setelah penyewaan dihapus.
+        """
+        if awal is None or akhir is None:
+            row = self.db_manager.execute_query_one(
+                "SELECT MIN(tanggal_sewa) AS awal, MAX(tanggal_sewa) AS akhir FROM penyewaan"
+            )
+            if not row or row['awal'] is None:
+                self.db_manager.execute_query("DELETE FROM revenue_daily")
+                return {'hari_diproses': 0}
+            awal = awal or self._as_date(row['awal'])
+            akhir = akhir or self._as_date(row['akhir'])
+
+        days: List[date] = []
+        day = awal
+        while day <= akhir:
+            days.append(day)
+            day += timedelta(days=1)
+
+        # Per bulan agar transaksi & lock tidak terlalu besar
+        diproses = 0
+        for start in range(0, len(days), 31):
+            diproses += self.refresh_days(days[start:start + 31])
+        return {'hari_diproses': diproses}
+
+    # ========== READ ==========
+
+    def pendapatan_bulanan(self, tahun: int, bulan: int) -> Dict:
+        """Ringkasan pendapatan satu bulan, dibaca dari rollup"""
+        awal = date(tahun, bulan, 1)
+        akhir = (awal + timedelta(days=32)).replace(day=1)
+        row = self.db_manager.execute_query_one(
+            """
+            SELECT
+                COALESCE(SUM(jumlah_transaksi), 0) AS jumlah_transaksi,
+                COALESCE(SUM(total_biaya), 0) AS total_biaya,
+                COALESCE(SUM(total_denda), 0) AS total_denda,
+                COALESCE(SUM(total_dibayar), 0) AS total_dibayar
+            FROM revenue_daily
+            WHERE tanggal >= %s AND tanggal < %s
+            """,
+            (awal, akhir)
+        )
+        total_biaya = float(row['total_biaya'])
+        total_denda = float(row['total_denda'])
+        jumlah = int(row['jumlah_transaksi'])
+        return {
+            'periode': awal.strftime('%Y-%m'),
+            'jumlah_transaksi': jumlah,
+            'total_biaya': total_biaya,
+            'total_denda': total_denda,
+            'total_pendapatan': total_biaya + total_denda,
+            'total_dibayar': float(row['total_dibayar']),
+            'rata_rata_transaksi': total_biaya / jumlah if jumlah else 0,
+        }
+
+    def pendapatan_per_metode(self, awal: date, akhir: date) -> List[Dict]:
+        """Pendapatan per metode pembayaran untuk range [awal, akhir)"""
+        return self.db_manager.execute_query(
+            """
+            SELECT metode_pembayaran,
+                   SUM(jumlah_transaksi) AS jumlah_transaksi,
+                   SUM(total_biaya + total_denda) AS total_pendapatan,
+                   SUM(total_dibayar) AS total_dibayar
+            FROM revenue_daily
+            WHERE tanggal >= %s AND tanggal < %s
+            GROUP BY metode_pembayaran
+            ORDER BY total_pendapatan DESC
+            """,
+            (awal, akhir), fetch=True
+        )
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+class TTLCache:
+    """
+    Cache in-process dengan batas waktu (TTL) dan batas jumlah entry (LRU).
+
+    Thread-safe. Entry yang kadaluarsa dibuang saat diakses, entry yang paling
+    lama tidak dipakai dibuang saat cache penuh. Setiap invalidasi menaikkan
+    generasi cache, sehingga hasil loader yang mulai membaca sebelum
+    invalidasi tidak disimpan (bisa berisi data lama).
+    """
+
+    def __init__(self, ttl: float = 30, max_size: int = 256):
+        """
+        Args:
+            ttl: Umur entry dalam detik (0 = cache dinonaktifkan)
+            max_size: Jumlah entry maksimal
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Ambil nilai dari cache (default jika tidak ada / kadaluarsa)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        """Simpan nilai ke cache"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any):
+        """Simpan entry (lock harus sudah dipegang)"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Read-through: ambil dari cache, atau panggil loader lalu simpan hasilnya.
+        Hasil tidak disimpan jika ada invalidasi selama loader berjalan.
+        """
+        if not self.enabled:
+            return loader()
+
+        missing = object()
+        with self._lock:
+            generation = self._generation
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            with self._lock:
+                if self._generation == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Hapus satu entry"""
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        """Hapus semua entry yang key-nya memenuhi predicate"""
+        with self._lock:
+            self._generation += 1
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Kosongkan cache"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """Counter hit/miss cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def reset_stats(self):
+        """Reset counter tanpa mengosongkan cache"""
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
@@ -245,34 +245,55 @@ class DatabaseQueryMonitor:
     """
     Context manager untuk memantau query database Django.
     
+    Query dihitung lewat connection.execute_wrapper, sehingga tetap bekerja
+    saat DEBUG=False (misal di test) dan tidak terbatas ukuran connection.queries.
+    
     Penggunaan:
-        with DatabaseQueryMonitor("get_all_mobil"):
-            mobils = Mobil.objects.all()
+        with DatabaseQueryMonitor("get_all_mobil") as qm:
+            mobils = list(Mobil.objects.all())
+        print(qm.query_count, qm.queries)
     """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, using: str = 'default', warn_threshold: int = 10):
         self.name = name
+        self.using = using
+        self.warn_threshold = warn_threshold
         self.start_time = None
-        self.query_count_start = 0
+        self.queries: List[Dict[str, Any]] = []
+        self._wrapper = None
+    
+    @property
+    def query_count(self) -> int:
+        return len(self.queries)
+    
+    def _catat_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'time_ms': (time.perf_counter() - start) * 1000,
+            })
     
     def __enter__(self):
-        from django.db import connection
+        from django.db import connections
+        self.queries = []
+        self._wrapper = connections[self.using].execute_wrapper(self._catat_query)
+        self._wrapper.__enter__()
         self.start_time = time.perf_counter()
-        self.query_count_start = len(connection.queries)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        from django.db import connection
-        
         duration_ms = (time.perf_counter() - self.start_time) * 1000
-        query_count = len(connection.queries) - self.query_count_start
+        self._wrapper.__exit__(exc_type, exc_val, exc_tb)
         
         monitor.record_metric(f"{self.name}_time", duration_ms, "ms")
-        monitor.record_metric(f"{self.name}_queries", query_count, "count")
+        monitor.record_metric(f"{self.name}_queries", self.query_count, "count")
         
         # Warning jika terlalu banyak query (N+1 problem)
-        if query_count > 10:
-            print(f"⚠️ WARNING: {self.name} executed {query_count} queries!")
+        if self.query_count > self.warn_threshold:
+            print(f"⚠️ WARNING: {self.name} executed {self.query_count} queries!")
         
         return False
 
@@ -366,6 +387,146 @@ def run_benchmark():
         print(f"❌ Error saat benchmark: {e}")
 
 
+def run_pagination_benchmark(model: str = "log", page_size: int = 50,
+                             pages=(1, 10, 100, 1000), ulangi: int = 5):
+    """
+    Bandingkan latency halaman ke-N: OFFSET vs cursor (keyset) pagination.
+    
+    Cursor halaman N disiapkan di luar pengukuran (setara client yang
+    menyimpan next_cursor), sehingga yang diukur hanya query halamannya.
+    """
+    from rental.models import LogAktivitas, Notifikasi
+    from rental.pagination import encode_cursor, keyset_page
+    
+    model_class = Notifikasi if model == "notifikasi" else LogAktivitas
+    queryset = model_class.objects.all()
+    total = queryset.count()
+    print(f"🔄 Benchmark pagination {model_class._meta.db_table} ({total} baris, {page_size}/halaman)")
+    print("-" * 60)
+    print(f"{'Halaman':>8} {'Offset (ms)':>14} {'Cursor (ms)':>14} {'Rasio':>8}")
+    
+    for page in pages:
+        offset = (page - 1) * page_size
+        if offset >= total:
+            break
+        
+        cursor = None
+        if offset:
+            sebelumnya = queryset.order_by('-created_at', '-id').values('created_at', 'id')[offset - 1]
+            cursor = encode_cursor(sebelumnya['created_at'], sebelumnya['id'])
+        
+        hasil = {}
+        for label, ambil in (
+            ("offset", lambda: list(queryset.order_by('-created_at', '-id')[offset:offset + page_size])),
+            ("cursor", lambda: keyset_page(queryset, page_size, cursor)),
+        ):
+            durasi = []
+            for _ in range(ulangi):
+                start = time.perf_counter()
+                ambil()
+                durasi.append((time.perf_counter() - start) * 1000)
+            hasil[label] = sum(durasi) / len(durasi)
+            monitor.record_metric(f"pagination.{label}.page_{page}", hasil[label], "ms")
+        
+        rasio = hasil["offset"] / hasil["cursor"] if hasil["cursor"] else 0
+        print(f"{page:>8} {hasil['offset']:>14.2f} {hasil['cursor']:>14.2f} {rasio:>7.1f}x")
+    
+    filepath = monitor.save_to_file()
+    print(f"\n📁 Hasil disimpan ke: {filepath}")
+
+
+def run_save_benchmark(ulangi: int = 20):
+    """
+    Jumlah query per save() Mobil: objek dari database (snapshot FieldTrackerMixin,
+    tanpa SELECT ulang) vs objek tanpa snapshot (fallback SELECT data lama).
+    Semua perubahan di-rollback.
+    """
+    from django.db import transaction
+    from rental.models import Mobil
+    
+    mobil = Mobil.objects.first()
+    if mobil is None:
+        print("❌ Belum ada data mobil untuk benchmark")
+        return
+    
+    print(f"🔄 Benchmark query per save ({ulangi}x, Mobil id={mobil.id})")
+    print("-" * 50)
+    hasil = {}
+    with transaction.atomic():
+        for label in ("snapshot", "tanpa_snapshot"):
+            total_query = 0
+            start = time.perf_counter()
+            for i in range(ulangi):
+                if label == "snapshot":
+                    obj = Mobil.objects.get(id=mobil.id)
+                else:
+                    obj = Mobil(**Mobil.objects.values().get(id=mobil.id))
+                obj.status = 'perbaikan' if i % 2 == 0 else mobil.status
+                with DatabaseQueryMonitor(f"save.{label}", warn_threshold=50) as qm:
+                    obj.save()
+                total_query += qm.query_count
+            durasi = (time.perf_counter() - start) * 1000 / ulangi
+            hasil[label] = total_query / ulangi
+            monitor.record_metric(f"save.{label}.queries_per_save", hasil[label], "count")
+            print(f"{label:>16}: {hasil[label]:.1f} query/save, {durasi:.2f} ms/save")
+        transaction.set_rollback(True)
+    
+    print(f"\n✅ Hemat {hasil['tanpa_snapshot'] - hasil['snapshot']:.1f} query per save")
+
+
+def run_version_benchmark(jumlah_versi: int = 50, ulangi: int = 10):
+    """
+    Bandingkan penyimpanan DataVersion 'full' vs 'delta': ukuran data_snapshot
+    dan latency rollback ke versi acak. Semua perubahan di-rollback.
+    """
+    import random
+    from django.db import transaction
+    from django.test.utils import override_settings
+    from rental.models import DataVersion, Mobil
+    from rental.version_control import VersionControlService as VCS
+    
+    mobil = Mobil.objects.first()
+    if mobil is None:
+        print("❌ Belum ada data mobil untuk benchmark")
+        return
+    
+    print(f"🔄 Benchmark version control ({jumlah_versi} versi, {ulangi}x rollback)")
+    print("-" * 60)
+    print(f"{'Mode':>8} {'Ukuran (bytes)':>16} {'Rollback (ms)':>15} {'Query/rollback':>16}")
+    
+    for mode in ('full', 'delta'):
+        with override_settings(RENTAL_VERSION_STORAGE=mode), transaction.atomic():
+            DataVersion.objects.filter(model_name='Mobil', object_id=mobil.id).delete()
+            harga = mobil.harga_sewa_per_hari
+            for i in range(jumlah_versi):
+                mobil.harga_sewa_per_hari = harga + i
+                VCS.commit(mobil, f'Benchmark v{i + 1}', user='benchmark', action='update')
+            
+            ukuran = sum(
+                len(json.dumps(snapshot)) for snapshot in DataVersion.objects.filter(
+                    model_name='Mobil', object_id=mobil.id
+                ).values_list('data_snapshot', flat=True)
+            )
+            
+            durasi, total_query = [], 0
+            for _ in range(ulangi):
+                target = random.randint(1, jumlah_versi)
+                with DatabaseQueryMonitor(f"version.rollback.{mode}", warn_threshold=100) as qm:
+                    start = time.perf_counter()
+                    VCS.rollback('Mobil', mobil.id, target, user='benchmark')
+                    durasi.append((time.perf_counter() - start) * 1000)
+                total_query += qm.query_count
+            
+            rata = sum(durasi) / len(durasi)
+            monitor.record_metric(f"version.{mode}.storage_bytes", ukuran, "bytes")
+            monitor.record_metric(f"version.{mode}.rollback", rata, "ms")
+            print(f"{mode:>8} {ukuran:>16,} {rata:>15.2f} {total_query / ulangi:>16.1f}")
+            transaction.set_rollback(True)
+    
+    filepath = monitor.save_to_file()
+    print(f"\n📁 Hasil disimpan ke: {filepath}")
+
+
 if __name__ == "__main__":
     import sys
     
@@ -389,6 +550,12 @@ if __name__ == "__main__":
         
         if command == "benchmark":
             run_benchmark()
+        elif command == "pagination":
+            run_pagination_benchmark(sys.argv[2] if len(sys.argv) > 2 else "log")
+        elif command == "save":
+            run_save_benchmark()
+        elif command == "versi":
+            run_version_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50)
         elif command == "report":
             print_performance_report()
         elif command == "clear":
@@ -396,9 +563,12 @@ if __name__ == "__main__":
             print("✅ Metrics cleared")
         else:
             print(f"Unknown command: {command}")
-            print("Available commands: benchmark, report, clear")
+            print("Available commands: benchmark, pagination, save, versi, report, clear")
     else:
         print("\nUsage:")
         print("  python performance_monitor.py benchmark  - Run benchmark")
+        print("  python performance_monitor.py pagination [log|notifikasi] - Offset vs cursor paging")
+        print("  python performance_monitor.py save       - Query per save (field tracker)")
+        print("  python performance_monitor.py versi [n]  - DataVersion full vs delta")
         print("  python performance_monitor.py report     - Show report")
         print("  python performance_monitor.py clear      - Clear metrics")
@@ -1,6 +1,18 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Mobil, Pelanggan, Penyewaan, Pembayaran, Notifikasi, LogAktivitas, DataVersion
+from .dashboard import DashboardStatsService
+from .models import Mobil, Pelanggan, Penyewaan, Pembayaran, Notifikasi, EmailOutbox, LogAktivitas, DataVersion
+
+
+@admin.action(description='📝 Commit versi (snapshot data terpilih)')
+def commit_versi(modeladmin, request, queryset):
+    """Snapshot semua objek terpilih ke DataVersion sekaligus (commit_many)"""
+    from .version_control import VersionControlService
+    
+    jumlah = VersionControlService.commit_many(
+        queryset, message='Snapshot dari admin', user=request.user.username
+    )
+    modeladmin.message_user(request, f'{jumlah} versi di-commit.')
 
 
 @admin.register(Mobil)
@@ -9,6 +21,7 @@ class MobilAdmin(admin.ModelAdmin):
     list_filter = ('status', 'merk', 'tahun')
     search_fields = ('merk', 'model', 'plat_nomor')
     ordering = ('-id',)
+    actions = [commit_versi]
     
     def status_badge(self, obj):
         colors = {
@@ -29,6 +42,7 @@ class PelangganAdmin(admin.ModelAdmin):
     list_display = ('id', 'nik', 'nama', 'no_telepon', 'email')
     search_fields = ('nik', 'nama', 'no_telepon', 'email')
     ordering = ('-id',)
+    actions = [commit_versi]
 
 
 @admin.register(Penyewaan)
@@ -37,6 +51,7 @@ class PenyewaanAdmin(admin.ModelAdmin):
     list_filter = ('status', 'tanggal_sewa')
     search_fields = ('kode_penyewaan', 'pelanggan__nama', 'mobil__plat_nomor')
     ordering = ('-id',)
+    actions = [commit_versi]
     date_hierarchy = 'tanggal_sewa'
     
     def status_badge(self, obj):
@@ -59,6 +74,7 @@ class PembayaranAdmin(admin.ModelAdmin):
     list_filter = ('status', 'metode_pembayaran')
     search_fields = ('penyewaan__kode_penyewaan',)
     ordering = ('-id',)
+    actions = [commit_versi]
     
     def status_badge(self, obj):
         colors = {
@@ -113,14 +129,34 @@ class NotifikasiAdmin(admin.ModelAdmin):
     @admin.action(description='Tandai sebagai sudah dibaca')
     def tandai_dibaca(self, request, queryset):
         updated = queryset.update(dibaca=True)
+        DashboardStatsService.invalidate()
         self.message_user(request, f'{updated} notifikasi ditandai sebagai sudah dibaca.')
     
     @admin.action(description='Tandai sebagai belum dibaca')
     def tandai_belum_dibaca(self, request, queryset):
         updated = queryset.update(dibaca=False)
+        DashboardStatsService.invalidate()
         self.message_user(request, f'{updated} notifikasi ditandai sebagai belum dibaca.')
 
 
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'email_tujuan', 'status', 'percobaan', 'kirim_setelah', 'dikirim_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('email_tujuan', 'error_terakhir')
+    ordering = ('-id',)
+    readonly_fields = ('notifikasi', 'created_at', 'dikirim_at', 'error_terakhir')
+    actions = ['kirim_ulang']
+    
+    @admin.action(description='Jadwalkan ulang pengiriman')
+    def kirim_ulang(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status='terkirim').update(
+            status='pending', percobaan=0, kirim_setelah=timezone.now()
+        )
+        self.message_user(request, f'{updated} email dijadwalkan ulang.')
+
+
 @admin.register(LogAktivitas)
 class LogAktivitasAdmin(admin.ModelAdmin):
     list_display = ('id', 'created_at', 'user', 'aksi_badge', 'model_name', 'object_repr', 'ip_address')
@@ -225,16 +261,16 @@ class LogAktivitasAdmin(admin.ModelAdmin):
 class DataVersionAdmin(admin.ModelAdmin):
     """Admin untuk Version Control Data"""
     list_display = ('id', 'model_name', 'object_id', 'version', 'action_badge', 'branch', 'created_by', 'commit_message_short', 'created_at')
-    list_filter = ('model_name', 'action', 'branch', 'created_by')
+    list_filter = ('model_name', 'action', 'branch', 'is_keyframe', 'created_by')
     search_fields = ('model_name', 'object_id', 'commit_message', 'created_by')
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
     readonly_fields = ('model_name', 'object_id', 'version', 'data_snapshot', 'action', 'created_by', 
-                       'created_at', 'parent_version', 'branch', 'is_current', 'display_changes')
+                       'created_at', 'parent_version', 'branch', 'is_current', 'is_keyframe', 'display_changes')
     
     fieldsets = (
         ('Informasi Versi', {
-            'fields': ('model_name', 'object_id', 'version', 'branch', 'is_current')
+            'fields': ('model_name', 'object_id', 'version', 'branch', 'is_current', 'is_keyframe')
         }),
         ('Aksi & User', {
             'fields': ('action', 'created_by', 'created_at', 'commit_message')
@@ -313,25 +349,12 @@ class DataVersionAdmin(admin.ModelAdmin):
     
     @admin.action(description='↩️ Rollback ke versi ini')
     def rollback_to_version(self, request, queryset):
-        """Rollback data ke versi yang dipilih"""
+        """Rollback data ke versi yang dipilih (boleh banyak objek, satu versi per objek)"""
         from .version_control import VersionControlService
         
-        if queryset.count() != 1:
-            self.message_user(request, 'Pilih tepat 1 versi untuk rollback!', level='error')
-            return
-        
-        version = queryset.first()
         try:
-            result = VersionControlService.rollback(
-                model_name=version.model_name,
-                object_id=version.object_id,
-                version=version.version,
-                user=request.user.username
-            )
-            if result:
-                self.message_user(request, f'Berhasil rollback {version.model_name}#{version.object_id} ke versi {version.version}')
-            else:
-                self.message_user(request, 'Gagal rollback: objek tidak ditemukan', level='error')
+            jumlah = VersionControlService.rollback_many(queryset, user=request.user.username)
+            self.message_user(request, f'Berhasil rollback {jumlah} objek ke versi yang dipilih')
         except Exception as e:
             self.message_user(request, f'Error: {str(e)}', level='error')
 
@@ -0,0 +1,211 @@
+"""
+Audit log writer: LogAktivitas ditulis per batch
+
+Signal handler tidak lagi melakukan INSERT log_aktivitas per objek.
+Entri dikumpulkan dan ditulis dengan satu bulk_create:
+- Di dalam transaksi: buffer per transaksi/savepoint, di-flush lewat
+  transaction.on_commit. Jika transaksi/savepoint di-rollback, callback
+  dibuang Django sehingga log untuk perubahan yang batal ikut hilang.
+- Di luar transaksi selama request (CurrentUserMiddleware): buffer per
+  request, di-flush di akhir request.
+- Selain itu: langsung ditulis.
+
+Dengan RENTAL_AUDIT_LOG_ASYNC = True, flush diserahkan ke thread background
+lewat antrian terbatas (RENTAL_AUDIT_LOG_QUEUE_SIZE). Jika antrian penuh,
+pemanggil menunggu (backpressure) dan setelah RENTAL_AUDIT_LOG_PUT_TIMEOUT
+detik menulis sendiri secara sinkron, sehingga log tidak pernah dibuang.
+"""
+import atexit
+import logging
+import queue
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+logger = logging.getLogger('rental.log_aktivitas')
+
+
+class AuditLogWriter:
+    """Buffer + bulk_create untuk LogAktivitas"""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        # {tuple(savepoint_ids): (buffer, callback)} untuk transaksi yang sedang berjalan
+        self._tx_buffers: ContextVar[Optional[Dict]] = ContextVar('audit_tx_buffers', default=None)
+        self._request_buffer: ContextVar[Optional[List]] = ContextVar('audit_request_buffer', default=None)
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.metrics = {'entri': 0, 'flush': 0, 'backpressure': 0}
+
+    # ========== KONFIGURASI ==========
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, 'RENTAL_AUDIT_LOG_BATCH_SIZE', 500)
+
+    @property
+    def async_enabled(self) -> bool:
+        return getattr(settings, 'RENTAL_AUDIT_LOG_ASYNC', False)
+
+    # ========== MENULIS ==========
+
+    def tulis(self, **fields):
+        """Tambahkan satu entri log (field LogAktivitas)"""
+        from .models import LogAktivitas
+
+        log = LogAktivitas(**fields)
+        with self._lock:
+            self.metrics['entri'] += 1
+
+        connection = connections[self.using]
+        if connection.in_atomic_block:
+            self._buffer_transaksi(connection).append(log)
+            return
+        # Di luar transaksi: sisa buffer transaksi yang di-rollback tidak terpakai
+        self._tx_buffers.set(None)
+
+        request_buffer = self._request_buffer.get()
+        if request_buffer is not None:
+            request_buffer.append(log)
+            return
+
+        self.flush([log])
+
+    def _buffer_transaksi(self, connection) -> List:
+        """
+        Buffer untuk posisi savepoint saat ini. Callback on_commit didaftarkan
+        sekali per buffer; jika callback sudah tidak ada di run_on_commit
+        (transaksi/savepoint di-rollback), buffer baru dibuat.
+        """
+        key = tuple(connection.savepoint_ids)
+        buffers = self._tx_buffers.get()
+        if buffers is None:
+            buffers = {}
+            self._tx_buffers.set(buffers)
+
+        entry = buffers.get(key)
+        if entry is not None:
+            buffer, callback = entry
+            if any(func is callback for _, func, _ in connection.run_on_commit):
+                return buffer
+
+        # Buffer savepoint yang sudah di-rollback (bukan induk posisi saat ini)
+        # tidak akan di-flush lagi: buang agar dict tidak terus bertambah
+        for stale in [k for k in buffers if k != key[:len(k)]]:
+            del buffers[stale]
+
+        buffer = []
+
+        def callback():
+            if buffers.get(key, (None,))[0] is buffer:
+                del buffers[key]
+            self.flush(buffer)
+
+        buffers[key] = (buffer, callback)
+        connection.on_commit(callback)
+        return buffer
+
+    # ========== BUFFER REQUEST ==========
+
+    def mulai_request(self):
+        """Aktifkan buffer per request (dipanggil CurrentUserMiddleware)"""
+        return self._request_buffer.set([])
+
+    def selesai_request(self, token=None):
+        """Flush buffer request dan nonaktifkan"""
+        # Buffer transaksi yang di-rollback selama request tidak dibawa ke request berikutnya
+        self._tx_buffers.set(None)
+        buffer = self._request_buffer.get()
+        if token is not None:
+            self._request_buffer.reset(token)
+        else:
+            self._request_buffer.set(None)
+        if buffer:
+            self.flush(buffer)
+
+    # ========== FLUSH ==========
+
+    def flush(self, logs: List):
+        """Tulis entri: ke antrian background jika aktif, selain itu bulk_create langsung"""
+        if not logs:
+            return
+        if self.async_enabled:
+            self._antrikan(logs)
+        else:
+            self._bulk_create(logs)
+
+    def _bulk_create(self, logs: List):
+        from .models import LogAktivitas
+
+        LogAktivitas.objects.using(self.using).bulk_create(logs, batch_size=self.batch_size)
+        with self._lock:
+            self.metrics['flush'] += 1
+
+    def _antrikan(self, logs: List):
+        self._pastikan_thread()
+        try:
+            self._queue.put(logs, timeout=getattr(settings, 'RENTAL_AUDIT_LOG_PUT_TIMEOUT', 5))
+        except queue.Full:
+            # Backpressure: antrian penuh terlalu lama, tulis sendiri agar log tidak hilang
+            with self._lock:
+                self.metrics['backpressure'] += 1
+            logger.warning(f"Antrian audit log penuh, {len(logs)} entri ditulis sinkron")
+            self._bulk_create(logs)
+
+    def _pastikan_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._queue = self._queue or queue.Queue(
+                maxsize=getattr(settings, 'RENTAL_AUDIT_LOG_QUEUE_SIZE', 100)
+            )
+            self._thread = threading.Thread(
+                target=self._worker, name='audit-log-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _worker(self):
+        """Gabungkan batch yang menumpuk di antrian lalu tulis sekaligus"""
+        while True:
+            logs = self._queue.get()
+            if logs is None:
+                self._queue.task_done()
+                return
+            selesai = 1
+            while len(logs) < self.batch_size:
+                try:
+                    lagi = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                selesai += 1
+                if lagi is None:
+                    self._queue.put(None)
+                    break
+                logs = logs + lagi
+            try:
+                close_old_connections()
+                self._bulk_create(logs)
+            except Exception as e:
+                logger.error(f"Gagal menulis {len(logs)} audit log: {str(e)}")
+            finally:
+                for _ in range(selesai):
+                    self._queue.task_done()
+
+    def tunggu(self):
+        """Tunggu semua entri di antrian background selesai ditulis"""
+        if self._queue is not None and self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Hentikan thread background setelah antrian kosong"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+audit_writer = AuditLogWriter()
+atexit.register(audit_writer.stop)
@@ -0,0 +1,146 @@
+"""
+Pemrosesan batch (set-based) untuk command cek_penyewaan
+
+Alih-alih save() per penyewaan (signal, log, dan email satu per satu),
+status diubah dengan satu UPDATE per batch, notifikasi, log, dan antrian
+email (outbox) dibuat dengan bulk_create (NotifikasiService.buat_notifikasi_bulk).
+"""
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import DashboardStatsService
+from .log_aktivitas_service import LogAktivitasService
+from .models import Penyewaan
+from .services import NotifikasiService
+
+logger = logging.getLogger('rental.penyewaan')
+
+
+class PenyewaanBatchService:
+    """Reminder & keterlambatan penyewaan dalam batch, dengan timing per fase"""
+
+    def __init__(self, today: date = None, batch_size: int = 1000, user: str = 'system'):
+        self.today = today or timezone.now().date()
+        self.batch_size = batch_size
+        self.user = user
+        self.timing: Dict[str, float] = defaultdict(float)
+        self.email_diantrikan = 0
+
+    @contextmanager
+    def fase(self, nama: str):
+        """Akumulasi durasi satu fase (detik)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing[nama] += time.perf_counter() - start
+
+    def _queryset(self, **filters):
+        # Satu query untuk penyewaan + mobil (harga denda) + pelanggan (email)
+        return (
+            Penyewaan.objects.filter(status='aktif', **filters)
+            .select_related('mobil', 'pelanggan')
+            .order_by('id')
+        )
+
+    def _buat_notifikasi(self, batch: List[Penyewaan], render, tipe: str, kategori: str):
+        """Notifikasi + outbox email untuk satu batch (bulk_create)"""
+        with self.fase('notifikasi'):
+            hasil = NotifikasiService.buat_notifikasi_bulk(
+                batch, render, tipe=tipe, kategori=kategori, batch_size=self.batch_size
+            )
+        self.email_diantrikan += hasil['email']
+
+    def proses_reminder(self, reminder_days: int = 1) -> int:
+        """Buat notifikasi reminder untuk penyewaan yang jatuh tempo reminder_days lagi"""
+        reminder_date = self.today + timedelta(days=reminder_days)
+        with self.fase('pilih'):
+            penyewaan = list(self._queryset(tanggal_kembali=reminder_date))
+
+        total = 0
+        for start in range(0, len(penyewaan), self.batch_size):
+            batch = penyewaan[start:start + self.batch_size]
+            self._buat_notifikasi(
+                batch,
+                lambda p: NotifikasiService.pesan_reminder_pengembalian(p, reminder_days),
+                'info', 'reminder'
+            )
+            total += len(batch)
+        return total
+
+    def proses_keterlambatan(self) -> Tuple[int, float]:
+        """
+        Tandai penyewaan aktif yang melewati tanggal kembali sebagai terlambat.
+
+        Setiap batch: satu SELECT (select_related), satu UPDATE
+        (WHERE status='aktif' AND tanggal_kembali < today, dibatasi id batch),
+        bulk_create notifikasi dan log. Semua dalam satu transaksi per batch.
+
+        Returns:
+            (jumlah penyewaan terlambat, total estimasi denda)
+        """
+        total = 0
+        total_denda = 0.0
+        last_id = 0
+
+        while True:
+            with transaction.atomic():
+                with self.fase('pilih'):
+                    batch = list(
+                        self._queryset(tanggal_kembali__lt=self.today, id__gt=last_id)
+                        [:self.batch_size]
+                    )
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                with self.fase('update_status'):
+                    diupdate = Penyewaan.objects.filter(
+                        id__in=[p.id for p in batch],
+                        status='aktif',
+                        tanggal_kembali__lt=self.today,
+                    ).update(status='terlambat', updated_at=timezone.now())
+                if diupdate != len(batch):
+                    # Ada penyewaan yang berubah di antara SELECT dan UPDATE: ulangi batch
+                    logger.warning(
+                        f"Batch keterlambatan berubah saat diproses "
+                        f"({diupdate}/{len(batch)}), diulang"
+                    )
+                    transaction.set_rollback(True)
+                    last_id = batch[0].id - 1
+                    continue
+                DashboardStatsService.invalidate()
+
+                with self.fase('denda'):
+                    denda = {}
+                    for p in batch:
+                        hari_terlambat = (self.today - p.tanggal_kembali).days
+                        denda[p.id] = (hari_terlambat, p.hitung_denda(hari_terlambat))
+
+                self._buat_notifikasi(
+                    batch,
+                    lambda p: NotifikasiService.pesan_keterlambatan(p, *denda[p.id]),
+                    'error', 'keterlambatan'
+                )
+
+                with self.fase('log'):
+                    LogAktivitasService.create_logs_bulk(
+                        'update', batch,
+                        LogAktivitasService.format_changes(
+                            {'status': {'old': 'aktif', 'new': 'terlambat'}}
+                        ),
+                        user=self.user
+                    )
+
+            total += len(batch)
+            total_denda += sum(d for _, d in denda.values())
+            logger.info(f"Batch keterlambatan diproses: {len(batch)} penyewaan")
+
+        return total, total_denda
@@ -0,0 +1,98 @@
+"""
+Penyimpanan sementara data sebelum save (pre_save -> post_save)
+
+Menggantikan dict level class LogAktivitasService._pre_save_cache:
+- Data disimpan per konteks (ContextVar): setiap thread WSGI maupun task ASGI
+  punya store sendiri, sehingga save objek yang sama secara bersamaan tidak
+  saling menimpa.
+- Ukuran dibatasi (LRU, RENTAL_CHANGE_STORE_MAX_SIZE): entri yang tidak pernah
+  di-pop (save gagal setelah pre_save) tidak menumpuk tanpa batas.
+- CurrentUserMiddleware mengosongkan store di akhir setiap request.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger('rental.log_aktivitas')
+
+
+class ChangeStore:
+    """Store LRU per konteks untuk data pre_save"""
+
+    def __init__(self, name: str = 'rental_change_store', max_size: int = None):
+        self._var: ContextVar[Optional[OrderedDict]] = ContextVar(name, default=None)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._metrics = {'evictions': 0, 'dibuang': 0, 'peak_size': 0}
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size or getattr(settings, 'RENTAL_CHANGE_STORE_MAX_SIZE', 1000)
+
+    def _store(self) -> OrderedDict:
+        store = self._var.get()
+        if store is None:
+            store = OrderedDict()
+            self._var.set(store)
+        return store
+
+    def _tambah_metric(self, name: str, value: int = 1):
+        with self._lock:
+            self._metrics[name] += value
+
+    def simpan(self, key: str, data: Dict[str, Any]):
+        """Simpan data; entri paling lama dibuang jika melebihi max_size"""
+        store = self._store()
+        store[key] = data
+        store.move_to_end(key)
+        while len(store) > self.max_size:
+            evicted, _ = store.popitem(last=False)
+            self._tambah_metric('evictions')
+            logger.debug(f"Change store penuh, entri {evicted} dibuang")
+        with self._lock:
+            self._metrics['peak_size'] = max(self._metrics['peak_size'], len(store))
+
+    def ambil(self, key: str) -> Optional[Dict[str, Any]]:
+        """Ambil dan hapus data untuk key (None jika tidak ada)"""
+        store = self._var.get()
+        if not store:
+            return None
+        return store.pop(key, None)
+
+    def size(self) -> int:
+        """Jumlah entri di konteks saat ini"""
+        store = self._var.get()
+        return len(store) if store else 0
+
+    def clear(self) -> int:
+        """
+        Kosongkan store konteks saat ini (akhir request).
+
+        Returns:
+            Jumlah entri yang tidak pernah di-pop (save gagal setelah pre_save)
+        """
+        store = self._var.get()
+        if not store:
+            return 0
+        dibuang = len(store)
+        store.clear()
+        self._tambah_metric('dibuang', dibuang)
+        return dibuang
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Ukuran store konteks saat ini + counter global (evictions, dibuang, peak_size)"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics.update(size=self.size(), max_size=self.max_size)
+        return metrics
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics = {'evictions': 0, 'dibuang': 0, 'peak_size': 0}
+
+
+change_store = ChangeStore()
@@ -0,0 +1,97 @@
+"""
+Statistik dashboard monitoring
+
+Statistik dihitung dengan conditional aggregation (Count(..., filter=Q(...))),
+satu query per tabel, lalu disimpan di cache Django selama
+RENTAL_DASHBOARD_CACHE_TTL detik. Cache dihapus oleh signal (rental/signals.py)
+setiap kali Mobil, Penyewaan, atau Notifikasi berubah, dan secara eksplisit
+oleh jalur bulk (update()/bulk_create) yang tidak memicu signal.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Mobil, Notifikasi, Penyewaan
+
+logger = logging.getLogger('rental.notifikasi')
+
+
+class DashboardStatsService:
+    """Hitung dan cache statistik untuk api_dashboard_stats"""
+
+    CACHE_KEY = 'rental:dashboard_stats'
+    HARI_JATUH_TEMPO = 3
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'RENTAL_DASHBOARD_CACHE', 'default')]
+
+    @classmethod
+    def _cache_key(cls, today: date) -> str:
+        # Tanggal masuk key: 'akan_jatuh_tempo' berubah saat ganti hari
+        return f"{cls.CACHE_KEY}:{today.isoformat()}"
+
+    @classmethod
+    def hitung(cls, today: date = None) -> Dict:
+        """Hitung statistik langsung dari database (3 query: penyewaan, mobil, notifikasi)"""
+        today = today or date.today()
+
+        penyewaan = Penyewaan.objects.aggregate(
+            total=Count('id'),
+            aktif=Count('id', filter=Q(status='aktif')),
+            terlambat=Count('id', filter=Q(status='terlambat')),
+            selesai=Count('id', filter=Q(status='selesai')),
+            akan_jatuh_tempo=Count('id', filter=Q(
+                status='aktif',
+                tanggal_kembali__gte=today,
+                tanggal_kembali__lte=today + timedelta(days=cls.HARI_JATUH_TEMPO),
+            )),
+        )
+        mobil = Mobil.objects.aggregate(
+            total=Count('id'),
+            tersedia=Count('id', filter=Q(status='tersedia')),
+            disewa=Count('id', filter=Q(status='disewa')),
+        )
+        notifikasi_belum_dibaca = Notifikasi.objects.filter(dibaca=False).count()
+
+        return {
+            'penyewaan': {
+                'total': penyewaan['total'],
+                'aktif': penyewaan['aktif'],
+                'terlambat': penyewaan['terlambat'],
+                'selesai': penyewaan['selesai'],
+            },
+            'mobil': mobil,
+            'alerts': {
+                'notifikasi_belum_dibaca': notifikasi_belum_dibaca,
+                'penyewaan_terlambat': penyewaan['terlambat'],
+                'akan_jatuh_tempo': penyewaan['akan_jatuh_tempo'],
+            }
+        }
+
+    @classmethod
+    def get_stats(cls, today: date = None) -> Dict:
+        """Statistik dari cache; dihitung ulang jika belum ada atau sudah kedaluwarsa"""
+        today = today or date.today()
+        key = cls._cache_key(today)
+        stats = cls._cache().get(key)
+        if stats is None:
+            stats = cls.hitung(today)
+            cls._cache().set(key, stats, getattr(settings, 'RENTAL_DASHBOARD_CACHE_TTL', 5))
+        return stats
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Hapus cache statistik. Di dalam transaksi, penghapusan diulang setelah
+        commit agar request lain tidak meng-cache data sebelum commit.
+        """
+        key = cls._cache_key(date.today())
+        cls._cache().delete(key)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: cls._cache().delete(key))
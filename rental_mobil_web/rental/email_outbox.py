@@ -0,0 +1,171 @@
+"""
+Outbox email notifikasi
+
+Email tidak lagi dikirim di dalam request / signal. NotifikasiService hanya
+menyimpan baris EmailOutbox di transaksi yang sama dengan notifikasinya;
+worker (python manage.py kirim_email_outbox) mengirim dalam batch lewat satu
+koneksi SMTP, dengan retry + exponential backoff. Notifikasi.dikirim_email
+baru diubah setelah email benar-benar terkirim.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox, Notifikasi
+
+logger = logging.getLogger('rental.notifikasi')
+
+
+class EmailOutboxService:
+    """Antrikan dan kirim email notifikasi dari tabel email_outbox"""
+
+    @staticmethod
+    def antrikan(notifikasi: Notifikasi, email_tujuan: str) -> EmailOutbox:
+        """Masukkan satu email notifikasi ke outbox"""
+        return EmailOutbox.objects.create(
+            notifikasi=notifikasi,
+            email_tujuan=email_tujuan,
+            kirim_setelah=timezone.now(),
+        )
+
+    @staticmethod
+    def antrikan_bulk(antrian: Iterable[Tuple[Notifikasi, str]]) -> int:
+        """Masukkan banyak email ke outbox dengan satu bulk_create"""
+        now = timezone.now()
+        rows = EmailOutbox.objects.bulk_create([
+            EmailOutbox(notifikasi=notifikasi, email_tujuan=email_tujuan, kirim_setelah=now)
+            for notifikasi, email_tujuan in antrian
+        ])
+        return len(rows)
+
+    @staticmethod
+    def backoff(percobaan: int) -> timedelta:
+        """Jeda sebelum percobaan berikutnya: base * 2^(percobaan-1), dibatasi 1 jam"""
+        base = getattr(settings, 'RENTAL_EMAIL_RETRY_BACKOFF', 60)
+        return timedelta(seconds=min(base * 2 ** (percobaan - 1), 3600))
+
+    @staticmethod
+    def klaim_batch(batch_size: int) -> List[EmailOutbox]:
+        """
+        Ambil batch email pending yang sudah jatuh waktu dan klaim dengan
+        memajukan kirim_setelah sejauh RENTAL_EMAIL_CLAIM_TIMEOUT detik, dalam
+        transaksi pendek. Worker lain tidak mengambil baris ini selama masa
+        klaim; jika worker mati sebelum mencatat hasil, baris dikirim ulang
+        setelah masa klaim habis.
+        """
+        now = timezone.now()
+        klaim_sampai = now + timedelta(seconds=getattr(settings, 'RENTAL_EMAIL_CLAIM_TIMEOUT', 600))
+
+        with transaction.atomic():
+            queryset = EmailOutbox.objects.filter(status='pending', kirim_setelah__lte=now)
+            if db_connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            batch: List[EmailOutbox] = list(queryset.order_by('id')[:batch_size])
+            if not batch:
+                return []
+
+            diklaim = EmailOutbox.objects.filter(
+                id__in=[item.id for item in batch], status='pending', kirim_setelah__lte=now
+            ).update(kirim_setelah=klaim_sampai)
+            if diklaim != len(batch):
+                # Tanpa SKIP LOCKED: sebagian baris sudah diklaim worker lain
+                batch = list(EmailOutbox.objects.filter(
+                    id__in=[item.id for item in batch], kirim_setelah=klaim_sampai
+                ).order_by('id'))
+        return batch
+
+    @classmethod
+    def kirim_batch(cls, batch_size: int = None) -> Dict[str, int]:
+        """
+        Kirim satu batch email pending yang sudah jatuh waktu.
+
+        Baris diklaim di transaksi pendek (klaim_batch), dikirim lewat SMTP di
+        luar transaksi, lalu hasilnya dicatat di transaksi pendek kedua,
+        sehingga tidak ada lock database yang ditahan selama menunggu SMTP.
+
+        Returns:
+            Dict jumlah 'terkirim', 'retry', dan 'gagal'
+        """
+        from .services import NotifikasiService
+
+        batch_size = batch_size or getattr(settings, 'RENTAL_EMAIL_OUTBOX_BATCH_SIZE', 50)
+        max_percobaan = getattr(settings, 'RENTAL_EMAIL_MAX_ATTEMPTS', 5)
+        hasil = {'terkirim': 0, 'retry': 0, 'gagal': 0}
+
+        batch = cls.klaim_batch(batch_size)
+        if not batch:
+            return hasil
+        notifikasi = Notifikasi.objects.in_bulk(
+            [item.notifikasi_id for item in batch if item.notifikasi_id]
+        )
+
+        terkirim, gagal = [], []
+        mail_connection = get_connection(fail_silently=False)
+        try:
+            mail_connection.open()
+            for item in batch:
+                try:
+                    if item.notifikasi_id not in notifikasi:
+                        raise ValueError("Notifikasi sudah dihapus")
+                    NotifikasiService.buat_email(
+                        notifikasi[item.notifikasi_id], item.email_tujuan, mail_connection
+                    ).send()
+                    terkirim.append(item)
+                except Exception as e:
+                    logger.error(f"Gagal mengirim email ke {item.email_tujuan}: {str(e)}")
+                    gagal.append((item, str(e)))
+        except Exception as e:
+            # Koneksi SMTP gagal dibuka: seluruh batch dijadwalkan ulang
+            logger.error(f"Gagal membuka koneksi email: {str(e)}")
+            gagal = [(item, str(e)) for item in batch if item not in terkirim]
+        finally:
+            mail_connection.close()
+
+        with transaction.atomic():
+            now = timezone.now()
+            if terkirim:
+                EmailOutbox.objects.filter(id__in=[item.id for item in terkirim]).update(
+                    status='terkirim', dikirim_at=now, percobaan=F('percobaan') + 1
+                )
+                Notifikasi.objects.filter(
+                    id__in=[item.notifikasi_id for item in terkirim]
+                ).update(dikirim_email=True)
+                hasil['terkirim'] = len(terkirim)
+
+            for item, error in gagal:
+                item.percobaan += 1
+                item.error_terakhir = error
+                if item.percobaan >= max_percobaan:
+                    item.status = 'gagal'
+                    hasil['gagal'] += 1
+                else:
+                    item.kirim_setelah = now + cls.backoff(item.percobaan)
+                    hasil['retry'] += 1
+            if gagal:
+                EmailOutbox.objects.bulk_update(
+                    [item for item, _ in gagal],
+                    ['percobaan', 'error_terakhir', 'status', 'kirim_setelah'],
+                )
+
+        logger.info(
+            f"Outbox email - terkirim: {hasil['terkirim']}, "
+            f"retry: {hasil['retry']}, gagal: {hasil['gagal']}"
+        )
+        return hasil
+
+    @classmethod
+    def kirim_semua(cls, batch_size: int = None) -> Dict[str, int]:
+        """Kirim batch demi batch sampai tidak ada email yang jatuh waktu"""
+        total = {'terkirim': 0, 'retry': 0, 'gagal': 0}
+        while True:
+            hasil = cls.kirim_batch(batch_size)
+            for key, value in hasil.items():
+                total[key] += value
+            if not any(hasil.values()):
+                return total
@@ -0,0 +1,94 @@
+"""
+Field tracking tanpa query tambahan
+
+FieldTrackerMixin menyimpan snapshot nilai field saat objek dimuat dari
+database (from_db) dan memperbaruinya setelah save()/refresh_from_db().
+Perubahan field untuk log aktivitas dihitung dari snapshot di memori,
+sehingga pre_save tidak perlu SELECT ulang baris lama.
+"""
+from typing import Any, Dict
+
+from django.db import models
+
+# Field yang selalu berubah / tidak relevan untuk log perubahan
+TRACKER_EXCLUDE = ('created_at', 'updated_at')
+
+
+def tracked_fields(instance: models.Model):
+    """Field konkret yang dibandingkan untuk log perubahan"""
+    return [f for f in instance._meta.concrete_fields if f.name not in TRACKER_EXCLUDE]
+
+
+def hitung_perubahan(instance: models.Model, old_data: Dict[str, Any]) -> Dict[str, Dict]:
+    """
+    Bandingkan nilai field instance dengan old_data {attname: nilai}.
+    Field yang tidak ada di old_data (misal di-defer) dilewati.
+
+    Returns:
+        {field_name: {'old': value, 'new': value}} (nilai mentah, FK berupa id)
+    """
+    changes = {}
+    for field in tracked_fields(instance):
+        if field.attname not in old_data:
+            continue
+        old_value = old_data[field.attname]
+        new_value = getattr(instance, field.attname)
+        if old_value != new_value:
+            changes[field.name] = {'old': old_value, 'new': new_value}
+    return changes
+
+
+class FieldTrackerMixin:
+    """Mixin model: snapshot field yang dimuat + diff di memori"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._simpan_snapshot()
+        return instance
+
+    def _simpan_snapshot(self, fields=None):
+        """
+        Simpan nilai field (attname, FK sebagai id) yang sudah dimuat.
+        Field yang di-defer tidak disimpan agar tidak memicu query.
+        """
+        snapshot = self.__dict__.setdefault('_tracker_snapshot', {})
+        for field in tracked_fields(self):
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                snapshot[field.attname] = self.__dict__[field.attname]
+
+    @property
+    def has_snapshot(self) -> bool:
+        """True jika objek dimuat dari database (snapshot tersedia)"""
+        return bool(self.__dict__.get('_tracker_snapshot'))
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Salinan snapshot {attname: nilai}"""
+        return dict(self.__dict__.get('_tracker_snapshot', {}))
+
+    def changed_fields(self) -> Dict[str, Dict]:
+        """Field yang berubah dibanding snapshot"""
+        return hitung_perubahan(self, self.get_snapshot())
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Signal post_save sudah membaca diff; snapshot mengikuti data yang tersimpan
+        self._simpan_snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._simpan_snapshot(fields)
+
+
+def snapshot_dari_db(instance: models.Model) -> Dict[str, Any]:
+    """
+    Fallback untuk objek tanpa snapshot (misal dibuat manual dengan pk):
+    ambil nilai lama dari database dengan satu query .values().
+    """
+    fields = [f.attname for f in tracked_fields(instance)]
+    return (
+        instance.__class__._default_manager
+        .filter(pk=instance.pk).values(*fields).first()
+    ) or {}
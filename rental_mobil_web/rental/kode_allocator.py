@@ -0,0 +1,213 @@
+"""
+============================================
+KODE ALLOCATOR - RENTAL MOBIL
+============================================
+Alokasi kode penyewaan (RNT-YYYYMMDD-NNNN) tanpa race condition:
+- CounterKodeAllocator: counter per hari di tabel kode_counter,
+  di-upsert atomik di dalam transaksi yang sama dengan INSERT
+- BlockKodeAllocator: cache blok sequence per worker (opsional,
+  butuh alias database terpisah, lihat RENTAL_KODE_SEQUENCE_DB)
+
+Allocator dipilih lewat settings.RENTAL_KODE_ALLOCATOR.
+============================================
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('rental.penyewaan')
+
+
+class KodeAllocator(ABC):
+    """Base class untuk allocator kode penyewaan (pluggable)"""
+
+    prefix_kode = 'RNT'
+    digit = 4
+
+    def get_prefix(self, tanggal: date) -> str:
+        """Prefix counter untuk tanggal tertentu, misal RNT-20251212"""
+        return f"{self.prefix_kode}-{tanggal.strftime('%Y%m%d')}"
+
+    def format_kode(self, prefix: str, sequence: int) -> str:
+        """Gabungkan prefix dan nomor urut menjadi kode penyewaan"""
+        return f"{prefix}-{sequence:0{self.digit}d}"
+
+    @abstractmethod
+    def next_kode(self, tanggal: Optional[date] = None) -> str:
+        """Ambil kode penyewaan berikutnya"""
+
+
+class CounterKodeAllocator(KodeAllocator):
+    """
+    Allocator berbasis baris counter per hari.
+
+    Satu upsert (INSERT ... ON DUPLICATE KEY UPDATE last_value = last_value + n)
+    membuat atau menaikkan baris counter dan menguncinya sampai transaksi
+    selesai, sehingga dua request paralel tidak mungkin mendapat nomor yang
+    sama. Tidak ada UPDATE pada baris yang belum ada, jadi tidak ada gap lock
+    yang bisa deadlock dengan INSERT worker lain pada request pertama hari itu.
+
+    Upsert langsung mengembalikan nilai baru (LAST_INSERT_ID di MySQL,
+    RETURNING di SQLite/PostgreSQL). Prefix yang barisnya sudah diketahui ada
+    tidak dicek ulang, jadi hot path hanya satu query.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        # Prefix terakhir yang baris counternya sudah ada (satu prefix per hari)
+        self._prefix_siap: Optional[str] = None
+
+    def _seed_value(self, prefix: str) -> int:
+        """Nomor urut terakhir yang sudah dipakai (untuk data sebelum ada counter)"""
+        from .models import Penyewaan
+
+        last_kode = Penyewaan.objects.using(self.using).filter(
+            kode_penyewaan__startswith=f"{prefix}-"
+        ).order_by('-id').values_list('kode_penyewaan', flat=True).first()
+
+        if not last_kode:
+            return 0
+        try:
+            return int(last_kode.split('-')[-1])
+        except ValueError:
+            return 0
+
+    def _upsert(self, prefix: str, nilai_awal: int, count: int) -> int:
+        """
+        INSERT counter baru (last_value = nilai_awal) atau tambah last_value
+        sebanyak count jika prefix sudah ada.
+
+        Returns:
+            last_value setelah upsert
+        """
+        from .models import KodeCounter
+
+        connection = connections[self.using]
+        table = connection.ops.quote_name(KodeCounter._meta.db_table)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                # LAST_INSERT_ID(expr) dikembalikan driver sebagai lastrowid, tanpa SELECT lagi
+                cursor.execute(
+                    f"INSERT INTO {table} (prefix, last_value) VALUES (%s, %s) "
+                    "ON DUPLICATE KEY UPDATE last_value = LAST_INSERT_ID(last_value + %s)",
+                    [prefix, nilai_awal, count]
+                )
+                # Affected rows 1 = baris baru (lastrowid berisi id auto-increment), 2 = update
+                return nilai_awal if cursor.rowcount == 1 else cursor.lastrowid
+            # SQLite / PostgreSQL
+            cursor.execute(
+                f"INSERT INTO {table} (prefix, last_value) VALUES (%s, %s) "
+                f"ON CONFLICT (prefix) DO UPDATE SET last_value = {table}.last_value + %s "
+                "RETURNING last_value",
+                [prefix, nilai_awal, count]
+            )
+            return cursor.fetchone()[0]
+
+    def reserve(self, prefix: str, count: int = 1) -> Tuple[int, int]:
+        """
+        Reservasi `count` nomor urut berturut-turut untuk prefix.
+
+        Jika dipanggil di dalam transaksi, reservasi ikut transaksi tersebut
+        (ikut di-commit / di-rollback bersama INSERT penyewaan).
+
+        Returns:
+            Tuple (nomor_pertama, nomor_terakhir)
+        """
+        from .models import KodeCounter
+
+        if count < 1:
+            raise ValueError("Jumlah reservasi kode minimal 1")
+
+        counters = KodeCounter.objects.using(self.using).filter(prefix=prefix)
+        with transaction.atomic(using=self.using, savepoint=False):
+            seed = None
+            if prefix != self._prefix_siap and not counters.exists():
+                # Request pertama hari itu: lanjutkan dari kode yang sudah ada
+                seed = self._seed_value(prefix)
+
+            last_value = self._upsert(prefix, (seed or 0) + count, count)
+
+            if seed is None and last_value == count:
+                # Upsert baru saja membuat baris tanpa seed (baris counter
+                # dihapus/di-rollback setelah prefix tercatat siap)
+                seed = self._seed_value(prefix)
+                if seed:
+                    counters.update(last_value=F('last_value') + seed)
+                    last_value += seed
+
+        self._prefix_siap = prefix
+        return last_value - count + 1, last_value
+
+    def next_kode(self, tanggal: Optional[date] = None) -> str:
+        prefix = self.get_prefix(tanggal or date.today())
+        sequence, _ = self.reserve(prefix, 1)
+        return self.format_kode(prefix, sequence)
+
+
+class BlockKodeAllocator(CounterKodeAllocator):
+    """
+    Allocator dengan cache blok per worker.
+
+    Mereservasi RENTAL_KODE_BLOCK_SIZE nomor sekaligus lalu membagikannya
+    dari memori. Reservasi blok harus ter-commit sendiri, terlepas dari
+    transaction.atomic() di Penyewaan.save, jadi `using` wajib alias database
+    terpisah (RENTAL_KODE_SEQUENCE_DB) yang menunjuk ke database yang sama
+    dengan 'default'. Jika koneksi alias tersebut tetap sedang di dalam
+    transaksi, allocator hanya mengambil satu nomor agar sisa blok tidak
+    terpakai ganda setelah rollback.
+    """
+
+    def __init__(self, using: Optional[str] = None, block_size: Optional[int] = None):
+        using = using or getattr(settings, 'RENTAL_KODE_SEQUENCE_DB', DEFAULT_DB_ALIAS)
+        if using == DEFAULT_DB_ALIAS:
+            # Penyewaan.save selalu membuka transaksi di 'default': blok tidak
+            # pernah ter-cache dan allocator diam-diam jadi satu nomor per reservasi
+            raise ImproperlyConfigured(
+                "BlockKodeAllocator butuh alias database terpisah di RENTAL_KODE_SEQUENCE_DB, "
+                f"bukan '{DEFAULT_DB_ALIAS}'"
+            )
+        super().__init__(using)
+        self.block_size = block_size or getattr(settings, 'RENTAL_KODE_BLOCK_SIZE', 20)
+        self._blocks: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def next_kode(self, tanggal: Optional[date] = None) -> str:
+        prefix = self.get_prefix(tanggal or date.today())
+
+        if connections[self.using].in_atomic_block:
+            sequence, _ = self.reserve(prefix, 1)
+            return self.format_kode(prefix, sequence)
+
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block is None or block[0] > block[1]:
+                first, last = self.reserve(prefix, self.block_size)
+                # Blok untuk hari sebelumnya tidak dipakai lagi
+                self._blocks = {prefix: [first, last]}
+                block = self._blocks[prefix]
+                logger.debug(f"Blok kode {prefix} direservasi: {first}-{last}")
+
+            sequence = block[0]
+            block[0] += 1
+
+        return self.format_kode(prefix, sequence)
+
+
+_allocators: Dict[str, KodeAllocator] = {}
+
+
+def get_kode_allocator() -> KodeAllocator:
+    """Dapatkan instance allocator sesuai settings.RENTAL_KODE_ALLOCATOR (satu per worker)"""
+    path = getattr(settings, 'RENTAL_KODE_ALLOCATOR', 'rental.kode_allocator.CounterKodeAllocator')
+    allocator = _allocators.get(path)
+    if allocator is None:
+        allocator = _allocators[path] = import_string(path)()
+    return allocator
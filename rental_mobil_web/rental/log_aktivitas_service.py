@@ -17,15 +17,15 @@ from typing import Dict, List, Optional, Any
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .change_store import change_store
+from .field_tracker import hitung_perubahan, snapshot_dari_db
+
 logger = logging.getLogger('rental.log_aktivitas')
 
 
 class LogAktivitasService:
     """Service untuk mengelola Log Aktivitas"""
     
-    # Cache untuk menyimpan data sebelum update
-    _pre_save_cache: Dict[str, Dict] = {}
-    
     @classmethod
     def get_model(cls):
         """Lazy import LogAktivitas model"""
@@ -80,6 +80,38 @@ class LogAktivitasService:
         logger.info(f"Log created: [{aksi}] {model_name} - {object_repr}")
         return log
     
+    @classmethod
+    def create_logs_bulk(
+        cls,
+        aksi: str,
+        instances: List[models.Model],
+        perubahan: str = '',
+        user: str = 'system'
+    ) -> int:
+        """
+        Membuat log aktivitas untuk banyak objek sekaligus (satu bulk_create).
+        Dipakai oleh operasi set-based yang tidak memicu signal post_save.
+        
+        Returns:
+            Jumlah log yang dibuat
+        """
+        LogAktivitas = cls.get_model()
+        
+        logs = LogAktivitas.objects.bulk_create([
+            LogAktivitas(
+                aksi=aksi,
+                model_name=instance.__class__.__name__,
+                object_id=instance.pk,
+                object_repr=str(instance)[:255],
+                perubahan=perubahan,
+                user=user
+            )
+            for instance in instances
+        ])
+        
+        logger.info(f"Log bulk created: [{aksi}] {len(logs)} objek")
+        return len(logs)
+    
     # ==========================================
     # READ
     # ==========================================
@@ -285,33 +317,29 @@ class LogAktivitasService:
         """
         Simpan data sebelum save untuk tracking perubahan
         Dipanggil dari pre_save signal
+        
+        Model dengan FieldTrackerMixin yang dimuat dari database sudah
+        membawa snapshot field, jadi tidak perlu query. SELECT hanya
+        dilakukan untuk objek tanpa snapshot (misal dibuat manual dengan pk).
         """
         if not instance.pk:
             return  # Skip untuk object baru
         
+        if getattr(instance, 'has_snapshot', False):
+            return
+        
         model_name = instance.__class__.__name__
         cache_key = f"{model_name}_{instance.pk}"
-        
-        try:
-            # Ambil data lama dari database
-            old_instance = instance.__class__.objects.get(pk=instance.pk)
-            
-            # Simpan semua field values
-            old_data = {}
-            for field in instance._meta.fields:
-                field_name = field.name
-                if field_name not in ['created_at', 'updated_at']:
-                    old_data[field_name] = getattr(old_instance, field_name)
-            
-            cls._pre_save_cache[cache_key] = old_data
-            
-        except instance.__class__.DoesNotExist:
-            pass
+        old_data = snapshot_dari_db(instance)
+        if old_data:
+            # Store per thread/request (ContextVar) dengan batas LRU
+            change_store.simpan(cache_key, old_data)
     
     @classmethod
     def get_field_changes(cls, instance: models.Model) -> Dict[str, Dict]:
         """
-        Bandingkan data baru dengan cache untuk mendapatkan perubahan
+        Bandingkan data baru dengan snapshot (atau cache pre_save)
+        untuk mendapatkan perubahan
         
         Returns:
             Dict dengan format: {field_name: {'old': value, 'new': value}}
@@ -319,33 +347,19 @@ class LogAktivitasService:
         model_name = instance.__class__.__name__
         cache_key = f"{model_name}_{instance.pk}"
         
-        if cache_key not in cls._pre_save_cache:
-            return {}
-        
-        old_data = cls._pre_save_cache.pop(cache_key)  # Pop to clear cache
-        changes = {}
-        
-        for field in instance._meta.fields:
-            field_name = field.name
-            if field_name in ['created_at', 'updated_at']:
-                continue
-            
-            old_value = old_data.get(field_name)
-            new_value = getattr(instance, field_name)
-            
-            # Convert untuk comparison
-            if isinstance(old_value, models.Model):
-                old_value = old_value.pk if old_value else None
-            if isinstance(new_value, models.Model):
-                new_value = new_value.pk if new_value else None
-            
-            if old_value != new_value:
-                changes[field_name] = {
-                    'old': str(old_value) if old_value is not None else 'None',
-                    'new': str(new_value) if new_value is not None else 'None'
-                }
-        
-        return changes
+        old_data = change_store.ambil(cache_key)  # Pop to clear cache
+        if old_data is None:
+            if not getattr(instance, 'has_snapshot', False):
+                return {}
+            old_data = instance.get_snapshot()
+        
+        return {
+            field_name: {
+                'old': str(values['old']) if values['old'] is not None else 'None',
+                'new': str(values['new']) if values['new'] is not None else 'None'
+            }
+            for field_name, values in hitung_perubahan(instance, old_data).items()
+        }
     
     @classmethod
     def format_changes(cls, changes: Dict[str, Dict]) -> str:
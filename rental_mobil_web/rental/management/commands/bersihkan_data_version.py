@@ -0,0 +1,68 @@
+"""
+Management command untuk retensi DataVersion
+Jalankan dengan: python manage.py bersihkan_data_version --keep 10
+Berdasarkan umur: python manage.py bersihkan_data_version --max-age-days 90
+Cek dulu:         python manage.py bersihkan_data_version --keep 10 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from rental.version_retention import VersionRetention
+
+
+class Command(BaseCommand):
+    help = 'Hapus versi lama data_version per objek+branch (window function, per chunk)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=None,
+            help='Jumlah versi terakhir yang disimpan per objek+branch'
+        )
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=None,
+            help='Hapus versi yang dibuat lebih dari N hari lalu'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Jumlah versi per DELETE (default: RENTAL_VERSION_RETENTION_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hanya hitung versi yang akan dihapus'
+        )
+    
+    def handle(self, *args, **options):
+        if options['keep'] is None and options['max_age_days'] is None:
+            raise CommandError('Isi minimal satu kebijakan: --keep atau --max-age-days')
+        
+        try:
+            retensi = VersionRetention(
+                keep_last=options['keep'],
+                max_age_days=options['max_age_days'],
+                chunk_size=options['chunk_size'],
+                progress=self.tampilkan_progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(self.style.NOTICE('Retensi data_version...'))
+        hasil = retensi.jalankan(dry_run=options['dry_run'])
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"  [DRY RUN] {hasil['kandidat']} versi akan dihapus"
+            ))
+            return
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"  Dihapus: {hasil['dihapus']} versi ({hasil['chunk']} chunk) | "
+            f"Dijadikan keyframe: {hasil['keyframe']}"
+        ))
+    
+    def tampilkan_progress(self, dihapus, total):
+        self.stdout.write(f"  {dihapus}/{total} versi dihapus")
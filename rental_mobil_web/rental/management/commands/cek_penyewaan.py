@@ -1,12 +1,15 @@
 """
 Management command untuk mengirim notifikasi reminder dan mengecek keterlambatan
 Jalankan dengan: python manage.py cek_penyewaan
+Mode batch (set-based, untuk backlog besar): python manage.py cek_penyewaan --batch
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+import time
 from rental.models import Penyewaan
 from rental.services import NotifikasiService
+from rental.batch_service import PenyewaanBatchService
 import logging
 
 logger = logging.getLogger('rental.penyewaan')
@@ -22,8 +25,22 @@ class Command(BaseCommand):
             default=1,
             help='Kirim reminder berapa hari sebelum tanggal kembali (default: 1)'
         )
+        parser.add_argument(
+            '--batch',
+            action='store_true',
+            help='Proses secara set-based: UPDATE status per batch, bulk_create notifikasi, log & outbox email'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Jumlah penyewaan per batch pada mode --batch (default: 1000)'
+        )
     
     def handle(self, *args, **options):
+        if options['batch']:
+            return self.handle_batch(options['reminder_days'], options['batch_size'])
+        
         reminder_days = options['reminder_days']
         today = timezone.now().date()
         
@@ -88,3 +105,31 @@ class Command(BaseCommand):
         logger.info(
             f'Cek penyewaan selesai - Reminder: {reminder_count}, Terlambat: {terlambat_count}'
         )
+    
+    def handle_batch(self, reminder_days, batch_size):
+        """Mode batch: query konstan per batch, tanpa save() per penyewaan"""
+        service = PenyewaanBatchService(batch_size=batch_size)
+        
+        self.stdout.write(self.style.NOTICE(
+            f'Mengecek penyewaan aktif pada {service.today} (batch {batch_size})...'
+        ))
+        
+        start = time.perf_counter()
+        reminder_count = service.proses_reminder(reminder_days)
+        terlambat_count, total_denda = service.proses_keterlambatan()
+        durasi = time.perf_counter() - start
+        
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'Selesai dalam {durasi:.2f} detik!'))
+        self.stdout.write(f'  - Reminder dibuat: {reminder_count}')
+        self.stdout.write(f'  - Penyewaan terlambat: {terlambat_count}')
+        self.stdout.write(f'  - Total estimasi denda: Rp {total_denda:,.0f}')
+        self.stdout.write(f'  - Email diantrikan: {service.email_diantrikan}')
+        self.stdout.write('  Waktu per fase:')
+        for fase, detik in service.timing.items():
+            self.stdout.write(f'    {fase:<14}: {detik * 1000:10.1f} ms')
+        
+        logger.info(
+            f'Cek penyewaan (batch) selesai - Reminder: {reminder_count}, '
+            f'Terlambat: {terlambat_count}, Email: {service.email_diantrikan}, Durasi: {durasi:.2f}s'
+        )
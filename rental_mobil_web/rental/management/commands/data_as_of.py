@@ -0,0 +1,90 @@
+"""
+Management command rekonstruksi point-in-time dari DataVersion
+Export NDJSON:     python manage.py data_as_of "2026-10-01 12:00" --output as_of.ndjson
+Ke DB scratch:     python manage.py data_as_of "2026-10-01 12:00" --database audit
+Model tertentu:    python manage.py data_as_of "2026-10-01" --model Mobil --model Penyewaan
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from rental.point_in_time import MODEL_NAMES, PointInTimeService
+
+
+class Command(BaseCommand):
+    help = 'Rekonstruksi keadaan Mobil/Pelanggan/Penyewaan/Pembayaran pada waktu tertentu dari data_version'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'waktu',
+            help='Waktu as-of (YYYY-MM-DD atau YYYY-MM-DD HH:MM[:SS]); tanggal saja = akhir hari'
+        )
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=MODEL_NAMES,
+            help='Model yang direkonstruksi (boleh diulang, default: semua)'
+        )
+        parser.add_argument(
+            '--branch',
+            default='main',
+            help='Branch version control (default: main)'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help="File NDJSON tujuan ('-' untuk stdout)"
+        )
+        parser.add_argument(
+            '--database',
+            default=None,
+            help='Alias database scratch (settings.DATABASES) untuk materialisasi tabel'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Baris data_version per fetch / objek per INSERT (default: RENTAL_STREAM_CHUNK_SIZE)'
+        )
+    
+    def parse_waktu(self, value):
+        waktu = parse_datetime(value)
+        if waktu is None:
+            tanggal = parse_date(value)
+            if tanggal is None:
+                raise CommandError(f'Format waktu tidak valid: {value}')
+            waktu = datetime.combine(tanggal, time.max)
+        return waktu
+    
+    def handle(self, *args, **options):
+        if not options['output'] and not options['database']:
+            raise CommandError('Isi --output dan/atau --database')
+        if options['database'] and options['database'] not in settings.DATABASES:
+            raise CommandError(f"Database '{options['database']}' tidak ada di settings.DATABASES")
+        
+        service = PointInTimeService(
+            self.parse_waktu(options['waktu']),
+            branch=options['branch'],
+            chunk_size=options['chunk_size'],
+        )
+        
+        try:
+            if options['output']:
+                if options['output'] == '-':
+                    jumlah = service.tulis_ndjson(self.stdout, options['model'])
+                else:
+                    with open(options['output'], 'w', encoding='utf-8') as f:
+                        jumlah = service.tulis_ndjson(f, options['model'])
+                    self.tampilkan(f"NDJSON ditulis ke {options['output']}", jumlah)
+            
+            if options['database']:
+                jumlah = service.materialize(options['database'], options['model'])
+                self.tampilkan(f"Tabel di database '{options['database']}' diisi", jumlah)
+        except ValueError as e:
+            raise CommandError(str(e))
+    
+    def tampilkan(self, judul, jumlah):
+        self.stderr.write(self.style.SUCCESS(f"  {judul}:"))
+        for model_name, total in jumlah.items():
+            self.stderr.write(f"    {model_name}: {total} objek")
@@ -0,0 +1,64 @@
+"""
+Management command worker untuk mengirim email dari outbox
+Jalankan dengan: python manage.py kirim_email_outbox
+Sebagai daemon:  python manage.py kirim_email_outbox --loop --interval=10
+"""
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from rental.email_outbox import EmailOutboxService
+import logging
+import time
+
+logger = logging.getLogger('rental.notifikasi')
+
+
+class Command(BaseCommand):
+    help = 'Kirim email notifikasi yang ada di outbox (batch, retry dengan backoff)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Jumlah email per batch / koneksi SMTP (default: RENTAL_EMAIL_OUTBOX_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Jalankan terus sebagai daemon'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Jeda (detik) antar pengecekan outbox pada mode --loop (default: 10)'
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        if not options['loop']:
+            self.tampilkan(EmailOutboxService.kirim_semua(batch_size))
+            return
+        
+        self.stdout.write(self.style.NOTICE(
+            f"Worker outbox email berjalan (interval {options['interval']} detik)..."
+        ))
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    hasil = EmailOutboxService.kirim_semua(batch_size)
+                    if any(hasil.values()):
+                        self.tampilkan(hasil)
+                except Exception as e:
+                    logger.error(f"Worker outbox email error: {str(e)}")
+                    self.stdout.write(self.style.ERROR(f'  Error: {e}'))
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Worker outbox email dihentikan'))
+    
+    def tampilkan(self, hasil):
+        self.stdout.write(self.style.SUCCESS(
+            f"  Terkirim: {hasil['terkirim']} | Retry: {hasil['retry']} | Gagal: {hasil['gagal']}"
+        ))
@@ -0,0 +1,49 @@
+"""
+Management command untuk mengonversi penyimpanan DataVersion
+Jalankan dengan: python manage.py konversi_data_version
+Cek dulu:        python manage.py konversi_data_version --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from rental.version_control import VersionControlService
+
+
+class Command(BaseCommand):
+    help = 'Konversi data_version ke penyimpanan delta (keyframe + delta) atau snapshot penuh'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['delta', 'full'],
+            default=None,
+            help='Mode penyimpanan tujuan (default: RENTAL_VERSION_STORAGE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Jarak antar keyframe (default: RENTAL_VERSION_KEYFRAME_INTERVAL)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hanya hitung perubahan ukuran, tanpa menyimpan'
+        )
+    
+    def handle(self, *args, **options):
+        if options['interval'] is not None and options['interval'] < 1:
+            raise CommandError('--interval minimal 1')
+        
+        self.stdout.write(self.style.NOTICE('Konversi data_version...'))
+        hasil = VersionControlService.konversi_penyimpanan(
+            mode=options['mode'],
+            interval=options['interval'],
+            dry_run=options['dry_run'],
+        )
+        
+        sebelum, sesudah = hasil['bytes_sebelum'], hasil['bytes_sesudah']
+        hemat = (1 - sesudah / sebelum) * 100 if sebelum else 0
+        prefix = '[DRY RUN] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"  {prefix}Objek: {hasil['objek']} | Versi diubah: {hasil['versi_diubah']} | "
+            f"Ukuran snapshot: {sebelum:,} -> {sesudah:,} bytes ({hemat:.1f}% lebih kecil)"
+        ))
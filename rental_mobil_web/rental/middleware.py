@@ -7,6 +7,9 @@ import json
 import threading
 from django.utils.deprecation import MiddlewareMixin
 
+from .audit_writer import audit_writer
+from .change_store import change_store
+
 logger = logging.getLogger('rental')
 security_logger = logging.getLogger('rental.security')
 
@@ -59,6 +62,10 @@ class CurrentUserMiddleware:
     Middleware untuk menyimpan request ke thread local storage.
     Memungkinkan akses ke current user dari mana saja (signals, services, dll)
     
+    Selama request, log aktivitas di luar transaksi dikumpulkan audit_writer dan
+    ditulis sekaligus di akhir request. Data pre_save yang tidak terpakai
+    (change_store) ikut dibersihkan.
+    
     PENTING: Middleware ini harus dipasang SETELAH AuthenticationMiddleware
     """
     
@@ -68,14 +75,18 @@ class CurrentUserMiddleware:
     def __call__(self, request):
         # Simpan request ke thread local
         _thread_locals.request = request
+        audit_token = audit_writer.mulai_request()
         
-        response = self.get_response(request)
-        
-        # Bersihkan setelah request selesai
-        if hasattr(_thread_locals, 'request'):
-            del _thread_locals.request
-        
-        return response
+        try:
+            return self.get_response(request)
+        finally:
+            audit_writer.selesai_request(audit_token)
+            # Bersihkan setelah request selesai (juga saat view raise exception)
+            if hasattr(_thread_locals, 'request'):
+                del _thread_locals.request
+            dibuang = change_store.clear()
+            if dibuang:
+                logger.debug(f"{dibuang} data pre_save tidak terpakai dibersihkan: {request.path}")
 
 
 class RequestLoggingMiddleware(MiddlewareMixin):
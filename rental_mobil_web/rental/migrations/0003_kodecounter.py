@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0002_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KodeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=30, unique=True)),
+                ('last_value', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Kode Counter',
+                'verbose_name_plural': 'Kode Counter',
+                'db_table': 'kode_counter',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-17 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0003_kodecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_tujuan', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('terkirim', 'Terkirim'), ('gagal', 'Gagal')], default='pending', max_length=20)),
+                ('percobaan', models.IntegerField(default=0)),
+                ('kirim_setelah', models.DateTimeField(help_text='Jangan dikirim sebelum waktu ini (backoff retry)')),
+                ('error_terakhir', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dikirim_at', models.DateTimeField(blank=True, null=True)),
+                ('notifikasi', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_outbox', to='rental.notifikasi')),
+            ],
+            options={
+                'verbose_name': 'Email Outbox',
+                'verbose_name_plural': 'Email Outbox',
+                'db_table': 'email_outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'kirim_setelah'], name='email_outbo_status_15283f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0004_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logaktivitas',
+            index=models.Index(fields=['created_at', 'id'], name='log_aktivit_created_bc0d34_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logaktivitas',
+            index=models.Index(fields=['aksi', 'created_at', 'id'], name='log_aktivit_aksi_24292b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifikasi',
+            index=models.Index(fields=['created_at', 'id'], name='notifikasi_created_f99d5b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifikasi',
+            index=models.Index(fields=['dibaca', 'created_at', 'id'], name='notifikasi_dibaca_d9f8d9_idx'),
+        ),
+    ]
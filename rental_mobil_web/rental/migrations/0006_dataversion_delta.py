@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0005_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataversion',
+            name='is_keyframe',
+            field=models.BooleanField(default=True, help_text='True: data_snapshot berisi data lengkap, False: delta dari versi sebelumnya'),
+        ),
+        migrations.AlterField(
+            model_name='dataversion',
+            name='data_snapshot',
+            field=models.JSONField(help_text='Snapshot lengkap data object (keyframe) atau field yang berubah saja (delta)'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0006_dataversion_delta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataversion',
+            index=models.Index(fields=['model_name', 'object_id', 'branch', 'is_current'], name='data_versio_model_n_20dfec_idx'),
+        ),
+    ]
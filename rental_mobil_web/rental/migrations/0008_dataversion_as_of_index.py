@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0007_dataversion_current_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataversion',
+            index=models.Index(fields=['model_name', 'object_id', 'created_at'], name='data_versio_model_n_682174_idx'),
+        ),
+    ]
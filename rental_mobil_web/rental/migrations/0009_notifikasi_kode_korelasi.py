@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0008_dataversion_as_of_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notifikasi',
+            name='kode_korelasi',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
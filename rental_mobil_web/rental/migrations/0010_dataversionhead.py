@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0009_notifikasi_kode_korelasi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersionHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100)),
+                ('object_id', models.IntegerField()),
+                ('branch', models.CharField(default='main', max_length=50)),
+            ],
+            options={
+                'verbose_name': 'Data Version Head',
+                'verbose_name_plural': 'Data Version Heads',
+                'db_table': 'data_version_head',
+                'unique_together': {('model_name', 'object_id', 'branch')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-17 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0010_dataversionhead'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='dataversion',
+            name='data_versio_model_n_682174_idx',
+        ),
+        migrations.AddIndex(
+            model_name='dataversion',
+            index=models.Index(fields=['model_name', 'branch', 'object_id', 'created_at', 'id'], name='data_versio_model_n_71121e_idx'),
+        ),
+    ]
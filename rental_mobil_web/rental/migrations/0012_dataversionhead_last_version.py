@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0011_dataversion_as_of_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataversionhead',
+            name='last_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import RegexValidator, MinValueValidator, EmailValidator
 from datetime import date
+from .field_tracker import FieldTrackerMixin
 
 
-class Mobil(models.Model):
+class Mobil(FieldTrackerMixin, models.Model):
     """Model untuk Mobil"""
     
     STATUS_CHOICES = [
@@ -42,7 +43,7 @@ class Mobil(models.Model):
         return f"{self.merk} {self.model} ({self.tahun}) - {self.plat_nomor}"
 
 
-class Pelanggan(models.Model):
+class Pelanggan(FieldTrackerMixin, models.Model):
     """Model untuk Pelanggan"""
     
     nik = models.CharField(
@@ -70,7 +71,7 @@ class Pelanggan(models.Model):
         return f"{self.nama} ({self.nik})"
 
 
-class Penyewaan(models.Model):
+class Penyewaan(FieldTrackerMixin, models.Model):
     """Model untuk Penyewaan"""
     
     STATUS_CHOICES = [
@@ -99,18 +100,20 @@ class Penyewaan(models.Model):
         managed = False
     
     def save(self, *args, **kwargs):
-        if not self.kode_penyewaan:
-            # Generate kode penyewaan
-            today = date.today()
-            prefix = f"RNT-{today.strftime('%Y%m%d')}"
-            last = Penyewaan.objects.filter(kode_penyewaan__startswith=prefix).order_by('-id').first()
-            if last:
-                last_seq = int(last.kode_penyewaan.split('-')[-1])
-                new_seq = last_seq + 1
-            else:
-                new_seq = 1
-            self.kode_penyewaan = f"{prefix}-{new_seq:04d}"
-        super().save(*args, **kwargs)
+        if self.kode_penyewaan:
+            return super().save(*args, **kwargs)
+        
+        # Generate kode penyewaan dari counter harian, di transaksi yang sama dengan INSERT
+        from .kode_allocator import get_kode_allocator
+        using = kwargs.get('using') or router.db_for_write(Penyewaan, instance=self)
+        try:
+            with transaction.atomic(using=using):
+                self.kode_penyewaan = get_kode_allocator().next_kode(date.today())
+                super().save(*args, **kwargs)
+        except Exception:
+            # Kode ikut di-rollback, jangan dipakai ulang saat save berikutnya
+            self.kode_penyewaan = ''
+            raise
     
     def hitung_denda(self, hari_keterlambatan: int) -> float:
         """Hitung denda berdasarkan keterlambatan (150% per hari)"""
@@ -122,7 +125,22 @@ class Penyewaan(models.Model):
         return f"{self.kode_penyewaan} - {self.pelanggan.nama}"
 
 
-class Pembayaran(models.Model):
+class KodeCounter(models.Model):
+    """Counter sequence per prefix (misal per hari) untuk kode transaksi"""
+    
+    prefix = models.CharField(max_length=30, unique=True)
+    last_value = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'kode_counter'
+        verbose_name = 'Kode Counter'
+        verbose_name_plural = 'Kode Counter'
+    
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
+
+
+class Pembayaran(FieldTrackerMixin, models.Model):
     """Model untuk Pembayaran"""
     
     METODE_CHOICES = [
@@ -184,6 +202,9 @@ class Notifikasi(models.Model):
     pelanggan_nama = models.CharField(max_length=100, blank=True, default='', verbose_name='Nama Pelanggan')
     dibaca = models.BooleanField(default=False)
     dikirim_email = models.BooleanField(default=False)
+    # Kunci unik per baris dari buat_notifikasi_bulk, untuk mengambil ulang id
+    # setelah bulk_create di MySQL (tidak mengembalikan id)
+    kode_korelasi = models.UUIDField(null=True, blank=True, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -191,6 +212,11 @@ class Notifikasi(models.Model):
         verbose_name = 'Notifikasi'
         verbose_name_plural = 'Daftar Notifikasi'
         ordering = ['-created_at']
+        # Cursor pagination (created_at DESC, id DESC), dengan/tanpa filter dibaca
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['dibaca', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"[{self.get_tipe_display()}] {self.judul}"
@@ -219,6 +245,39 @@ class Notifikasi(models.Model):
         return None
 
 
+class EmailOutbox(models.Model):
+    """Antrian email keluar (outbox) yang dikirim oleh worker kirim_email_outbox"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('terkirim', 'Terkirim'),
+        ('gagal', 'Gagal'),
+    ]
+    
+    notifikasi = models.ForeignKey(
+        Notifikasi, on_delete=models.SET_NULL, null=True, blank=True, related_name='email_outbox'
+    )
+    email_tujuan = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    percobaan = models.IntegerField(default=0)
+    kirim_setelah = models.DateTimeField(help_text="Jangan dikirim sebelum waktu ini (backoff retry)")
+    error_terakhir = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    dikirim_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        verbose_name = 'Email Outbox'
+        verbose_name_plural = 'Email Outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'kirim_setelah']),
+        ]
+    
+    def __str__(self):
+        return f"{self.email_tujuan} ({self.get_status_display()}, percobaan {self.percobaan})"
+
+
 class LogAktivitas(models.Model):
     """Model untuk Log Aktivitas User"""
     
@@ -246,6 +305,11 @@ class LogAktivitas(models.Model):
         verbose_name = 'Log Aktivitas'
         verbose_name_plural = 'Log Aktivitas'
         ordering = ['-created_at']
+        # Cursor pagination (created_at DESC, id DESC), dengan/tanpa filter aksi
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['aksi', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"[{self.created_at}] {self.user} - {self.get_aksi_display()} {self.model_name}"
@@ -265,7 +329,12 @@ class DataVersion(models.Model):
     model_name = models.CharField(max_length=100, db_index=True)
     object_id = models.IntegerField(db_index=True)
     version = models.IntegerField(default=1)
-    data_snapshot = models.JSONField(help_text="Snapshot lengkap data object dalam JSON")
+    data_snapshot = models.JSONField(
+        help_text="Snapshot lengkap data object (keyframe) atau field yang berubah saja (delta)"
+    )
+    is_keyframe = models.BooleanField(
+        default=True, help_text="True: data_snapshot berisi data lengkap, False: delta dari versi sebelumnya"
+    )
     action = models.CharField(max_length=20, choices=AKSI_CHOICES, default='commit')
     created_by = models.CharField(max_length=100, default='system')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -290,19 +359,32 @@ class DataVersion(models.Model):
         indexes = [
             models.Index(fields=['model_name', 'object_id']),
             models.Index(fields=['branch']),
+            # Versi current per objek+branch (commit: UPDATE is_current)
+            models.Index(fields=['model_name', 'object_id', 'branch', 'is_current']),
+            # Rekonstruksi as-of (rental/point_in_time.py): filter model+branch,
+            # halaman keyset urut (object_id, created_at, id) tanpa filesort
+            models.Index(fields=['model_name', 'branch', 'object_id', 'created_at', 'id']),
         ]
     
     def __str__(self):
         return f"{self.model_name}#{self.object_id} v{self.version} ({self.branch}) - {self.action}"
     
     def get_data(self):
-        """Ambil data snapshot sebagai dictionary"""
-        return self.data_snapshot if isinstance(self.data_snapshot, dict) else {}
+        """
+        Ambil data lengkap versi ini sebagai dictionary.
+        Versi delta direkonstruksi dari keyframe terakhir (maks. KEYFRAME_INTERVAL versi).
+        """
+        if self.is_keyframe:
+            return self.data_snapshot if isinstance(self.data_snapshot, dict) else {}
+        if not hasattr(self, '_data_lengkap'):
+            from .version_control import VersionControlService
+            self._data_lengkap = VersionControlService.rekonstruksi_data(self)
+        return self._data_lengkap
     
     def get_changes_from_parent(self):
         """Bandingkan dengan parent version, return perubahan"""
         if not self.parent_version:
-            return {'new': self.data_snapshot}
+            return {'new': self.get_data()}
         
         old_data = self.parent_version.get_data()
         new_data = self.get_data()
@@ -317,3 +399,27 @@ class DataVersion(models.Model):
         
         return changes
 
+
+
+class DataVersionHead(models.Model):
+    """
+    Satu baris per objek+branch yang pernah di-commit versinya. Baris ini
+    di-upsert (last_version + 1) sebelum menulis DataVersion, sehingga commit
+    paralel (termasuk commit pertama, saat belum ada versi untuk dikunci)
+    mengantre di satu baris tanpa gap lock pada data_version, dan nomor versi
+    berikutnya didapat dari upsert itu sendiri.
+    """
+    
+    model_name = models.CharField(max_length=100)
+    object_id = models.IntegerField()
+    branch = models.CharField(max_length=50, default='main')
+    last_version = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'data_version_head'
+        verbose_name = 'Data Version Head'
+        verbose_name_plural = 'Data Version Heads'
+        unique_together = ['model_name', 'object_id', 'branch']
+    
+    def __str__(self):
+        return f"{self.model_name}#{self.object_id} ({self.branch})"
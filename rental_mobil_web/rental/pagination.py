@@ -0,0 +1,64 @@
+"""
+Cursor (keyset) pagination untuk endpoint list
+
+Data diurutkan (created_at DESC, id DESC). Cursor berisi (created_at, id) baris
+terakhir halaman sebelumnya dalam bentuk base64 yang opaque bagi client, sehingga
+halaman berikutnya cukup `WHERE (created_at, id) < cursor` yang memakai index
+komposit (created_at, id) tanpa melewati OFFSET baris.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+
+class CursorTidakValid(ValueError):
+    """Cursor dari client tidak bisa dibaca"""
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """Bungkus (created_at, id) menjadi string cursor"""
+    raw = json.dumps({'t': created_at.isoformat(), 'id': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Kebalikan encode_cursor; CursorTidakValid jika format salah"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data['t']), int(data['id'])
+    except (ValueError, TypeError, KeyError) as e:
+        raise CursorTidakValid(f"Cursor tidak valid: {cursor}") from e
+
+
+def keyset_queryset(queryset: QuerySet, cursor: Optional[str] = None) -> QuerySet:
+    """Urutkan (created_at DESC, id DESC) dan ambil hanya baris setelah cursor"""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset
+
+
+def keyset_page(queryset: QuerySet, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    Ambil satu halaman (created_at DESC, id DESC) setelah cursor.
+
+    Returns:
+        (daftar objek, next_cursor atau None jika sudah halaman terakhir)
+    """
+    if limit < 1:
+        raise ValueError("limit minimal 1")
+    queryset = keyset_queryset(queryset, cursor)
+
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    items = list(queryset[:limit + 1])
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1].created_at, items[-1].id)
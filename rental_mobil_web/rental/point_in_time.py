@@ -0,0 +1,195 @@
+"""
+Rekonstruksi point-in-time (as-of) dari riwayat DataVersion
+
+Keadaan semua objek Mobil/Pelanggan/Penyewaan/Pembayaran pada waktu tertentu
+dibangun dengan membaca data_version per model, urut (object_id, created_at, id),
+memakai index (model_name, branch, object_id, created_at, id). Baris dibaca per
+halaman keyset sebanyak chunk_size (driver MySQL menampung seluruh hasil
+.iterator() di memori) dan hanya keadaan satu objek yang ditahan di memori:
+keyframe mengganti data, delta menimpa field yang berubah, versi 'delete'
+berarti objek tidak ada pada waktu tersebut.
+
+Hasil bisa di-stream (NDJSON) atau dimaterialisasi ke database scratch
+(alias lain di settings.DATABASES yang sudah di-migrate), sehingga keadaan
+lama bisa diaudit tanpa restore backup.
+
+Catatan: riwayat hanya sejauh yang disimpan kebijakan retensi
+(lihat rental/version_retention.py).
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+
+logger = logging.getLogger('rental.version_control')
+
+# Urutan mengikuti foreign key (Penyewaan -> Mobil/Pelanggan, Pembayaran -> Penyewaan)
+MODEL_NAMES = ('Mobil', 'Pelanggan', 'Penyewaan', 'Pembayaran')
+
+
+class PointInTimeService:
+    """Keadaan data pada waktu `as_of` dari riwayat DataVersion"""
+
+    def __init__(self, as_of: datetime, branch: str = 'main', chunk_size: int = None):
+        self.as_of = as_of
+        self.branch = branch
+        self.chunk_size = chunk_size or getattr(settings, 'RENTAL_STREAM_CHUNK_SIZE', 2000)
+
+    @staticmethod
+    def _model_names(model_names: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        if not model_names:
+            return MODEL_NAMES
+        tidak_dikenal = set(model_names) - set(MODEL_NAMES)
+        if tidak_dikenal:
+            raise ValueError(f"Model tidak dikenal: {', '.join(sorted(tidak_dikenal))}")
+        # Tetap dalam urutan foreign key
+        return tuple(name for name in MODEL_NAMES if name in model_names)
+
+    # ========== STREAM ==========
+
+    def iter_objek(self, model_name: str) -> Iterator[Dict]:
+        """
+        Keadaan tiap objek model pada as_of, satu per satu.
+
+        Yields:
+            {'id': object_id, 'version': versi terakhir <= as_of, 'data': data lengkap}
+        """
+        object_id, state = None, None
+        for row_id, version, action, is_keyframe, snapshot in self._iter_versi(model_name):
+            if row_id != object_id:
+                if state is not None:
+                    yield from self._selesai(model_name, object_id, state)
+                object_id, state = row_id, {'data': None}
+
+            if is_keyframe:
+                state['data'] = dict(snapshot)
+            elif state['data'] is not None:
+                state['data'].update(snapshot)
+            state['version'], state['action'] = version, action
+
+        if state is not None:
+            yield from self._selesai(model_name, object_id, state)
+
+    def _iter_versi(self, model_name: str) -> Iterator[Tuple]:
+        """
+        (object_id, version, action, is_keyframe, data_snapshot) urut
+        (object_id, created_at, id), dibaca per halaman keyset chunk_size baris.
+        """
+        from .models import DataVersion
+
+        queryset = DataVersion.objects.filter(
+            model_name=model_name,
+            branch=self.branch,
+            created_at__lte=self.as_of,
+        ).order_by('object_id', 'created_at', 'id').values_list(
+            'object_id', 'created_at', 'id', 'version', 'action', 'is_keyframe', 'data_snapshot'
+        )
+
+        halaman = queryset
+        while True:
+            rows = list(halaman[:self.chunk_size])
+            for object_id, _, _, version, action, is_keyframe, snapshot in rows:
+                yield object_id, version, action, is_keyframe, snapshot
+            if len(rows) < self.chunk_size:
+                return
+            object_id, created_at, pk = rows[-1][:3]
+            halaman = queryset.filter(
+                Q(object_id__gt=object_id)
+                | Q(object_id=object_id, created_at__gt=created_at)
+                | Q(object_id=object_id, created_at=created_at, id__gt=pk)
+            )
+
+    @staticmethod
+    def _selesai(model_name: str, object_id: int, state: Dict) -> Iterator[Dict]:
+        if state['data'] is None:
+            # Versi sebelum delta pertama sudah dihapus retensi
+            logger.warning(f"As-of: keyframe tidak ditemukan untuk {model_name}#{object_id}, dilewati")
+            return
+        if state['action'] == 'delete':
+            return
+        yield {'id': object_id, 'version': state['version'], 'data': state['data']}
+
+    def iter_semua(self, model_names: Iterable[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """(model_name, objek) untuk semua model, dalam urutan foreign key"""
+        for model_name in self._model_names(model_names):
+            for objek in self.iter_objek(model_name):
+                yield model_name, objek
+
+    def tulis_ndjson(self, file, model_names: Iterable[str] = None) -> Dict[str, int]:
+        """
+        Tulis keadaan as-of sebagai NDJSON ({"model", "id", "version", "data"} per baris).
+
+        Returns:
+            Jumlah objek per model
+        """
+        jumlah = {name: 0 for name in self._model_names(model_names)}
+        for model_name, objek in self.iter_semua(model_names):
+            file.write(json.dumps({'model': model_name, **objek}) + '\n')
+            jumlah[model_name] += 1
+        return jumlah
+
+    # ========== MATERIALISASI ==========
+
+    def _buat_instance(self, model_class, objek: Dict):
+        """Instance model dari data versi (nilai JSON dikonversi lewat field.to_python)"""
+        data = objek['data']
+        values = {}
+        for field in model_class._meta.concrete_fields:
+            if field.primary_key:
+                values[field.attname] = objek['id']
+            elif field.name in data:
+                values[field.attname] = field.to_python(data[field.name])
+        return model_class(**values)
+
+    def materialize(self, using: str, model_names: Iterable[str] = None) -> Dict[str, int]:
+        """
+        Isi tabel di database scratch `using` dengan keadaan as-of.
+        Isi tabel lama di alias tersebut dihapus lebih dulu.
+
+        Returns:
+            Jumlah objek per model
+        """
+        from .version_control import VersionControlService
+
+        if using == DEFAULT_DB_ALIAS:
+            raise ValueError("Materialisasi as-of harus ke database scratch, bukan 'default'")
+
+        names = self._model_names(model_names)
+        jumlah = {name: 0 for name in names}
+
+        connection = connections[using]
+        with transaction.atomic(using=using):
+            # DELETE langsung: QuerySet.delete() memicu signal (log aktivitas) untuk setiap baris
+            with connection.cursor() as cursor:
+                for model_name in reversed(names):
+                    table = VersionControlService._get_model_class(model_name)._meta.db_table
+                    cursor.execute(f"DELETE FROM {connection.ops.quote_name(table)}")
+
+            for model_name in names:
+                model_class = VersionControlService._get_model_class(model_name)
+                batch = []
+                for objek in self.iter_objek(model_name):
+                    batch.append(self._buat_instance(model_class, objek))
+                    if len(batch) >= self.chunk_size:
+                        jumlah[model_name] += self._simpan_batch(model_class, using, batch)
+                        batch = []
+                if batch:
+                    jumlah[model_name] += self._simpan_batch(model_class, using, batch)
+
+        logger.info(f"As-of {self.as_of.isoformat()} dimaterialisasi ke '{using}': {jumlah}")
+        return jumlah
+
+    @staticmethod
+    def _simpan_batch(model_class, using: str, batch) -> int:
+        # bulk_create mengisi ulang auto_now/auto_now_add; kembalikan nilai dari versi
+        waktu = [(obj.created_at, obj.updated_at) for obj in batch]
+        model_class.objects.using(using).bulk_create(batch)
+        for obj, (created_at, updated_at) in zip(batch, waktu):
+            obj.created_at = created_at or obj.created_at
+            obj.updated_at = updated_at or obj.updated_at
+        model_class.objects.using(using).bulk_update(batch, ['created_at', 'updated_at'])
+        return len(batch)
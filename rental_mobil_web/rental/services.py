@@ -2,11 +2,18 @@
 Services untuk Notifikasi
 """
 import logging
-from django.core.mail import send_mail
+import uuid
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Tuple
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import QuerySet
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from .models import Notifikasi, Penyewaan, Pelanggan
+from .email_outbox import EmailOutboxService
+from .dashboard import DashboardStatsService
 
 logger = logging.getLogger('rental.notifikasi')
 
@@ -34,40 +41,159 @@ class NotifikasiService:
             kategori: Kategori notifikasi
             penyewaan: Instance Penyewaan terkait (optional)
             pelanggan: Instance Pelanggan terkait (optional)
-            kirim_email: Apakah mengirim email (default False)
+            kirim_email: Apakah mengirim email (default False). Email dimasukkan
+                ke outbox dan dikirim oleh worker kirim_email_outbox;
+                dikirim_email menjadi True setelah email terkirim.
         
         Returns:
             Instance Notifikasi yang dibuat
         """
         try:
-            notifikasi = Notifikasi.objects.create(
-                judul=judul,
-                pesan=pesan,
-                tipe=tipe,
-                kategori=kategori,
-                penyewaan_id_ref=penyewaan.id if penyewaan else None,
-                pelanggan_id_ref=pelanggan.id if pelanggan else None,
-                pelanggan_nama=pelanggan.nama if pelanggan else '',
-                dikirim_email=False
-            )
+            with transaction.atomic():
+                notifikasi = Notifikasi.objects.create(
+                    judul=judul,
+                    pesan=pesan,
+                    tipe=tipe,
+                    kategori=kategori,
+                    penyewaan_id_ref=penyewaan.id if penyewaan else None,
+                    pelanggan_id_ref=pelanggan.id if pelanggan else None,
+                    pelanggan_nama=pelanggan.nama if pelanggan else '',
+                    dikirim_email=False
+                )
+                
+                # Antrikan email jika diminta (tidak menunggu SMTP)
+                if kirim_email and pelanggan and pelanggan.email:
+                    EmailOutboxService.antrikan(notifikasi, pelanggan.email)
             
             logger.info(f"Notifikasi dibuat: {judul} - Kategori: {kategori}")
             
-            # Kirim email jika diminta
-            if kirim_email and pelanggan and pelanggan.email:
-                email_terkirim = NotifikasiService.kirim_email_notifikasi(
-                    notifikasi, pelanggan.email
-                )
-                if email_terkirim:
-                    notifikasi.dikirim_email = True
-                    notifikasi.save()
-            
             return notifikasi
             
         except Exception as e:
             logger.error(f"Gagal membuat notifikasi: {str(e)}")
             raise
     
+    @staticmethod
+    def buat_notifikasi_bulk(
+        penyewaan: Iterable[Penyewaan],
+        render: Callable[[Penyewaan], Tuple[str, str]],
+        tipe: str = 'info',
+        kategori: str = 'sistem',
+        kirim_email: bool = True,
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        Membuat notifikasi untuk banyak penyewaan sekaligus
+        
+        Pelanggan & mobil diambil dengan select_related (satu query per
+        batch), notifikasi dibuat dengan bulk_create, dan email dimasukkan
+        ke outbox dengan bulk_create, semuanya dalam satu transaksi per batch.
+        
+        Args:
+            penyewaan: QuerySet atau list Penyewaan (list dianggap sudah
+                memuat pelanggan & mobil)
+            render: Fungsi penyewaan -> (judul, pesan)
+            tipe: Tipe notifikasi
+            kategori: Kategori notifikasi
+            kirim_email: Antrikan email ke pelanggan yang punya email
+            batch_size: Jumlah penyewaan per batch
+        
+        Returns:
+            Dict jumlah 'notifikasi' dan 'email' yang diantrikan
+        """
+        if isinstance(penyewaan, QuerySet):
+            penyewaan = penyewaan.select_related('pelanggan', 'mobil').iterator(chunk_size=batch_size)
+        penyewaan = iter(penyewaan)
+        
+        hasil = {'notifikasi': 0, 'email': 0}
+        while True:
+            batch = list(islice(penyewaan, batch_size))
+            if not batch:
+                break
+            
+            items = []
+            for p in batch:
+                judul, pesan = render(p)
+                items.append((p, Notifikasi(
+                    judul=judul,
+                    pesan=pesan,
+                    tipe=tipe,
+                    kategori=kategori,
+                    penyewaan_id_ref=p.id,
+                    pelanggan_id_ref=p.pelanggan_id,
+                    pelanggan_nama=p.pelanggan.nama,
+                    dikirim_email=False,
+                    kode_korelasi=uuid.uuid4()
+                )))
+            
+            with transaction.atomic():
+                notifikasi = Notifikasi.objects.bulk_create([n for _, n in items])
+                if kirim_email:
+                    NotifikasiService._isi_id_notifikasi(items)
+                    hasil['email'] += EmailOutboxService.antrikan_bulk(
+                        (n, p.pelanggan.email) for p, n in items if n.pk and p.pelanggan.email
+                    )
+            hasil['notifikasi'] += len(notifikasi)
+        
+        # bulk_create tidak memicu signal: hapus cache statistik dashboard
+        DashboardStatsService.invalidate()
+        logger.info(
+            f"Notifikasi bulk dibuat: {hasil['notifikasi']} - Kategori: {kategori} - "
+            f"Email diantrikan: {hasil['email']}"
+        )
+        return hasil
+    
+    @staticmethod
+    def _isi_id_notifikasi(items: List[Tuple[Penyewaan, Notifikasi]]):
+        """
+        bulk_create di MySQL tidak mengembalikan id: ambil ulang id notifikasi
+        yang baru dibuat lewat kode_korelasi (satu query) agar bisa
+        direferensikan outbox email.
+        """
+        if not items or items[0][1].pk is not None:
+            return
+        ids = dict(
+            Notifikasi.objects.filter(
+                kode_korelasi__in=[n.kode_korelasi for _, n in items]
+            ).values_list('kode_korelasi', 'id')
+        )
+        for _, n in items:
+            n.pk = ids.get(n.kode_korelasi)
+    
+    @staticmethod
+    def buat_email(notifikasi: Notifikasi, email_tujuan: str, connection=None) -> EmailMultiAlternatives:
+        """Susun email (plain + HTML) untuk satu notifikasi"""
+        subject = f"[Rental Mobil] {notifikasi.judul}"
+        
+        # HTML message
+        html_message = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #333;">{notifikasi.judul}</h2>
+                <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
+                    <p>{notifikasi.pesan}</p>
+                </div>
+                <hr style="margin: 20px 0;">
+                <p style="color: #666; font-size: 12px;">
+                    Email ini dikirim secara otomatis oleh sistem Rental Mobil.
+                    Mohon tidak membalas email ini.
+                </p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=strip_tags(html_message),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email_tujuan],
+            connection=connection,
+        )
+        email.attach_alternative(html_message, 'text/html')
+        return email
+    
     @staticmethod
     def kirim_email_notifikasi(notifikasi: Notifikasi, email_tujuan: str) -> bool:
         """
@@ -81,37 +207,7 @@ class NotifikasiService:
             True jika berhasil, False jika gagal
         """
         try:
-            subject = f"[Rental Mobil] {notifikasi.judul}"
-            
-            # HTML message
-            html_message = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #333;">{notifikasi.judul}</h2>
-                    <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
-                        <p>{notifikasi.pesan}</p>
-                    </div>
-                    <hr style="margin: 20px 0;">
-                    <p style="color: #666; font-size: 12px;">
-                        Email ini dikirim secara otomatis oleh sistem Rental Mobil.
-                        Mohon tidak membalas email ini.
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email_tujuan],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            NotifikasiService.buat_email(notifikasi, email_tujuan).send(fail_silently=False)
             
             logger.info(f"Email notifikasi terkirim ke: {email_tujuan}")
             return True
@@ -197,8 +293,8 @@ class NotifikasiService:
         )
     
     @staticmethod
-    def notifikasi_reminder_pengembalian(penyewaan: Penyewaan, hari_tersisa: int) -> Notifikasi:
-        """Buat notifikasi reminder pengembalian"""
+    def pesan_reminder_pengembalian(penyewaan: Penyewaan, hari_tersisa: int) -> Tuple[str, str]:
+        """Judul & pesan notifikasi reminder pengembalian"""
         judul = f"Reminder: Pengembalian {hari_tersisa} Hari Lagi"
         pesan = (
             f"Pengingat pengembalian mobil:\n\n"
@@ -207,6 +303,12 @@ class NotifikasiService:
             f"Tanggal Kembali: {penyewaan.tanggal_kembali}\n\n"
             f"Mohon kembalikan mobil tepat waktu untuk menghindari denda."
         )
+        return judul, pesan
+    
+    @staticmethod
+    def notifikasi_reminder_pengembalian(penyewaan: Penyewaan, hari_tersisa: int) -> Notifikasi:
+        """Buat notifikasi reminder pengembalian"""
+        judul, pesan = NotifikasiService.pesan_reminder_pengembalian(penyewaan, hari_tersisa)
         
         return NotifikasiService.buat_notifikasi(
             judul=judul,
@@ -219,8 +321,8 @@ class NotifikasiService:
         )
     
     @staticmethod
-    def notifikasi_keterlambatan(penyewaan: Penyewaan, hari_terlambat: int, estimasi_denda: float) -> Notifikasi:
-        """Buat notifikasi keterlambatan"""
+    def pesan_keterlambatan(penyewaan: Penyewaan, hari_terlambat: int, estimasi_denda: float) -> Tuple[str, str]:
+        """Judul & pesan notifikasi keterlambatan"""
         judul = f"PERINGATAN: Keterlambatan {hari_terlambat} Hari"
         pesan = (
             f"Mobil belum dikembalikan dan sudah terlambat:\n\n"
@@ -231,6 +333,12 @@ class NotifikasiService:
             f"Estimasi Denda: Rp {estimasi_denda:,.0f}\n\n"
             f"Segera kembalikan mobil untuk menghindari denda lebih besar."
         )
+        return judul, pesan
+    
+    @staticmethod
+    def notifikasi_keterlambatan(penyewaan: Penyewaan, hari_terlambat: int, estimasi_denda: float) -> Notifikasi:
+        """Buat notifikasi keterlambatan"""
+        judul, pesan = NotifikasiService.pesan_keterlambatan(penyewaan, hari_terlambat, estimasi_denda)
         
         return NotifikasiService.buat_notifikasi(
             judul=judul,
@@ -256,4 +364,5 @@ class NotifikasiService:
     def tandai_semua_dibaca():
         """Tandai semua notifikasi sebagai sudah dibaca"""
         Notifikasi.objects.filter(dibaca=False).update(dibaca=True)
+        DashboardStatsService.invalidate()
         logger.info("Semua notifikasi ditandai sebagai sudah dibaca")
@@ -7,9 +7,11 @@ import json
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from .models import Mobil, Pelanggan, Penyewaan, Pembayaran, LogAktivitas
+from .models import Mobil, Pelanggan, Penyewaan, Pembayaran, Notifikasi, LogAktivitas
 from .services import NotifikasiService
 from .log_aktivitas_service import LogAktivitasService
+from .dashboard import DashboardStatsService
+from .audit_writer import audit_writer
 from .middleware import get_current_username, get_client_ip as get_middleware_client_ip, get_user_agent
 
 logger = logging.getLogger('rental')
@@ -18,8 +20,11 @@ pembayaran_logger = logging.getLogger('rental.pembayaran')
 
 
 def create_log_with_user(aksi, model_name, object_id, object_repr, perubahan):
-    """Helper untuk membuat log aktivitas dengan user info"""
-    LogAktivitas.objects.create(
+    """
+    Helper untuk membuat log aktivitas dengan user info.
+    Ditulis per batch oleh audit_writer (bulk_create saat commit / akhir request).
+    """
+    audit_writer.tulis(
         user=get_current_username(),
         aksi=aksi,
         model_name=model_name,
@@ -31,6 +36,19 @@ def create_log_with_user(aksi, model_name, object_id, object_repr, perubahan):
     )
 
 
+# ==================== CACHE DASHBOARD ====================
+
+@receiver(post_save, sender=Mobil)
+@receiver(post_delete, sender=Mobil)
+@receiver(post_save, sender=Penyewaan)
+@receiver(post_delete, sender=Penyewaan)
+@receiver(post_save, sender=Notifikasi)
+@receiver(post_delete, sender=Notifikasi)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Hapus cache statistik dashboard saat data yang dihitung berubah"""
+    DashboardStatsService.invalidate()
+
+
 # ==================== PRE-SAVE SIGNALS (untuk tracking perubahan) ====================
 
 @receiver(pre_save, sender=Mobil)
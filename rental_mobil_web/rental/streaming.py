@@ -0,0 +1,125 @@
+"""
+Streaming response untuk result set besar
+
+Queryset dibaca dengan .values(...).iterator(chunk_size=...) dan ditulis ke
+StreamingHttpResponse sedikit demi sedikit, sehingga worker tidak perlu
+menyimpan seluruh list dict maupun string JSON di memori.
+
+Format:
+- json   : {"success": true, ..., "data": [...], "count": N} (array ditulis bertahap)
+- ndjson : satu objek JSON per baris (application/x-ndjson)
+
+Endpoint list memakai ?stream=json|ndjson; endpoint export cukup memanggil
+stream_queryset(..., filename='export.ndjson').
+"""
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger('rental')
+
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Jumlah baris yang digabung per chunk yang dikirim ke client
+ROWS_PER_CHUNK = 100
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+def iter_rows(queryset: QuerySet, fields: Sequence[str], chunk_size: int = None) -> Iterator[Dict]:
+    """Baca queryset sebagai dict per baris tanpa cache hasil queryset"""
+    chunk_size = chunk_size or getattr(settings, 'RENTAL_STREAM_CHUNK_SIZE', 2000)
+    return queryset.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def _chunked(parts: Iterable[str]) -> Iterator[str]:
+    buffer = []
+    for part in parts:
+        buffer.append(part)
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def json_stream(rows: Iterable[Dict], meta: Dict = None) -> Iterator[str]:
+    """Array JSON bertahap; 'count' ditulis di akhir karena baru diketahui setelah iterasi"""
+    count = 0
+    header = {'success': True}
+    header.update(meta or {})
+
+    def parts():
+        nonlocal count
+        yield _dumps(header)[:-1] + ', "data": ['
+        for row in rows:
+            yield (', ' if count else '') + _dumps(row)
+            count += 1
+        yield f'], "count": {count}}}'
+
+    return _chunked(parts())
+
+
+def ndjson_stream(rows: Iterable[Dict]) -> Iterator[str]:
+    """Satu objek JSON per baris"""
+    return _chunked(_dumps(row) + '\n' for row in rows)
+
+
+def _log_error(stream: Iterator[str]) -> Iterator[str]:
+    # Status 200 sudah terkirim: error di tengah stream hanya bisa dicatat
+    try:
+        yield from stream
+    except Exception as e:
+        logger.error(f"Streaming response terputus: {str(e)}")
+        raise
+
+
+def streaming_response(rows: Iterable[Dict], format: str = 'json', meta: Dict = None,
+                       filename: Optional[str] = None) -> StreamingHttpResponse:
+    """
+    Bungkus iterator dict menjadi StreamingHttpResponse.
+
+    Args:
+        rows: Iterator dict (misal dari iter_rows)
+        format: 'json' atau 'ndjson'
+        meta: Key tambahan di objek JSON (diabaikan untuk ndjson)
+        filename: Jika diisi, response dikirim sebagai attachment (export)
+    """
+    if format not in STREAM_FORMATS:
+        raise ValueError(f"Format stream harus salah satu dari: {', '.join(STREAM_FORMATS)}")
+
+    stream = json_stream(rows, meta) if format == 'json' else ndjson_stream(rows)
+    response = StreamingHttpResponse(_log_error(stream), content_type=STREAM_FORMATS[format])
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_queryset(queryset: QuerySet, fields: Sequence[str], format: str = 'json',
+                    meta: Dict = None, filename: Optional[str] = None,
+                    chunk_size: int = None) -> StreamingHttpResponse:
+    """Shortcut: iter_rows + streaming_response"""
+    if format not in STREAM_FORMATS:
+        raise ValueError(f"Format stream harus salah satu dari: {', '.join(STREAM_FORMATS)}")
+    return streaming_response(
+        iter_rows(queryset, fields, chunk_size), format, meta=meta, filename=filename
+    )
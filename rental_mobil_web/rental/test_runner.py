@@ -0,0 +1,31 @@
+"""
+Test runner untuk aplikasi rental.
+
+Model Mobil, Pelanggan, Penyewaan dan Pembayaran memakai managed=False
+(tabel dibuat oleh aplikasi CLI), sehingga tidak dibuat oleh migrasi.
+Runner ini membuat semua tabel langsung dari model saat test.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """DiscoverRunner yang ikut membuat tabel model unmanaged"""
+
+    def setup_test_environment(self, *args, **kwargs):
+        self.unmanaged_models = [
+            model for model in apps.get_app_config('rental').get_models()
+            if not model._meta.managed
+        ]
+        for model in self.unmanaged_models:
+            model._meta.managed = True
+        # Buat tabel langsung dari model (syncdb), bukan dari file migrasi
+        settings.MIGRATION_MODULES = {'rental': None}
+        super().setup_test_environment(*args, **kwargs)
+
+    def teardown_test_environment(self, *args, **kwargs):
+        super().teardown_test_environment(*args, **kwargs)
+        for model in self.unmanaged_models:
+            model._meta.managed = False
@@ -1,3 +1,1180 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from performance_monitor import DatabaseQueryMonitor
+
+from .audit_writer import AuditLogWriter
+from .change_store import ChangeStore, change_store
+from .email_outbox import EmailOutboxService
+from .kode_allocator import BlockKodeAllocator, CounterKodeAllocator
+from .middleware import CurrentUserMiddleware
+from .models import (
+    DataVersion, DataVersionHead, EmailOutbox, KodeCounter, LogAktivitas, Mobil, Notifikasi, Pelanggan, Penyewaan,
+)
+from .point_in_time import PointInTimeService
+from .services import NotifikasiService
+from .version_control import VersionControlService
+from .version_retention import VersionRetention
+
+
+def buat_mobil(plat_nomor='B 1234 ABC'):
+    return Mobil.objects.create(
+        merk='Toyota', model='Avanza', tahun=2022,
+        plat_nomor=plat_nomor, harga_sewa_per_hari=Decimal('350000')
+    )
+
+
+def buat_pelanggan(nik='3171234567890001', email=''):
+    return Pelanggan.objects.create(nik=nik, nama='Budi Santoso', email=email)
+
+
+def buat_penyewaan(mobil, pelanggan, **kwargs):
+    today = date.today()
+    data = dict(
+        mobil=mobil, pelanggan=pelanggan,
+        tanggal_sewa=today, tanggal_kembali=today + timedelta(days=2),
+        total_hari=2, total_biaya=Decimal('700000')
+    )
+    data.update(kwargs)
+    return Penyewaan.objects.create(**data)
+
+
+class KodePenyewaanTest(TestCase):
+    """Test generate kode penyewaan dari counter"""
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+        self.pelanggan = buat_pelanggan()
+        self.prefix = f"RNT-{date.today().strftime('%Y%m%d')}"
+
+    def test_kode_berurutan(self):
+        kode = [buat_penyewaan(self.mobil, self.pelanggan).kode_penyewaan for _ in range(3)]
+        self.assertEqual(kode, [f"{self.prefix}-{n:04d}" for n in (1, 2, 3)])
+        self.assertEqual(KodeCounter.objects.get(prefix=self.prefix).last_value, 3)
+
+    def test_kode_manual_tidak_diubah(self):
+        penyewaan = buat_penyewaan(self.mobil, self.pelanggan, kode_penyewaan='RNT-MANUAL-0001')
+        self.assertEqual(penyewaan.kode_penyewaan, 'RNT-MANUAL-0001')
+        self.assertFalse(KodeCounter.objects.exists())
+
+    def test_counter_lanjut_dari_data_lama(self):
+        buat_penyewaan(self.mobil, self.pelanggan, kode_penyewaan=f"{self.prefix}-0041")
+        penyewaan = buat_penyewaan(self.mobil, self.pelanggan)
+        self.assertEqual(penyewaan.kode_penyewaan, f"{self.prefix}-0042")
+
+    def test_query_generate_kode_konstan(self):
+        # Jumlah query tidak bergantung pada jumlah penyewaan yang sudah ada
+        for _ in range(20):
+            buat_penyewaan(self.mobil, self.pelanggan)
+
+        allocator = CounterKodeAllocator()
+        allocator.next_kode()
+        with self.assertNumQueries(1):
+            # Prefix sudah diketahui ada: hanya upsert yang mengembalikan last_value
+            allocator.next_kode()
+
+    def test_prefix_siap_tapi_baris_counter_hilang(self):
+        allocator = CounterKodeAllocator()
+        allocator.next_kode()
+        buat_penyewaan(self.mobil, self.pelanggan, kode_penyewaan=f"{self.prefix}-0041")
+        KodeCounter.objects.all().delete()
+        # Baris dibuat ulang oleh upsert lalu dilanjutkan dari data lama
+        self.assertEqual(allocator.next_kode(), f"{self.prefix}-0042")
+
+    def test_block_allocator_tolak_alias_default(self):
+        # Blok di alias 'default' selalu ikut transaksi Penyewaan.save, tidak pernah di-cache
+        with self.assertRaises(ImproperlyConfigured):
+            BlockKodeAllocator(using='default')
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class KodePenyewaanConcurrencyTest(TransactionTestCase):
+    """
+    Stress test generate kode dari banyak thread sekaligus.
+    Butuh backend dengan row lock (MySQL/PostgreSQL): SQLite mengunci seluruh
+    database dan menolak writer paralel dengan 'database is locked'.
+    """
+
+    databases = {'default', 'kode_sequence'}
+    THREADS = 8
+    PER_THREAD = 25
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+        self.pelanggan = buat_pelanggan()
+
+    def _jalankan(self, target):
+        hasil, errors, latensi = [], [], []
+        lock = threading.Lock()
+        # Semua thread mulai bersamaan, termasuk saat baris counter belum ada
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                barrier.wait()
+                lokal, waktu = [], []
+                for _ in range(self.PER_THREAD):
+                    start = time.perf_counter()
+                    lokal.append(target())
+                    waktu.append(time.perf_counter() - start)
+                with lock:
+                    hasil.extend(lokal)
+                    latensi.extend(waktu)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        return hasil, sorted(latensi)
+
+    def test_penyewaan_paralel_kode_unik(self):
+        self.assertFalse(KodeCounter.objects.exists())
+        kode, latensi = self._jalankan(
+            lambda: buat_penyewaan(self.mobil, self.pelanggan).kode_penyewaan
+        )
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(len(kode), total)
+        self.assertEqual(len(set(kode)), total)
+        self.assertEqual(Penyewaan.objects.count(), total)
+        self.assertEqual(KodeCounter.objects.get().last_value, total)
+        # p99 latensi per insert harus tetap wajar walau ada kontensi
+        self.assertLess(latensi[int(len(latensi) * 0.99) - 1], 2.0)
+
+    def test_reserve_paralel_counter_baru(self):
+        allocator = CounterKodeAllocator()
+        hasil, _ = self._jalankan(lambda: allocator.reserve('RNT-BARU', 3))
+        nomor = [n for first, last in hasil for n in range(first, last + 1)]
+        total = self.THREADS * self.PER_THREAD * 3
+        self.assertEqual(sorted(nomor), list(range(1, total + 1)))
+
+    def test_block_allocator_paralel_unik(self):
+        allocator = BlockKodeAllocator(block_size=10)
+        kode, _ = self._jalankan(allocator.next_kode)
+        self.assertEqual(len(set(kode)), self.THREADS * self.PER_THREAD)
+        # Blok benar-benar di-cache: satu reservasi per 10 kode
+        prefix = allocator.get_prefix(date.today())
+        self.assertEqual(KodeCounter.objects.get(prefix=prefix).last_value, self.THREADS * self.PER_THREAD)
+
+
+class CekPenyewaanBatchTest(TestCase):
+    """Test mode --batch command cek_penyewaan"""
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+        self.pelanggan = buat_pelanggan(email='budi@example.com')
+        self.today = date.today()
+
+    def buat_terlambat(self, jumlah, hari=3):
+        tanggal_kembali = self.today - timedelta(days=hari)
+        return [
+            buat_penyewaan(self.mobil, self.pelanggan,
+                           tanggal_sewa=tanggal_kembali - timedelta(days=2),
+                           tanggal_kembali=tanggal_kembali)
+            for _ in range(jumlah)
+        ]
+
+    def jalankan(self, batch_size=1000):
+        mail.outbox = []
+        call_command('cek_penyewaan', batch=True, batch_size=batch_size, stdout=StringIO())
+
+    def test_status_notifikasi_log_dan_email(self):
+        terlambat = self.buat_terlambat(3)
+        aktif = buat_penyewaan(self.mobil, self.pelanggan)
+
+        self.jalankan(batch_size=2)
+
+        self.assertEqual(
+            set(Penyewaan.objects.filter(status='terlambat').values_list('id', flat=True)),
+            {p.id for p in terlambat}
+        )
+        aktif.refresh_from_db()
+        self.assertEqual(aktif.status, 'aktif')
+
+        notifikasi = Notifikasi.objects.filter(kategori='keterlambatan')
+        self.assertEqual(notifikasi.count(), 3)
+        self.assertIn('Estimasi Denda: Rp 1,575,000', notifikasi.first().pesan)
+        # Email hanya diantrikan; dikirim oleh worker outbox
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.filter(notifikasi__in=notifikasi).count(), 3)
+        self.assertEqual(
+            LogAktivitas.objects.filter(model_name='Penyewaan', aksi='update').count(), 3
+        )
+
+    def test_jumlah_query_tidak_bergantung_jumlah_penyewaan(self):
+        def hitung_query(jumlah):
+            Penyewaan.objects.all().delete()
+            self.buat_terlambat(jumlah)
+            with CaptureQueriesContext(connections['default']) as queries:
+                self.jalankan()
+            return len(queries)
+
+        self.assertEqual(hitung_query(2), hitung_query(10))
+
+
+class GagalEmailBackend(BaseEmailBackend):
+    """Backend email yang selalu gagal (simulasi SMTP down)"""
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP tidak tersedia')
+
+
+class CekKlaimEmailBackend(BaseEmailBackend):
+    """Catat apakah pengiriman terjadi di dalam transaksi outbox dan apakah baris masih bisa diklaim"""
+
+    aktif = []
+    dalam_transaksi = []
+    batch_lain = []
+
+    def send_messages(self, messages):
+        CekKlaimEmailBackend.dalam_transaksi.append(bool(CekKlaimEmailBackend.aktif))
+        CekKlaimEmailBackend.batch_lain.append(EmailOutboxService.klaim_batch(10))
+        return len(messages)
+
+
+class EmailOutboxTest(TestCase):
+    """Test outbox email notifikasi (backend locmem)"""
+
+    def setUp(self):
+        self.pelanggan = buat_pelanggan(email='budi@example.com')
+
+    def buat_notifikasi(self):
+        return NotifikasiService.buat_notifikasi(
+            'Test', 'Pesan test', pelanggan=self.pelanggan, kirim_email=True
+        )
+
+    def test_buat_notifikasi_tidak_mengirim_langsung(self):
+        notifikasi = self.buat_notifikasi()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(notifikasi.dikirim_email)
+        self.assertEqual(EmailOutbox.objects.get().status, 'pending')
+
+    def test_worker_kirim_batch_satu_koneksi(self):
+        notifikasi = [self.buat_notifikasi() for _ in range(3)]
+        hasil = EmailOutboxService.kirim_semua(batch_size=2)
+
+        self.assertEqual(hasil, {'terkirim': 3, 'retry': 0, 'gagal': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['budi@example.com'])
+        self.assertFalse(EmailOutbox.objects.exclude(status='terkirim').exists())
+        self.assertEqual(
+            Notifikasi.objects.filter(id__in=[n.id for n in notifikasi], dikirim_email=True).count(), 3
+        )
+
+    @override_settings(EMAIL_BACKEND='rental.tests.CekKlaimEmailBackend')
+    def test_smtp_di_luar_transaksi_klaim(self):
+        self.buat_notifikasi()
+        atomic_asli = transaction.atomic
+        aktif = []
+
+        @contextmanager
+        def atomic(*args, **kwargs):
+            aktif.append(True)
+            try:
+                with atomic_asli(*args, **kwargs):
+                    yield
+            finally:
+                aktif.pop()
+
+        CekKlaimEmailBackend.aktif = aktif
+        CekKlaimEmailBackend.dalam_transaksi = []
+        CekKlaimEmailBackend.batch_lain = []
+        with mock.patch('rental.email_outbox.transaction.atomic', atomic):
+            hasil = EmailOutboxService.kirim_batch()
+
+        self.assertEqual(hasil['terkirim'], 1)
+        self.assertEqual(CekKlaimEmailBackend.dalam_transaksi, [False])
+        self.assertEqual(CekKlaimEmailBackend.batch_lain, [[]])
+        self.assertEqual(EmailOutbox.objects.get().status, 'terkirim')
+
+    @override_settings(EMAIL_BACKEND='rental.tests.GagalEmailBackend',
+                       RENTAL_EMAIL_MAX_ATTEMPTS=2, RENTAL_EMAIL_RETRY_BACKOFF=60)
+    def test_retry_backoff_lalu_gagal(self):
+        notifikasi = self.buat_notifikasi()
+
+        self.assertEqual(EmailOutboxService.kirim_batch(), {'terkirim': 0, 'retry': 1, 'gagal': 0})
+        item = EmailOutbox.objects.get()
+        self.assertEqual(item.percobaan, 1)
+        self.assertGreater(item.kirim_setelah, timezone.now())
+        self.assertIn('SMTP tidak tersedia', item.error_terakhir)
+
+        # Belum jatuh waktu: tidak diambil worker
+        self.assertEqual(EmailOutboxService.kirim_batch(), {'terkirim': 0, 'retry': 0, 'gagal': 0})
+
+        EmailOutbox.objects.update(kirim_setelah=timezone.now())
+        self.assertEqual(EmailOutboxService.kirim_batch(), {'terkirim': 0, 'retry': 0, 'gagal': 1})
+        self.assertEqual(EmailOutbox.objects.get().status, 'gagal')
+        notifikasi.refresh_from_db()
+        self.assertFalse(notifikasi.dikirim_email)
+
+
+class NotifikasiBulkTest(TestCase):
+    """Test NotifikasiService.buat_notifikasi_bulk dan endpoint send-notifications"""
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+        self.besok = date.today() + timedelta(days=1)
+
+    def buat_reminder(self, jumlah, offset=0):
+        for i in range(offset, offset + jumlah):
+            pelanggan = buat_pelanggan(nik=f"{3171234567800000 + i}", email=f"p{i}@example.com")
+            buat_penyewaan(self.mobil, pelanggan, tanggal_kembali=self.besok)
+        Notifikasi.objects.all().delete()
+        EmailOutbox.objects.all().delete()
+
+    def jalankan(self):
+        return NotifikasiService.buat_notifikasi_bulk(
+            Penyewaan.objects.filter(status='aktif', tanggal_kembali=self.besok),
+            lambda p: NotifikasiService.pesan_reminder_pengembalian(p, 1),
+            tipe='info', kategori='reminder'
+        )
+
+    def test_notifikasi_dan_outbox_dibuat(self):
+        self.buat_reminder(3)
+        hasil = self.jalankan()
+
+        self.assertEqual(hasil, {'notifikasi': 3, 'email': 3})
+        notifikasi = Notifikasi.objects.filter(kategori='reminder')
+        self.assertEqual(notifikasi.count(), 3)
+        self.assertIn('Toyota Avanza', notifikasi.first().pesan)
+        self.assertEqual(
+            set(EmailOutbox.objects.values_list('notifikasi_id', flat=True)),
+            set(notifikasi.values_list('id', flat=True))
+        )
+
+    def test_jumlah_query_konstan(self):
+        self.buat_reminder(2)
+        with CaptureQueriesContext(connections['default']) as sedikit:
+            self.jalankan()
+        self.buat_reminder(20, offset=2)
+        with CaptureQueriesContext(connections['default']) as banyak:
+            self.jalankan()
+        self.assertEqual(len(sedikit), len(banyak))
+
+    def test_id_dari_kode_korelasi_tanpa_returning(self):
+        # Seperti MySQL: bulk_create tidak mengembalikan id
+        self.buat_reminder(3)
+        features = type(connections['default'].features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', False):
+            self.jalankan()
+            self.jalankan()
+
+        outbox = EmailOutbox.objects.select_related('notifikasi')
+        self.assertEqual(outbox.count(), 6)
+        self.assertEqual(
+            set(outbox.values_list('notifikasi_id', flat=True)),
+            set(Notifikasi.objects.values_list('id', flat=True))
+        )
+        for email in outbox:
+            pelanggan = Penyewaan.objects.get(id=email.notifikasi.penyewaan_id_ref).pelanggan
+            self.assertEqual(email.email_tujuan, pelanggan.email)
+
+    def test_endpoint_send_notifications(self):
+        self.buat_reminder(2)
+        pelanggan = buat_pelanggan(nik='3171234567899999')
+        terlambat = buat_penyewaan(
+            self.mobil, pelanggan,
+            tanggal_sewa=date.today() - timedelta(days=5),
+            tanggal_kembali=date.today() - timedelta(days=2)
+        )
+
+        response = self.client.post(
+            '/api/alert/send-notifications/', data='{}', content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['details'], {'reminder': 2, 'keterlambatan': 1})
+        terlambat.refresh_from_db()
+        self.assertEqual(terlambat.status, 'terlambat')
+        log_status = LogAktivitas.objects.filter(model_name='Penyewaan', object_id=terlambat.id, aksi='update')
+        self.assertEqual(log_status.count(), 1)
+
+        # Panggilan kedua: notifikasi ulang, tanpa log perubahan status lagi
+        response = self.client.post(
+            '/api/alert/send-notifications/', data='{}', content_type='application/json'
+        )
+        self.assertEqual(response.json()['details'], {'reminder': 2, 'keterlambatan': 1})
+        self.assertEqual(log_status.count(), 1)
+        self.assertEqual(Notifikasi.objects.filter(kategori='keterlambatan').count(), 2)
+
+
+class AlertEndpointQueryTest(TestCase):
+    """Regression test jumlah query endpoint alert (N+1)"""
+
+    def setUp(self):
+        self.today = date.today()
+
+    def buat_data(self, jumlah, mulai=0):
+        for i in range(mulai, mulai + jumlah):
+            mobil = buat_mobil(plat_nomor=f"B {1000 + i} QRY")
+            pelanggan = buat_pelanggan(nik=f"{3171234567700000 + i}")
+            # Terlambat 1..jumlah hari dan reminder 1/3/7 hari lagi
+            buat_penyewaan(mobil, pelanggan,
+                           tanggal_sewa=self.today - timedelta(days=i + 5),
+                           tanggal_kembali=self.today - timedelta(days=i + 1))
+            buat_penyewaan(mobil, pelanggan,
+                           tanggal_kembali=self.today + timedelta(days=(1, 3, 7)[i % 3]))
+
+    def get(self, url):
+        with DatabaseQueryMonitor(url) as qm:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), qm.query_count
+
+    def test_query_konstan(self):
+        self.buat_data(3)
+        _, keterlambatan_sedikit = self.get('/api/alert/check-keterlambatan/')
+        _, reminder_sedikit = self.get('/api/alert/check-reminder/')
+
+        self.buat_data(12, mulai=3)
+        _, keterlambatan_banyak = self.get('/api/alert/check-keterlambatan/')
+        _, reminder_banyak = self.get('/api/alert/check-reminder/')
+
+        # COUNT + SELECT halaman (JOIN mobil & pelanggan)
+        self.assertEqual(keterlambatan_sedikit, 2)
+        self.assertEqual(keterlambatan_banyak, 2)
+        self.assertEqual(reminder_sedikit, 2)
+        self.assertEqual(reminder_banyak, 2)
+
+    def test_klasifikasi_dan_pagination(self):
+        self.buat_data(9)
+        data, _ = self.get('/api/alert/check-keterlambatan/?page_size=4&page=1')
+
+        self.assertEqual(data['total_alerts'], 9)
+        self.assertEqual(data['pagination']['total_pages'], 3)
+        self.assertTrue(data['pagination']['has_next'])
+        alerts = data['alerts']
+        self.assertEqual([a['hari_terlambat'] for a in alerts], [9, 8, 7, 6])
+        self.assertEqual(alerts[0]['level'], 'critical')
+        self.assertEqual(alerts[0]['estimasi_denda'], 350000 * 9 * 1.5)
+
+        data, _ = self.get('/api/alert/check-reminder/?page_size=100')
+        self.assertEqual(data['total_reminders'], 9)
+        self.assertEqual(sorted({r['hari_tersisa'] for r in data['reminders']}), [1, 3, 7])
+        self.assertEqual(data['reminders'][0]['hari_tersisa'], 1)
+
+
+class DashboardStatsTest(TestCase):
+    """api_dashboard_stats: conditional aggregation + cache dengan invalidasi"""
+
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        self.mobil = buat_mobil()
+        pelanggan = buat_pelanggan()
+        buat_penyewaan(self.mobil, pelanggan, tanggal_kembali=today + timedelta(days=2))
+        buat_penyewaan(self.mobil, pelanggan, tanggal_kembali=today + timedelta(days=10))
+        buat_penyewaan(self.mobil, pelanggan, status='terlambat',
+                       tanggal_kembali=today - timedelta(days=1))
+        buat_penyewaan(self.mobil, pelanggan, status='selesai')
+        cache.clear()
+
+    def get_stats(self):
+        with DatabaseQueryMonitor('dashboard_stats') as qm:
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['stats'], qm.query_count
+
+    def test_statistik_dan_cache(self):
+        stats, query_count = self.get_stats()
+        self.assertEqual(query_count, 3)
+        self.assertEqual(stats['penyewaan'], {'total': 4, 'aktif': 2, 'terlambat': 1, 'selesai': 1})
+        self.assertEqual(stats['mobil'], {'total': 1, 'tersedia': 1, 'disewa': 0})
+        self.assertEqual(stats['alerts'], {
+            'notifikasi_belum_dibaca': Notifikasi.objects.filter(dibaca=False).count(),
+            'penyewaan_terlambat': 1,
+            'akan_jatuh_tempo': 1,
+        })
+
+        # Poll berikutnya dilayani dari cache
+        _, query_count = self.get_stats()
+        self.assertEqual(query_count, 0)
+
+    def test_invalidasi_saat_data_berubah(self):
+        self.get_stats()
+        self.mobil.status = 'disewa'
+        self.mobil.save()
+        stats, query_count = self.get_stats()
+        self.assertEqual(query_count, 3)
+        self.assertEqual(stats['mobil']['disewa'], 1)
+
+        # Jalur bulk (update()) juga menghapus cache
+        NotifikasiService.tandai_semua_dibaca()
+        stats, _ = self.get_stats()
+        self.assertEqual(stats['alerts']['notifikasi_belum_dibaca'], 0)
+
+
+class CursorPaginationTest(TestCase):
+    """Keyset pagination (created_at, id) untuk /api/logs/ dan /api/notifikasi/"""
+
+    def ambil_semua(self, url, limit, **filters):
+        ids, cursor, halaman = [], None, 0
+        while True:
+            params = dict(filters, limit=limit)
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            self.assertLessEqual(data['count'], limit)
+            ids.extend(item['id'] for item in data['data'])
+            halaman += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                return ids, halaman
+
+    def test_log_aktivitas_semua_halaman(self):
+        LogAktivitas.objects.bulk_create([
+            LogAktivitas(aksi='update', model_name='Mobil', object_id=i) for i in range(23)
+        ])
+        # created_at kembar: urutan ditentukan id
+        waktu = timezone.now()
+        LogAktivitas.objects.filter(object_id__lt=10).update(created_at=waktu)
+        LogAktivitas.objects.filter(object_id__gte=10).update(created_at=waktu - timedelta(hours=1))
+
+        ids, halaman = self.ambil_semua('/api/logs/', 5)
+        self.assertEqual(halaman, 5)
+        self.assertEqual(ids, list(
+            LogAktivitas.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        ))
+
+    def test_notifikasi_dengan_filter(self):
+        for i in range(7):
+            NotifikasiService.buat_notifikasi(f'Notif {i}', 'Pesan', kirim_email=False)
+        Notifikasi.objects.filter(judul__in=['Notif 0', 'Notif 3']).update(dibaca=True)
+
+        ids, _ = self.ambil_semua('/api/notifikasi/', 2, status='belum_dibaca')
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_cursor_tidak_valid(self):
+        response = self.client.get('/api/logs/', {'cursor': 'bukan-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_limit_kurang_dari_satu(self):
+        LogAktivitas.objects.create(aksi='update', model_name='Mobil', object_id=1)
+        NotifikasiService.buat_notifikasi('Notif', 'Pesan', kirim_email=False)
+        for url in ('/api/logs/', '/api/notifikasi/'):
+            for limit in (0, -1):
+                response = self.client.get(url, {'limit': limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+
+
+class StreamingResponseTest(TestCase):
+    """Mode ?stream=json|ndjson pada endpoint list"""
+
+    def setUp(self):
+        LogAktivitas.objects.bulk_create([
+            LogAktivitas(aksi='create' if i % 2 else 'delete', model_name='Mobil', object_id=i)
+            for i in range(250)
+        ])
+
+    def baca(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_stream_json(self):
+        response = self.client.get('/api/logs/', {'stream': 'json', 'aksi': 'create'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(self.baca(response))
+        self.assertTrue(data['success'])
+        # Tidak dibatasi MAX_LIST_LIMIT / default limit
+        self.assertEqual(data['count'], 125)
+        self.assertEqual(len(data['data']), 125)
+        self.assertEqual(set(data['data'][0]), {
+            'id', 'user', 'aksi', 'model_name', 'object_repr', 'perubahan', 'ip_address', 'created_at'
+        })
+
+    def test_stream_ndjson_dengan_limit(self):
+        response = self.client.get('/api/logs/', {'stream': 'ndjson', 'limit': 30})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.baca(response).splitlines()]
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(
+            [r['id'] for r in rows],
+            list(LogAktivitas.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:30])
+        )
+
+    def test_stream_notifikasi_dan_format_salah(self):
+        NotifikasiService.buat_notifikasi('Test', 'Pesan', kirim_email=False)
+        data = json.loads(self.baca(self.client.get('/api/notifikasi/', {'stream': 'json'})))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['data'][0]['judul'], 'Test')
+
+        response = self.client.get('/api/logs/', {'stream': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FieldTrackerTest(TestCase):
+    """Diff log aktivitas dari snapshot from_db, tanpa SELECT ulang saat save"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mobil_id = buat_mobil().id
+
+    def select_mobil(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "mobil"' in q['sql']]
+
+    def simpan(self, mobil):
+        # Log aktivitas ditulis audit_writer saat transaksi commit
+        with self.captureOnCommitCallbacks(execute=True):
+            mobil.save()
+
+    def log_terakhir(self):
+        return LogAktivitas.objects.filter(model_name='Mobil', aksi='update').order_by('-id').first()
+
+    def test_save_tanpa_select_ulang(self):
+        mobil = Mobil.objects.get(id=self.mobil_id)
+        mobil.status = 'disewa'
+        mobil.harga_sewa_per_hari = Decimal('400000')
+        with CaptureQueriesContext(connections['default']) as ctx:
+            self.simpan(mobil)
+        self.assertEqual(self.select_mobil(ctx.captured_queries), [])
+        perubahan = self.log_terakhir().perubahan
+        self.assertIn("status: 'tersedia' → 'disewa'", perubahan)
+        self.assertIn("harga_sewa_per_hari: '350000.00' → '400000'", perubahan)
+
+        # Snapshot diperbarui setelah save: perubahan berikutnya hanya field baru
+        mobil.status = 'perbaikan'
+        self.simpan(mobil)
+        self.assertEqual(self.log_terakhir().perubahan, "• status: 'disewa' → 'perbaikan'")
+
+    def test_field_defer(self):
+        # Field yang di-defer tidak masuk snapshot; diff hanya field yang dimuat
+        mobil = Mobil.objects.only('id', 'status').get(id=self.mobil_id)
+        mobil.status = 'disewa'
+        self.simpan(mobil)
+        self.assertEqual(self.log_terakhir().perubahan, "• status: 'tersedia' → 'disewa'")
+
+    def test_objek_tanpa_snapshot_fallback_ke_database(self):
+        data = Mobil.objects.values().get(id=self.mobil_id)
+        data['status'] = 'disewa'
+        mobil = Mobil(**data)
+        self.assertFalse(mobil.has_snapshot)
+        self.simpan(mobil)
+        self.assertEqual(self.log_terakhir().perubahan, "• status: 'tersedia' → 'disewa'")
+
+
+class ChangeStoreTest(TestCase):
+    """Store data pre_save: per thread/konteks, LRU, dibersihkan middleware"""
+
+    def test_lru_eviction(self):
+        store = ChangeStore('test_lru', max_size=2)
+        for key in ('a', 'b', 'c'):
+            store.simpan(key, {'key': key})
+        self.assertIsNone(store.ambil('a'))
+        self.assertEqual(store.ambil('c'), {'key': 'c'})
+        metrics = store.get_metrics()
+        self.assertEqual(metrics['evictions'], 1)
+        self.assertEqual(metrics['size'], 1)
+        self.assertEqual(metrics['peak_size'], 2)
+
+    def test_terisolasi_per_thread(self):
+        store = ChangeStore('test_thread')
+        store.simpan('Mobil_1', {'status': 'tersedia'})
+        hasil = {}
+
+        def worker():
+            hasil['lihat'] = store.ambil('Mobil_1')
+            store.simpan('Mobil_1', {'status': 'disewa'})
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(hasil['lihat'])
+        self.assertEqual(store.ambil('Mobil_1'), {'status': 'tersedia'})
+
+    def test_middleware_membersihkan_store(self):
+        def view_gagal(request):
+            change_store.simpan('Mobil_99', {'status': 'tersedia'})
+            raise RuntimeError("save gagal setelah pre_save")
+
+        change_store.reset_metrics()
+        middleware = CurrentUserMiddleware(view_gagal)
+        with self.assertRaises(RuntimeError):
+            middleware(RequestFactory().get('/'))
+        self.assertEqual(change_store.size(), 0)
+        self.assertEqual(change_store.get_metrics()['dibuang'], 1)
+
+
+class AuditLogWriterTest(TestCase):
+    """Log aktivitas dari signal ditulis dengan bulk_create saat commit"""
+
+    def setUp(self):
+        Mobil.objects.bulk_create([
+            Mobil(merk='Toyota', model='Avanza', tahun=2022,
+                  plat_nomor=f"B {i + 1} AUD", harga_sewa_per_hari=Decimal('350000'))
+            for i in range(200)
+        ])
+
+    def insert_log(self, queries):
+        return [q for q in queries if q['sql'].startswith('INSERT INTO "log_aktivitas"')]
+
+    def test_edit_massal_satu_insert(self):
+        with CaptureQueriesContext(connections['default']) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for mobil in Mobil.objects.all():
+                        mobil.status = 'perbaikan'
+                        mobil.save()
+        # Satu bulk_create (sqlite memecah per ~100 baris karena batas parameter)
+        self.assertLessEqual(len(self.insert_log(ctx.captured_queries)), 2)
+        self.assertEqual(LogAktivitas.objects.filter(model_name='Mobil', aksi='update').count(), 200)
+
+    def test_rollback_savepoint_membuang_log(self):
+        mobil_a, mobil_b = Mobil.objects.all()[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                mobil_a.status = 'disewa'
+                mobil_a.save()
+                try:
+                    with transaction.atomic():
+                        mobil_b.status = 'disewa'
+                        mobil_b.save()
+                        raise ValueError("batal")
+                except ValueError:
+                    pass
+        logs = LogAktivitas.objects.filter(model_name='Mobil', aksi='update')
+        self.assertEqual(list(logs.values_list('object_id', flat=True)), [mobil_a.id])
+
+    def test_buffer_savepoint_rollback_tidak_menumpuk(self):
+        writer = AuditLogWriter()
+        token = writer.mulai_request()
+        with transaction.atomic():
+            for i in range(20):
+                try:
+                    with transaction.atomic():
+                        writer.tulis(aksi='update', model_name='Mobil', object_id=i)
+                        raise ValueError("batal")
+                except ValueError:
+                    pass
+            # Hanya buffer savepoint terakhir yang tersisa
+            self.assertEqual(len(writer._tx_buffers.get()), 1)
+        writer.selesai_request(token)
+        self.assertIsNone(writer._tx_buffers.get())
+        self.assertFalse(LogAktivitas.objects.filter(model_name='Mobil', aksi='update').exists())
+
+
+class AuditLogWriterAsyncTest(TransactionTestCase):
+    """Mode RENTAL_AUDIT_LOG_ASYNC: thread background + antrian terbatas"""
+
+    @override_settings(RENTAL_AUDIT_LOG_ASYNC=True, RENTAL_AUDIT_LOG_QUEUE_SIZE=2)
+    def test_thread_background(self):
+        writer = AuditLogWriter()
+        try:
+            for i in range(10):
+                writer.tulis(aksi='update', model_name='Mobil', object_id=i)
+            writer.tunggu()
+        finally:
+            writer.stop()
+        self.assertEqual(LogAktivitas.objects.filter(model_name='Mobil').count(), 10)
+        self.assertEqual(writer.metrics['entri'], 10)
+
+    def test_buffer_request(self):
+        writer = AuditLogWriter()
+        token = writer.mulai_request()
+        for i in range(5):
+            writer.tulis(aksi='view', model_name='Mobil', object_id=i)
+        self.assertEqual(LogAktivitas.objects.count(), 0)
+        writer.selesai_request(token)
+        self.assertEqual(LogAktivitas.objects.filter(aksi='view').count(), 5)
+        self.assertEqual(writer.metrics['flush'], 1)
+
+
+@override_settings(RENTAL_VERSION_STORAGE='delta', RENTAL_VERSION_KEYFRAME_INTERVAL=5)
+class DataVersionDeltaTest(TestCase):
+    """Penyimpanan DataVersion: keyframe tiap 5 versi, delta di antaranya"""
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+
+    def buat_versi(self, jumlah):
+        for i in range(1, jumlah + 1):
+            self.mobil.harga_sewa_per_hari = Decimal(100000 * i)
+            VersionControlService.commit(self.mobil, f'v{i}', action='update')
+
+    def versi(self, nomor):
+        return DataVersion.objects.get(model_name='Mobil', object_id=self.mobil.id, version=nomor)
+
+    def test_keyframe_dan_delta(self):
+        self.buat_versi(12)
+        keyframes = DataVersion.objects.filter(is_keyframe=True).order_by('version')
+        self.assertEqual(list(keyframes.values_list('version', flat=True)), [1, 6, 11])
+        self.assertEqual(self.versi(9).data_snapshot, {'harga_sewa_per_hari': 900000.0})
+
+        v9 = self.versi(9)
+        with CaptureQueriesContext(connections['default']) as ctx:
+            data = v9.get_data()
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(data['harga_sewa_per_hari'], 900000.0)
+        self.assertEqual(data['plat_nomor'], 'B 1234 ABC')
+
+    def test_rollback_dari_delta(self):
+        self.buat_versi(8)
+        hasil = VersionControlService.rollback('Mobil', self.mobil.id, version=3, user='test')
+        self.assertIsNotNone(hasil)
+        self.mobil.refresh_from_db()
+        self.assertEqual(self.mobil.harga_sewa_per_hari, Decimal('300000'))
+        self.assertEqual(VersionControlService.get_current_version('Mobil', self.mobil.id).version, 9)
+
+    def test_cleanup_menjaga_keyframe(self):
+        self.buat_versi(9)
+        VersionControlService.cleanup_old_versions(keep_last=2)
+        self.assertEqual(DataVersion.objects.count(), 2)
+        self.assertTrue(self.versi(8).is_keyframe)
+        self.assertEqual(self.versi(9).get_data()['harga_sewa_per_hari'], 900000.0)
+
+    def test_konversi_dari_snapshot_penuh(self):
+        with override_settings(RENTAL_VERSION_STORAGE='full'):
+            self.buat_versi(7)
+        self.assertEqual(DataVersion.objects.filter(is_keyframe=False).count(), 0)
+        sebelum = {v.version: v.get_data() for v in DataVersion.objects.all()}
+
+        out = StringIO()
+        call_command('konversi_data_version', '--dry-run', stdout=out)
+        self.assertIn('Versi diubah: 5', out.getvalue())
+        self.assertEqual(DataVersion.objects.filter(is_keyframe=False).count(), 0)
+
+        hasil = VersionControlService.konversi_penyimpanan()
+        self.assertLess(hasil['bytes_sesudah'], hasil['bytes_sebelum'])
+        self.assertEqual(
+            list(DataVersion.objects.filter(is_keyframe=True).order_by('version').values_list('version', flat=True)),
+            [1, 6]
+        )
+        sesudah = {v.version: v.get_data() for v in DataVersion.objects.all()}
+        self.assertEqual(sebelum, sesudah)
+
+
+class VersionCommitTest(TestCase):
+    """Commit DataVersion: jumlah query tetap dan retry saat nomor versi bentrok"""
+
+    def setUp(self):
+        self.mobil = buat_mobil()
+
+    def commit(self, harga):
+        self.mobil.harga_sewa_per_hari = Decimal(harga)
+        return VersionControlService.commit(self.mobil, f'harga {harga}', action='update')
+
+    def query_commit(self, harga):
+        with CaptureQueriesContext(connections['default']) as ctx:
+            version = self.commit(harga)
+        return version, [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+
+    @override_settings(RENTAL_VERSION_STORAGE='full')
+    def test_query_commit(self):
+        self.commit(100000)
+        version, queries = self.query_commit(200000)
+        # Upsert head (nomor versi), UPDATE is_current (parent), INSERT; tanpa FOR UPDATE
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(any('FOR UPDATE' in sql for sql in queries))
+        self.assertEqual(version.version, 2)
+        self.assertEqual(version.parent_version.version, 1)
+        self.assertEqual(
+            list(DataVersion.objects.filter(is_current=True).values_list('version', flat=True)), [2]
+        )
+
+    @override_settings(RENTAL_VERSION_STORAGE='delta')
+    def test_query_commit_delta(self):
+        self.commit(100000)
+        version, queries = self.query_commit(200000)
+        # Ditambah satu SELECT basis delta, juga tanpa FOR UPDATE
+        self.assertEqual(len(queries), 4)
+        self.assertFalse(any('FOR UPDATE' in sql for sql in queries))
+        self.assertFalse(version.is_keyframe)
+
+    def test_head_diselaraskan_dengan_versi_lama(self):
+        # Versi dari sebelum ada head / create_branch: nomor lanjut dari MAX(version)
+        VersionControlService.commit(self.mobil, 'v1')
+        DataVersionHead.objects.all().delete()
+        version = self.commit(200000)
+        self.assertEqual(version.version, 2)
+        self.assertEqual(DataVersionHead.objects.get().last_version, 2)
+
+    def test_retry_nomor_versi_bentrok(self):
+        v1 = self.commit(100000)
+        # Versi ditulis tanpa lewat head -> percobaan pertama (version=2) bentrok
+        DataVersion.objects.create(
+            model_name='Mobil', object_id=self.mobil.id, version=2,
+            data_snapshot=v1.data_snapshot, parent_version=v1, is_current=False
+        )
+        version = self.commit(200000)
+        self.assertEqual(version.version, 3)
+        self.assertEqual(DataVersionHead.objects.get().last_version, 3)
+
+    def test_gagal_setelah_batas_retry(self):
+        v1 = self.commit(100000)
+        DataVersion.objects.create(
+            model_name='Mobil', object_id=self.mobil.id, version=2,
+            data_snapshot=v1.data_snapshot, parent_version=v1, is_current=False
+        )
+        with mock.patch.object(VersionControlService, '_sinkron_head'):
+            with self.assertRaises(IntegrityError):
+                self.commit(200000)
+        self.assertEqual(DataVersion.objects.count(), 2)
+
+    def test_deadlock_hanya_diulang_di_transaksi_terluar(self):
+        deadlock = OperationalError(VersionControlService.MYSQL_DEADLOCK, 'Deadlock found')
+        self.assertTrue(VersionControlService._bisa_diulang(deadlock, terluar=True))
+        self.assertFalse(VersionControlService._bisa_diulang(deadlock, terluar=False))
+        self.assertFalse(VersionControlService._bisa_diulang(OperationalError(2006, 'gone away'), terluar=True))
+
+        # TestCase sudah di dalam transaksi: deadlock diteruskan tanpa retry
+        with mock.patch.object(VersionControlService, '_tulis_versi', side_effect=deadlock) as tulis:
+            with self.assertRaises(OperationalError):
+                self.commit(100000)
+        self.assertEqual(tulis.call_count, 1)
+
+
+class VersionCommitConcurrencyTest(TransactionTestCase):
+    """Stress test commit paralel untuk objek yang sama"""
+
+    THREADS = 8
+    PER_THREAD = 10
+
+    def test_commit_paralel_versi_unik(self):
+        # Mulai tanpa versi: commit pertama juga paralel (belum ada DataVersion untuk dikunci)
+        mobil = buat_mobil()
+        self.assertFalse(DataVersion.objects.filter(object_id=mobil.pk).exists())
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.PER_THREAD):
+                    VersionControlService.commit(Mobil.objects.get(pk=mobil.pk), 'paralel', action='update')
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.PER_THREAD
+        versions = list(DataVersion.objects.filter(object_id=mobil.pk).values_list('version', flat=True))
+        self.assertEqual(sorted(versions), list(range(1, total + 1)))
+        self.assertEqual(DataVersion.objects.filter(object_id=mobil.pk, is_current=True).count(), 1)
+
+
+@override_settings(RENTAL_VERSION_STORAGE='delta', RENTAL_VERSION_KEYFRAME_INTERVAL=5)
+class VersionRetentionTest(TestCase):
+    """Retensi DataVersion dengan window function, per chunk"""
+
+    def buat_objek(self, jumlah_objek, jumlah_versi, mulai=0):
+        mobil_list = []
+        for n in range(mulai, mulai + jumlah_objek):
+            mobil = buat_mobil(f'B {n:04d} RET')
+            for i in range(1, jumlah_versi + 1):
+                mobil.harga_sewa_per_hari = Decimal(100000 * i)
+                VersionControlService.commit(mobil, f'v{i}', action='update')
+            mobil_list.append(mobil)
+        return mobil_list
+
+    def versi(self, mobil):
+        return list(
+            DataVersion.objects.filter(object_id=mobil.id).order_by('version').values_list('version', flat=True)
+        )
+
+    def test_keep_last_dan_keyframe(self):
+        mobil_list = self.buat_objek(3, 9)
+        progress = []
+        hasil = VersionRetention(keep_last=2, chunk_size=4, progress=lambda d, t: progress.append((d, t))).jalankan()
+
+        self.assertEqual(hasil['dihapus'], 21)
+        self.assertEqual(hasil['keyframe'], 3)
+        self.assertEqual(progress[-1], (21, 21))
+        self.assertEqual(len(progress), 6)
+        for mobil in mobil_list:
+            self.assertEqual(self.versi(mobil), [8, 9])
+            v9 = DataVersion.objects.get(object_id=mobil.id, version=9)
+            self.assertEqual(v9.get_data()['harga_sewa_per_hari'], 900000.0)
+            self.assertEqual(v9.get_data()['plat_nomor'], mobil.plat_nomor)
+
+    def test_query_tidak_bergantung_jumlah_objek(self):
+        def hitung_query():
+            with CaptureQueriesContext(connections['default']) as ctx:
+                VersionRetention(keep_last=3).jalankan()
+            return len(ctx.captured_queries)
+
+        self.buat_objek(2, 6)
+        sedikit = hitung_query()
+        self.buat_objek(10, 6, mulai=2)
+        self.assertEqual(hitung_query(), sedikit)
+
+    def test_umur_maksimal_dan_dry_run(self):
+        lama, baru = self.buat_objek(2, 4)
+        DataVersion.objects.filter(object_id=lama.id).update(created_at=timezone.now() - timedelta(days=40))
+        DataVersion.objects.filter(object_id=baru.id, version__lte=2).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+
+        self.assertEqual(VersionControlService.cleanup_old_versions(keep_last=None, max_age_days=30, dry_run=True), 5)
+        self.assertEqual(DataVersion.objects.count(), 8)
+
+        out = StringIO()
+        call_command('bersihkan_data_version', '--max-age-days', '30', stdout=out)
+        self.assertIn('Dihapus: 5 versi', out.getvalue())
+        # Versi terakhir selalu disimpan walau sudah melewati umur maksimal
+        self.assertEqual(self.versi(lama), [4])
+        self.assertEqual(self.versi(baru), [3, 4])
+        self.assertTrue(DataVersion.objects.get(object_id=lama.id, version=4).is_keyframe)
+
+
+@override_settings(RENTAL_VERSION_STORAGE='delta', RENTAL_VERSION_KEYFRAME_INTERVAL=5)
+class VersionBulkTest(TestCase):
+    """commit_many / rollback_many: query per batch, bukan per objek"""
+
+    def buat_armada(self, jumlah, mulai=0):
+        return Mobil.objects.bulk_create([
+            Mobil(merk='Toyota', model='Avanza', tahun=2022, plat_nomor=f'B {n:04d} BLK',
+                  harga_sewa_per_hari=Decimal('350000'))
+            for n in range(mulai, mulai + jumlah)
+        ])
+
+    def hitung_query(self, func):
+        with CaptureQueriesContext(connections['default']) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def test_commit_many_query_konstan(self):
+        self.buat_armada(5)
+        VersionControlService.commit_many(Mobil.objects.all())
+        sedikit = self.hitung_query(lambda: VersionControlService.commit_many(Mobil.objects.all()))
+        self.buat_armada(40, mulai=5)
+        VersionControlService.commit_many(Mobil.objects.all())
+        banyak = self.hitung_query(lambda: VersionControlService.commit_many(Mobil.objects.all()))
+        self.assertEqual(sedikit, banyak)
+
+        self.assertEqual(DataVersion.objects.filter(version=2).count(), 45)
+        self.assertEqual(DataVersion.objects.filter(is_current=True).count(), 45)
+        v2 = DataVersion.objects.get(version=2, object_id=Mobil.objects.order_by('id').first().id)
+        self.assertFalse(v2.is_keyframe)
+        self.assertEqual(v2.data_snapshot, {})
+        self.assertEqual(v2.parent_version.version, 1)
+
+    def test_rollback_many(self):
+        armada = self.buat_armada(20)
+        VersionControlService.commit_many(Mobil.objects.all(), 'harga lama')
+        Mobil.objects.update(harga_sewa_per_hari=Decimal('500000'), status='perbaikan')
+        VersionControlService.commit_many(Mobil.objects.all(), 'harga baru', action='update')
+        dihapus = armada[0].id
+        Mobil.objects.filter(id=dihapus).delete()
+
+        ids = [m.id for m in armada]
+        with CaptureQueriesContext(connections['default']) as ctx:
+            jumlah = VersionControlService.rollback_many(
+                VersionControlService.versi_sebelumnya('Mobil', ids), user='admin', batch_size=10
+            )
+        self.assertEqual(jumlah, 20)
+        # 2 batch, masing-masing sejumlah query tetap
+        self.assertLess(len(ctx.captured_queries), 40)
+
+        self.assertEqual(Mobil.objects.count(), 20)
+        self.assertEqual(set(Mobil.objects.values_list('harga_sewa_per_hari', flat=True)), {Decimal('350000')})
+        self.assertEqual(set(Mobil.objects.values_list('status', flat=True)), {'tersedia'})
+        current = DataVersion.objects.filter(is_current=True)
+        self.assertEqual(set(current.values_list('version', 'action')), {(3, 'rollback')})
+        self.assertEqual(current.get(object_id=dihapus).get_data()['harga_sewa_per_hari'], 350000.0)
+        self.assertEqual(LogAktivitas.objects.filter(user='admin').count(), 20)
+
+    def test_satu_versi_per_objek(self):
+        mobil = self.buat_armada(1)[0]
+        VersionControlService.commit_many([mobil])
+        VersionControlService.commit_many([mobil])
+        with self.assertRaises(ValueError):
+            VersionControlService.rollback_many(DataVersion.objects.filter(object_id=mobil.id))
+        self.assertEqual(DataVersion.objects.filter(action='rollback').count(), 0)
+
+
+@override_settings(RENTAL_VERSION_STORAGE='delta', RENTAL_VERSION_KEYFRAME_INTERVAL=3)
+class PointInTimeTest(TestCase):
+    """Rekonstruksi as-of seluruh data dari riwayat DataVersion"""
+
+    def setUp(self):
+        self.awal = timezone.now() - timedelta(days=10)
+        self.mobil_a = buat_mobil('B 1 ASOF')
+        self.mobil_b = buat_mobil('B 2 ASOF')
+        self.pelanggan = buat_pelanggan()
+        for hari, harga in enumerate([100000, 200000, 300000, 400000]):
+            for mobil in (self.mobil_a, self.mobil_b):
+                mobil.harga_sewa_per_hari = Decimal(harga)
+                self.commit(mobil, hari)
+        self.commit(self.pelanggan, 0)
+        VersionControlService.commit_delete(self.mobil_b)
+        self.set_waktu(DataVersion.objects.filter(action='delete'), 5)
+
+    def set_waktu(self, queryset, hari):
+        queryset.update(created_at=self.awal + timedelta(days=hari))
+
+    def commit(self, instance, hari):
+        version = VersionControlService.commit(instance, action='update')
+        self.set_waktu(DataVersion.objects.filter(pk=version.pk), hari)
+
+    def keadaan(self, hari, model_name='Mobil'):
+        service = PointInTimeService(self.awal + timedelta(days=hari, hours=1), chunk_size=2)
+        return {o['id']: o for o in service.iter_objek(model_name)}
+
+    def test_keadaan_pada_waktu_tertentu(self):
+        hari_1 = self.keadaan(1)
+        self.assertEqual(hari_1[self.mobil_a.id]['data']['harga_sewa_per_hari'], 200000.0)
+        self.assertEqual(hari_1[self.mobil_b.id]['version'], 2)
+
+        hari_4 = self.keadaan(4)
+        self.assertEqual(hari_4[self.mobil_a.id]['data']['harga_sewa_per_hari'], 400000.0)
+        self.assertEqual(hari_4[self.mobil_a.id]['data']['plat_nomor'], 'B 1 ASOF')
+
+        # Mobil B dihapus pada hari ke-5
+        self.assertEqual(list(self.keadaan(6)), [self.mobil_a.id])
+        self.assertEqual(self.keadaan(-1), {})
+
+    def test_query_per_halaman_keyset(self):
+        with CaptureQueriesContext(connections['default']) as ctx:
+            list(PointInTimeService(timezone.now(), chunk_size=2).iter_semua())
+        # Mobil: 9 versi -> 5 halaman; Pelanggan, Penyewaan, Pembayaran: 1 halaman
+        self.assertEqual(len(ctx.captured_queries), 8)
+        self.assertTrue(all('LIMIT 2' in q['sql'] for q in ctx.captured_queries))
+
+    def test_command_ndjson(self):
+        out = StringIO()
+        waktu = (self.awal + timedelta(days=2, hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        call_command('data_as_of', waktu, '--output', '-', stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r['model'], r['id']) for r in rows], [
+            ('Mobil', self.mobil_a.id), ('Mobil', self.mobil_b.id), ('Pelanggan', self.pelanggan.id)
+        ])
+        self.assertEqual(rows[0]['data']['harga_sewa_per_hari'], 300000.0)
+
+    def test_materialize_tidak_boleh_ke_default(self):
+        with self.assertRaises(ValueError):
+            PointInTimeService(timezone.now()).materialize('default')
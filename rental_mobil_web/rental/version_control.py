@@ -6,6 +6,10 @@ Service untuk version control data dengan fitur:
 - Commit: Menyimpan snapshot data sebelum perubahan
 - Rollback: Mengembalikan data ke versi sebelumnya
 - History: Melihat riwayat perubahan
+- Penyimpanan delta: keyframe lengkap tiap KEYFRAME_INTERVAL versi,
+  di antaranya hanya field yang berubah
+- Commit atomik: versi terakhir dikunci (SELECT ... FOR UPDATE) sehingga
+  commit paralel tidak memakai nomor versi yang sama
 ============================================
 """
 
@@ -14,7 +18,11 @@ import logging
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Optional, Any, Type
-from django.db import models, transaction
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, models, transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
 from django.core.serializers.json import DjangoJSONEncoder
 
 logger = logging.getLogger('rental.version_control')
@@ -61,12 +69,23 @@ class VersionControlService:
         }
         return models_map.get(model_name)
     
+    # Percobaan ulang commit jika nomor versi bentrok di unique_together
+    # atau (hanya di transaksi terluar) deadlock MySQL
+    COMMIT_RETRY = 3
+    
+    # Kode error MySQL ER_LOCK_DEADLOCK
+    MYSQL_DEADLOCK = 1213
+    
+    # Jumlah objek per batch untuk commit_many / rollback_many
+    BATCH_SIZE = 500
+    
     @staticmethod
     def _serialize_instance(instance: models.Model) -> Dict:
         """Serialize instance ke dictionary"""
         data = {}
         for field in instance._meta.fields:
-            value = getattr(instance, field.name)
+            # attname: FK langsung berupa id, tanpa query objek relasi
+            value = getattr(instance, field.attname)
             
             # Handle special types
             if isinstance(value, datetime):
@@ -80,19 +99,167 @@ class VersionControlService:
             else:
                 data[field.name] = value
         
+        # Samakan dengan nilai yang tersimpan di JSON (date -> str, dst.)
+        return json.loads(json.dumps(data, cls=CustomJSONEncoder))
+    
+    # ==========================================
+    # PENYIMPANAN DELTA
+    # ==========================================
+    
+    @staticmethod
+    def storage_mode() -> str:
+        """'delta' (keyframe + delta) atau 'full' (snapshot lengkap tiap versi)"""
+        return getattr(settings, 'RENTAL_VERSION_STORAGE', 'delta')
+    
+    @staticmethod
+    def keyframe_interval() -> int:
+        """Maksimal jumlah versi per rantai keyframe + delta"""
+        return max(1, getattr(settings, 'RENTAL_VERSION_KEYFRAME_INTERVAL', 10))
+    
+    @staticmethod
+    def hitung_delta(old_data: Dict, new_data: Dict) -> Dict:
+        """Field yang nilainya berbeda dari old_data"""
+        return {
+            key: value for key, value in new_data.items()
+            if key not in old_data or old_data[key] != value
+        }
+    
+    @staticmethod
+    def _rantai_versi(version) -> List:
+        """
+        Versi dari keyframe terakhir s/d version (urut naik). Dua query,
+        panjang rantai dibatasi interval keyframe saat versi ditulis.
+        """
+        from rental.models import DataVersion
+        
+        if version.is_keyframe:
+            return [version]
+        
+        versi_sama = DataVersion.objects.filter(
+            model_name=version.model_name,
+            object_id=version.object_id,
+            branch=version.branch,
+        )
+        keyframe = versi_sama.filter(
+            is_keyframe=True, version__lt=version.version
+        ).order_by('-version').values_list('version', flat=True).first()
+        if keyframe is None:
+            raise ValueError(f"Keyframe tidak ditemukan untuk {version}")
+        
+        return list(versi_sama.filter(
+            version__gte=keyframe, version__lte=version.version
+        ).order_by('version'))
+    
+    @staticmethod
+    def _gabung_rantai(rantai: List) -> Dict:
+        data = {}
+        for v in rantai:
+            if v.is_keyframe:
+                data = dict(v.data_snapshot)
+            else:
+                data.update(v.data_snapshot)
         return data
     
     @staticmethod
-    def _get_next_version(model_name: str, object_id: int, branch: str = 'main') -> int:
-        """Dapatkan nomor versi berikutnya"""
+    def rekonstruksi_data(version) -> Dict:
+        """Data lengkap sebuah versi (keyframe + delta berikutnya)"""
+        return VersionControlService._gabung_rantai(VersionControlService._rantai_versi(version))
+    
+    @staticmethod
+    def _jadikan_keyframe(version):
+        """Simpan data lengkap di versi delta (sebelum versi lama dihapus)"""
+        version.data_snapshot = VersionControlService.rekonstruksi_data(version)
+        version.is_keyframe = True
+        version.save(update_fields=['data_snapshot', 'is_keyframe'])
+    
+    @staticmethod
+    def _encode_snapshot(terbaru: List, data: Dict):
+        """
+        Tentukan bentuk penyimpanan versi baru.
+        
+        Args:
+            terbaru: Versi terakhir objek+branch, urut turun (lihat _versi_terbaru)
+            data: Data lengkap versi baru
+        
+        Returns:
+            (is_keyframe, data yang disimpan)
+        """
+        if not terbaru or VersionControlService.storage_mode() != 'delta':
+            return True, data
+        
+        rantai = []
+        for v in terbaru:
+            rantai.append(v)
+            if v.is_keyframe:
+                break
+        else:
+            # Keyframe di luar jendela interval: rantai sudah terlalu panjang
+            return True, data
+        
+        if len(rantai) >= VersionControlService.keyframe_interval():
+            return True, data
+        
+        base = VersionControlService._gabung_rantai(list(reversed(rantai)))
+        return False, VersionControlService.hitung_delta(base, data)
+    
+    @staticmethod
+    def konversi_penyimpanan(
+        mode: str = None,
+        interval: int = None,
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Tulis ulang data_version ke mode penyimpanan tertentu ('delta' / 'full').
+        Diproses per objek+branch dalam satu transaksi (bulk_update).
+        
+        Returns:
+            Dict jumlah 'objek', 'versi_diubah', 'bytes_sebelum', 'bytes_sesudah'
+        """
         from rental.models import DataVersion
-        last_version = DataVersion.objects.filter(
-            model_name=model_name,
-            object_id=object_id,
-            branch=branch
-        ).order_by('-version').first()
         
-        return (last_version.version + 1) if last_version else 1
+        mode = mode or VersionControlService.storage_mode()
+        interval = interval or VersionControlService.keyframe_interval()
+        if mode not in ('delta', 'full'):
+            raise ValueError("Mode harus 'delta' atau 'full'")
+        
+        hasil = {'objek': 0, 'versi_diubah': 0, 'bytes_sebelum': 0, 'bytes_sesudah': 0}
+        # order_by() kosong: ordering Meta (created_at) tidak ikut DISTINCT
+        groups = DataVersion.objects.values('model_name', 'object_id', 'branch').order_by().distinct()
+        
+        for group in groups.iterator():
+            with transaction.atomic():
+                versions = list(
+                    DataVersion.objects.filter(**group)
+                    .only('id', 'version', 'data_snapshot', 'is_keyframe')
+                    .order_by('version')
+                )
+                data = {}
+                diubah = []
+                for i, v in enumerate(versions):
+                    hasil['bytes_sebelum'] += len(json.dumps(v.data_snapshot))
+                    previous = data
+                    data = dict(v.data_snapshot) if v.is_keyframe else {**data, **v.data_snapshot}
+                    
+                    is_keyframe = mode == 'full' or i % interval == 0
+                    stored = data if is_keyframe else VersionControlService.hitung_delta(previous, data)
+                    hasil['bytes_sesudah'] += len(json.dumps(stored))
+                    
+                    if is_keyframe != v.is_keyframe or stored != v.data_snapshot:
+                        v.is_keyframe = is_keyframe
+                        v.data_snapshot = stored
+                        diubah.append(v)
+                
+                if diubah and not dry_run:
+                    DataVersion.objects.bulk_update(diubah, ['data_snapshot', 'is_keyframe'], batch_size=500)
+            
+            hasil['objek'] += 1
+            hasil['versi_diubah'] += len(diubah)
+        
+        logger.info(
+            f"Konversi data_version ke '{mode}': {hasil['versi_diubah']} versi diubah, "
+            f"{hasil['bytes_sebelum']} -> {hasil['bytes_sesudah']} bytes"
+        )
+        return hasil
     
     # ==========================================
     # COMMIT
@@ -119,46 +286,189 @@ class VersionControlService:
         Returns:
             DataVersion instance
         """
-        from rental.models import DataVersion
-        
         model_name = instance.__class__.__name__
         object_id = instance.pk or 0
         
         # Serialize data saat ini
         data_snapshot = VersionControlService._serialize_instance(instance)
         
-        # Dapatkan versi sebelumnya
-        previous_version = DataVersion.objects.filter(
-            model_name=model_name,
-            object_id=object_id,
-            branch=branch,
-            is_current=True
-        ).first()
+        # Deadlock membatalkan seluruh transaksi di MySQL: hanya bisa diulang
+        # jika transaksi dibuka di sini, bukan savepoint di transaksi pemanggil
+        terluar = not transaction.get_connection().in_atomic_block
+        
+        for percobaan in range(1, VersionControlService.COMMIT_RETRY + 1):
+            try:
+                with transaction.atomic():
+                    version = VersionControlService._tulis_versi(
+                        model_name, object_id, branch, data_snapshot,
+                        action=action, created_by=user, commit_message=message
+                    )
+                break
+            except (IntegrityError, OperationalError) as e:
+                if (percobaan == VersionControlService.COMMIT_RETRY
+                        or not VersionControlService._bisa_diulang(e, terluar)):
+                    raise
+                if isinstance(e, IntegrityError):
+                    VersionControlService._sinkron_head(model_name, branch, [object_id])
+                logger.warning(
+                    f"Commit bentrok: {model_name}#{object_id} [{branch}], percobaan ulang {percobaan}"
+                )
+        
+        logger.info(f"Commit: {model_name}#{object_id} v{version.version} [{branch}] - {message}")
+        return version
+    
+    @staticmethod
+    def _bisa_diulang(error: Exception, terluar: bool) -> bool:
+        """IntegrityError (nomor versi bentrok) atau deadlock di transaksi terluar"""
+        if isinstance(error, IntegrityError):
+            return True
+        return terluar and bool(error.args) and error.args[0] == VersionControlService.MYSQL_DEADLOCK
+    
+    @staticmethod
+    def _naikkan_head(model_name: str, branch: str, object_ids: List[int]) -> Dict[int, int]:
+        """
+        Upsert baris DataVersionHead objek-objek ini (urut object_id) dengan
+        last_version + 1 dan kembalikan {object_id: nomor versi baru}. Baris
+        sudah ada atau belum, upsert mengambil lock eksklusif pada satu key
+        unik sampai transaksi selesai, sehingga commit paralel untuk objek yang
+        sama mengantre di sini, termasuk commit pertama.
+        
+        Head baru (hasil 1) diselaraskan dengan MAX(version) yang sudah ada,
+        untuk data sebelum ada head dan branch dari create_branch.
+        """
+        from rental.models import DataVersion, DataVersionHead
+        
+        object_ids = sorted(set(object_ids))
+        connection = transaction.get_connection()
+        table = connection.ops.quote_name(DataVersionHead._meta.db_table)
+        mysql = connection.vendor == 'mysql'
+        # MySQL: LAST_INSERT_ID(expr) dikembalikan sebagai lastrowid tanpa SELECT
+        satu_mysql = mysql and len(object_ids) == 1
+        sql = (
+            f"INSERT INTO {table} (model_name, object_id, branch, last_version) VALUES "
+            + ', '.join(['(%s, %s, %s, 1)'] * len(object_ids))
+        )
+        if satu_mysql:
+            sql += " ON DUPLICATE KEY UPDATE last_version = LAST_INSERT_ID(last_version + 1)"
+        elif mysql:
+            sql += " ON DUPLICATE KEY UPDATE last_version = last_version + 1"
+        else:
+            # SQLite / PostgreSQL
+            sql += (
+                " ON CONFLICT (model_name, object_id, branch)"
+                f" DO UPDATE SET last_version = {table}.last_version + 1"
+                " RETURNING object_id, last_version"
+            )
         
-        # Set semua versi sebelumnya sebagai bukan current
-        DataVersion.objects.filter(
+        params = []
+        for object_id in object_ids:
+            params.extend([model_name, object_id, branch])
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if satu_mysql:
+                # Affected rows 1 = baris baru (lastrowid berisi id auto-increment), 2 = update
+                versi = {object_ids[0]: 1 if cursor.rowcount == 1 else cursor.lastrowid}
+            elif mysql:
+                versi = dict(DataVersionHead.objects.filter(
+                    model_name=model_name, branch=branch, object_id__in=object_ids
+                ).values_list('object_id', 'last_version'))
+            else:
+                versi = dict(cursor.fetchall())
+        
+        baru = [object_id for object_id, version in versi.items() if version == 1]
+        if baru:
+            for object_id, terakhir in DataVersion.objects.filter(
+                model_name=model_name, branch=branch, object_id__in=baru
+            ).values('object_id').annotate(terakhir=Max('version')).values_list('object_id', 'terakhir'):
+                versi[object_id] = terakhir + 1
+                DataVersionHead.objects.filter(
+                    model_name=model_name, object_id=object_id, branch=branch
+                ).update(last_version=terakhir + 1)
+        return versi
+    
+    @staticmethod
+    def _sinkron_head(model_name: str, branch: str, object_ids: List[int]):
+        """
+        Samakan last_version head dengan MAX(version) di data_version, setelah
+        nomor versi bentrok (versi ditulis tanpa lewat head).
+        """
+        from rental.models import DataVersion, DataVersionHead
+        
+        terakhir = DataVersion.objects.filter(
+            model_name=model_name, branch=branch, object_id=OuterRef('object_id')
+        ).order_by().values('object_id').annotate(terakhir=Max('version')).values('terakhir')
+        DataVersionHead.objects.filter(
+            model_name=model_name, branch=branch, object_id__in=object_ids
+        ).update(last_version=Coalesce(Subquery(terakhir), 0))
+    
+    @staticmethod
+    def _lepas_current(model_name: str, object_id: int, branch: str) -> Optional[int]:
+        """
+        UPDATE is_current = FALSE untuk versi current objek+branch dan
+        kembalikan id-nya (parent versi baru) dari statement yang sama.
+        """
+        from rental.models import DataVersion
+        
+        connection = transaction.get_connection()
+        table = connection.ops.quote_name(DataVersion._meta.db_table)
+        where = "model_name = %s AND object_id = %s AND branch = %s AND is_current = %s"
+        params = [False, model_name, object_id, branch, True]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    f"UPDATE {table} SET is_current = %s, id = LAST_INSERT_ID(id) WHERE {where}", params
+                )
+                return cursor.lastrowid if cursor.rowcount else None
+            # SQLite / PostgreSQL
+            cursor.execute(f"UPDATE {table} SET is_current = %s WHERE {where} RETURNING id", params)
+            ids = [row[0] for row in cursor.fetchall()]
+        return max(ids) if ids else None
+    
+    @staticmethod
+    def _versi_terbaru(model_name: str, object_id: int, branch: str) -> List:
+        """
+        Basis delta: maks. KEYFRAME_INTERVAL versi terakhir (urut turun), tanpa
+        FOR UPDATE karena commit paralel sudah mengantre di head.
+        """
+        from rental.models import DataVersion
+        
+        return list(DataVersion.objects.filter(
             model_name=model_name,
             object_id=object_id,
-            branch=branch,
-            is_current=True
-        ).update(is_current=False)
+            branch=branch
+        ).order_by('-version')[:VersionControlService.keyframe_interval()])
+    
+    @staticmethod
+    def _tulis_versi(model_name: str, object_id: int, branch: str, data: Dict, **fields):
+        """
+        Tulis versi baru (harus di dalam transaksi): upsert head (nomor versi),
+        UPDATE is_current versi lama (parent), INSERT versi baru. Mode delta
+        menambah satu SELECT versi terakhir sebagai basis.
+        """
+        from rental.models import DataVersion
+        
+        version = VersionControlService._naikkan_head(model_name, branch, [object_id])[object_id]
+        
+        terbaru = []
+        if version > 1 and VersionControlService.storage_mode() == 'delta':
+            terbaru = VersionControlService._versi_terbaru(model_name, object_id, branch)
+        is_keyframe, stored_data = VersionControlService._encode_snapshot(terbaru, data)
         
-        # Buat versi baru
-        version = DataVersion.objects.create(
+        parent_id = None
+        if version > 1:
+            parent_id = VersionControlService._lepas_current(model_name, object_id, branch)
+        
+        return DataVersion.objects.create(
             model_name=model_name,
             object_id=object_id,
-            version=VersionControlService._get_next_version(model_name, object_id, branch),
-            data_snapshot=data_snapshot,
-            action=action,
-            created_by=user,
-            commit_message=message,
-            parent_version=previous_version,
+            version=version,
+            data_snapshot=stored_data,
+            is_keyframe=is_keyframe,
+            parent_version_id=parent_id,
             branch=branch,
-            is_current=True
+            is_current=True,
+            **fields
         )
-        
-        logger.info(f"Commit: {model_name}#{object_id} v{version.version} [{branch}] - {message}")
-        return version
     
     @staticmethod
     def commit_create(instance: models.Model, message: str = '', user: str = 'system'):
@@ -190,6 +500,127 @@ class VersionControlService:
             action='delete'
         )
     
+    @staticmethod
+    def commit_many(
+        instances,
+        message: str = '',
+        user: str = 'system',
+        action: str = 'commit',
+        branch: str = 'main',
+        batch_size: int = None
+    ) -> int:
+        """
+        Commit snapshot banyak objek (satu model) dalam satu transaksi.
+        Per batch: kunci versi current, ambil basis delta, UPDATE is_current,
+        lalu bulk_create versi baru.
+        
+        Args:
+            instances: QuerySet atau list instance dari model yang sama
+            message, user, action, branch: Sama seperti commit()
+            batch_size: Jumlah objek per batch (default: BATCH_SIZE)
+        
+        Returns:
+            Jumlah versi yang dibuat
+        """
+        batch_size = batch_size or VersionControlService.BATCH_SIZE
+        if isinstance(instances, models.QuerySet):
+            instances = instances.iterator(chunk_size=batch_size)
+        
+        total = 0
+        with transaction.atomic():
+            for batch in VersionControlService._per_batch(instances, batch_size):
+                model_name = batch[0].__class__.__name__
+                if any(instance.__class__.__name__ != model_name for instance in batch):
+                    raise ValueError("commit_many hanya untuk instance dari satu model")
+                
+                items = [
+                    (instance.pk or 0, VersionControlService._serialize_instance(instance), message)
+                    for instance in batch
+                ]
+                total += VersionControlService._tulis_versi_batch(
+                    model_name, branch, items, action=action, created_by=user
+                )
+        
+        logger.info(f"Commit massal: {total} versi [{branch}] - {message}")
+        return total
+    
+    @staticmethod
+    def _per_batch(iterable, batch_size: int):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def _tulis_versi_batch(model_name: str, branch: str, items: List, **fields) -> int:
+        """
+        Versi-massal dari _tulis_versi (harus di dalam transaksi), dengan retry
+        per batch jika nomor versi bentrok.
+        
+        Args:
+            items: List (object_id, data lengkap, commit_message), object_id unik
+        """
+        object_ids = [object_id for object_id, _, _ in items]
+        if len(set(object_ids)) != len(object_ids):
+            raise ValueError("Objek yang sama muncul lebih dari sekali dalam satu batch")
+        
+        for percobaan in range(1, VersionControlService.COMMIT_RETRY + 1):
+            try:
+                with transaction.atomic():
+                    return VersionControlService._buat_versi_batch(model_name, branch, items, **fields)
+            except IntegrityError:
+                if percobaan == VersionControlService.COMMIT_RETRY:
+                    raise
+                VersionControlService._sinkron_head(model_name, branch, object_ids)
+                logger.warning(f"Commit massal bentrok: {model_name} [{branch}], percobaan ulang {percobaan}")
+    
+    @staticmethod
+    def _buat_versi_batch(model_name: str, branch: str, items: List, **fields) -> int:
+        from rental.models import DataVersion
+        
+        object_ids = [object_id for object_id, _, _ in items]
+        versi_objek = DataVersion.objects.filter(model_name=model_name, branch=branch, object_id__in=object_ids)
+        
+        # Nomor versi dari head (juga mengunci objek agar commit paralel menunggu)
+        nomor = VersionControlService._naikkan_head(model_name, branch, object_ids)
+        
+        # Versi terakhir per objek (maks. KEYFRAME_INTERVAL) untuk parent & basis delta
+        limit = 1
+        if VersionControlService.storage_mode() == 'delta':
+            limit = VersionControlService.keyframe_interval()
+        terbaru = {}
+        for v in versi_objek.order_by().annotate(
+            urutan=Window(RowNumber(), partition_by=[F('object_id')], order_by=F('version').desc())
+        ).filter(urutan__lte=limit).order_by('object_id', '-version'):
+            terbaru.setdefault(v.object_id, []).append(v)
+        
+        if terbaru:
+            versi_objek.filter(is_current=True).update(is_current=False)
+        
+        versions = []
+        for object_id, data, message in items:
+            rows = terbaru.get(object_id, [])
+            is_keyframe, stored_data = VersionControlService._encode_snapshot(rows, data)
+            versions.append(DataVersion(
+                model_name=model_name,
+                object_id=object_id,
+                version=nomor[object_id],
+                data_snapshot=stored_data,
+                is_keyframe=is_keyframe,
+                commit_message=message,
+                parent_version=next((v for v in rows if v.is_current), None),
+                branch=branch,
+                is_current=True,
+                **fields
+            ))
+        
+        DataVersion.objects.bulk_create(versions)
+        return len(versions)
+    
     # ==========================================
     # ROLLBACK
     # ==========================================
@@ -294,6 +725,161 @@ class VersionControlService:
             logger.error(f"Rollback error: {str(e)}")
             return None
     
+    @staticmethod
+    def _rekonstruksi_banyak(versions: List) -> Dict[int, Dict]:
+        """
+        Data lengkap banyak versi (maks. satu versi per objek+branch):
+        satu query keyframe terakhir + satu query rantai untuk semua versi delta.
+        
+        Returns:
+            {version.id: data}
+        """
+        from rental.models import DataVersion
+        
+        hasil = {v.id: v.get_data() for v in versions if v.is_keyframe}
+        delta = [v for v in versions if not v.is_keyframe]
+        if not delta:
+            return hasil
+        
+        def kunci(v):
+            return (v.model_name, v.object_id, v.branch)
+        
+        filter_keyframe = Q()
+        for v in delta:
+            filter_keyframe |= Q(
+                model_name=v.model_name, object_id=v.object_id, branch=v.branch, version__lte=v.version
+            )
+        keyframes = {
+            (row['model_name'], row['object_id'], row['branch']): row['keyframe']
+            for row in DataVersion.objects.filter(filter_keyframe, is_keyframe=True).order_by()
+            .values('model_name', 'object_id', 'branch').annotate(keyframe=Max('version'))
+        }
+        
+        filter_rantai = Q()
+        for v in delta:
+            if kunci(v) not in keyframes:
+                raise ValueError(f"Keyframe tidak ditemukan untuk {v}")
+            filter_rantai |= Q(
+                model_name=v.model_name, object_id=v.object_id, branch=v.branch,
+                version__gte=keyframes[kunci(v)], version__lte=v.version
+            )
+        rantai = {}
+        for row in DataVersion.objects.filter(filter_rantai).order_by('version'):
+            rantai.setdefault(kunci(row), []).append(row)
+        
+        for v in delta:
+            hasil[v.id] = VersionControlService._gabung_rantai(rantai[kunci(v)])
+        return hasil
+    
+    @staticmethod
+    def rollback_many(versions, user: str = 'system', batch_size: int = None) -> int:
+        """
+        Rollback banyak objek sekaligus ke versi target masing-masing, dalam
+        satu transaksi. Per batch: rekonstruksi data (maks. 2 query), in_bulk,
+        bulk_update (objek yang sudah dihapus dibuat ulang dengan bulk_create),
+        lalu commit_many-style bulk_create versi 'rollback'.
+        
+        Signal post_save tidak terpicu: log aktivitas ditulis dengan
+        create_logs_bulk dan cache dashboard di-invalidate eksplisit.
+        
+        Args:
+            versions: QuerySet/list DataVersion target (satu per objek+branch)
+            user: Username yang melakukan rollback
+            batch_size: Jumlah objek per batch (default: BATCH_SIZE)
+        
+        Returns:
+            Jumlah objek yang di-rollback
+        """
+        from rental.dashboard import DashboardStatsService
+        from rental.log_aktivitas_service import LogAktivitasService
+        
+        batch_size = batch_size or VersionControlService.BATCH_SIZE
+        
+        groups, objek = {}, set()
+        for version in versions:
+            key = (version.model_name, version.object_id, version.branch)
+            if key in objek:
+                raise ValueError(f"Pilih satu versi per objek: {version.model_name}#{version.object_id}")
+            objek.add(key)
+            groups.setdefault((version.model_name, version.branch), []).append(version)
+        
+        total = 0
+        with transaction.atomic():
+            for (model_name, branch), targets in groups.items():
+                model_class = VersionControlService._get_model_class(model_name)
+                if not model_class:
+                    raise ValueError(f"Model {model_name} tidak ditemukan")
+                
+                for batch in VersionControlService._per_batch(targets, batch_size):
+                    data_target = VersionControlService._rekonstruksi_banyak(batch)
+                    instances = model_class.objects.in_bulk([v.object_id for v in batch])
+                    
+                    diubah, dibuat_ulang, fields = [], [], set()
+                    for version in batch:
+                        instance = instances.get(version.object_id)
+                        if instance is None:
+                            # Objek sudah dihapus, buat baru dengan ID sama
+                            instance = model_class(pk=version.object_id)
+                            dibuat_ulang.append(instance)
+                        else:
+                            diubah.append(instance)
+                        instances[version.object_id] = instance
+                        fields.update(VersionControlService._terapkan_data(instance, data_target[version.id]))
+                    
+                    if diubah and fields:
+                        model_class.objects.bulk_update(diubah, sorted(fields))
+                    if dibuat_ulang:
+                        model_class.objects.bulk_create(dibuat_ulang)
+                    
+                    items = [
+                        (v.object_id, VersionControlService._serialize_instance(instances[v.object_id]),
+                         f'Rollback ke versi {v.version}')
+                        for v in batch
+                    ]
+                    VersionControlService._tulis_versi_batch(
+                        model_name, branch, items, action='rollback', created_by=user
+                    )
+                    
+                    for aksi, objek_log in (('update', diubah), ('create', dibuat_ulang)):
+                        if objek_log:
+                            LogAktivitasService.create_logs_bulk(
+                                aksi, objek_log, 'Rollback massal (version control)', user=user
+                            )
+                    total += len(batch)
+            
+            DashboardStatsService.invalidate()
+        
+        logger.info(f"Rollback massal: {total} objek oleh {user}")
+        return total
+    
+    @staticmethod
+    def versi_sebelumnya(model_name: str, object_ids: List[int], branch: str = 'main'):
+        """Parent dari versi current tiap objek (target default rollback_many), satu query"""
+        from rental.models import DataVersion
+        return DataVersion.objects.filter(
+            branch=branch,
+            child_versions__model_name=model_name,
+            child_versions__object_id__in=object_ids,
+            child_versions__branch=branch,
+            child_versions__is_current=True,
+        )
+    
+    @staticmethod
+    def _terapkan_data(instance: models.Model, data: Dict) -> List[str]:
+        """Set field instance dari data versi; return nama field yang di-set"""
+        fields = []
+        for field in instance._meta.concrete_fields:
+            if field.primary_key or field.name not in data:
+                continue
+            if field.name == 'created_at':
+                continue
+            if field.name == 'updated_at':
+                setattr(instance, field.attname, timezone.now())
+            else:
+                setattr(instance, field.attname, field.to_python(data[field.name]))
+            fields.append(field.name)
+        return fields
+    
     # ==========================================
     # HISTORY
     # ==========================================
@@ -395,7 +981,8 @@ class VersionControlService:
             model_name=model_name,
             object_id=object_id,
             version=1,
-            data_snapshot=source_version.data_snapshot,
+            data_snapshot=source_version.get_data(),
+            is_keyframe=True,
             action='commit',
             created_by=user,
             commit_message=f'Branch created from {from_branch} v{source_version.version}',
@@ -421,41 +1008,32 @@ class VersionControlService:
     # ==========================================
     
     @staticmethod
-    def cleanup_old_versions(keep_last: int = 10) -> int:
+    def cleanup_old_versions(
+        keep_last: int = 10,
+        max_age_days: int = None,
+        dry_run: bool = False,
+        progress=None
+    ) -> int:
         """
-        Hapus versi lama, simpan hanya N versi terakhir per objek per branch.
+        Hapus versi lama per objek per branch (lihat rental/version_retention.py).
         
         Args:
-            keep_last: Jumlah versi terakhir yang disimpan
+            keep_last: Jumlah versi terakhir yang disimpan (None: tanpa batas jumlah)
+            max_age_days: Hapus versi yang lebih tua dari N hari
+            dry_run: Hanya hitung, tanpa menghapus
+            progress: Callback (sudah_dihapus, total) per chunk
         
         Returns:
-            Jumlah versi yang dihapus
+            Jumlah versi yang dihapus (dry_run: jumlah yang akan dihapus)
         """
-        from rental.models import DataVersion
-        
-        deleted_count = 0
-        
-        # Dapatkan semua kombinasi model_name + object_id + branch
-        objects = DataVersion.objects.values('model_name', 'object_id', 'branch').distinct()
+        from rental.version_retention import VersionRetention
         
-        for obj in objects:
-            # Dapatkan ID versi yang harus disimpan
-            versions_to_keep = DataVersion.objects.filter(
-                model_name=obj['model_name'],
-                object_id=obj['object_id'],
-                branch=obj['branch']
-            ).order_by('-version')[:keep_last].values_list('id', flat=True)
-            
-            deleted, _ = DataVersion.objects.filter(
-                model_name=obj['model_name'],
-                object_id=obj['object_id'],
-                branch=obj['branch']
-            ).exclude(id__in=list(versions_to_keep)).delete()
-            
-            deleted_count += deleted
+        hasil = VersionRetention(
+            keep_last=keep_last, max_age_days=max_age_days, progress=progress
+        ).jalankan(dry_run=dry_run)
         
-        logger.info(f"Cleanup: {deleted_count} versi lama dihapus")
-        return deleted_count
+        logger.info(f"Cleanup: {hasil['dihapus']} versi lama dihapus")
+        return hasil['kandidat'] if dry_run else hasil['dihapus']
     
     @staticmethod
     def print_history(model_name: str, object_id: int, branch: str = 'main') -> str:
@@ -528,7 +1106,7 @@ if __name__ == '__main__':
 Penggunaan:
   python version_control.py history <model> <id>     - Lihat history versi
   python version_control.py rollback <model> <id> <version> - Rollback ke versi
-  python version_control.py cleanup [keep=10]        - Bersihkan versi lama
+  python version_control.py cleanup [keep=10] [hari] - Bersihkan versi lama
   python version_control.py stats                    - Statistik version control
   
 Contoh:
@@ -564,8 +1142,14 @@ Contoh:
             
     elif command == 'cleanup':
         keep = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-        deleted = VCS.cleanup_old_versions(keep_last=keep)
-        print(f"🗑️ {deleted} versi lama dihapus (keep last {keep})")
+        max_age = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        deleted = VCS.cleanup_old_versions(
+            keep_last=keep,
+            max_age_days=max_age,
+            progress=lambda dihapus, total: print(f"   ... {dihapus}/{total}")
+        )
+        umur = f", maks. {max_age} hari" if max_age is not None else ""
+        print(f"🗑️ {deleted} versi lama dihapus (keep last {keep}{umur})")
         
     elif command == 'stats':
         total = DataVersion.objects.count()
@@ -0,0 +1,184 @@
+"""
+Retensi DataVersion berbasis set
+
+Versi yang dihapus dihitung sekali dengan window function:
+    ROW_NUMBER() OVER (PARTITION BY model_name, object_id, branch ORDER BY version DESC)
+lalu dihapus per chunk, sehingga jumlah query bergantung pada jumlah baris
+yang dihapus, bukan jumlah objek yang punya riwayat versi.
+
+Kebijakan (boleh digabung, versi dihapus jika melanggar salah satunya):
+- keep_last: simpan N versi terakhir per objek+branch
+- max_age_days: hapus versi yang dibuat lebih dari N hari lalu
+
+Versi terakhir dan versi current tidak pernah dihapus. Versi tertua yang
+tersisa dijadikan keyframe lebih dulu agar delta sesudahnya tetap bisa
+direkonstruksi.
+"""
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When, Window
+from django.db.models.functions import Greatest, Least, RowNumber
+from django.utils import timezone
+
+logger = logging.getLogger('rental.version_control')
+
+GROUP_FIELDS = ('model_name', 'object_id', 'branch')
+
+
+class VersionRetention:
+    """Hapus versi lama DataVersion sesuai kebijakan retensi"""
+
+    def __init__(
+        self,
+        keep_last: Optional[int] = None,
+        max_age_days: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Args:
+            keep_last: Jumlah versi terakhir yang disimpan per objek+branch
+            max_age_days: Umur maksimal versi (hari)
+            chunk_size: Jumlah versi per DELETE (default: RENTAL_VERSION_RETENTION_CHUNK_SIZE)
+            progress: Callback (sudah_dihapus, total) setelah setiap chunk
+        """
+        if keep_last is None and max_age_days is None:
+            raise ValueError("Minimal satu kebijakan: keep_last atau max_age_days")
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("keep_last minimal 1")
+        if max_age_days is not None and max_age_days < 0:
+            raise ValueError("max_age_days tidak boleh negatif")
+
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        self.chunk_size = chunk_size or getattr(settings, 'RENTAL_VERSION_RETENTION_CHUNK_SIZE', 1000)
+        self.progress = progress
+
+    # ========== QUERY ==========
+
+    @staticmethod
+    def _partition():
+        return [F(field) for field in GROUP_FIELDS]
+
+    def _dengan_posisi(self):
+        """
+        Anotasi per versi:
+        - urutan: 1 untuk versi terbaru objek+branch
+        - jumlah: total versi objek+branch
+        - batas: jumlah versi terbaru yang disimpan menurut kebijakan
+        """
+        from .models import DataVersion
+
+        batas = []
+        if self.keep_last is not None:
+            batas.append(Value(self.keep_last))
+        if self.max_age_days is not None:
+            cutoff = timezone.now() - timedelta(days=self.max_age_days)
+            # Versi yang masih di bawah umur maksimal; versi terbaru selalu disimpan
+            batas.append(Greatest(
+                Window(Count('id', filter=Q(created_at__gte=cutoff)), partition_by=self._partition()),
+                Value(1)
+            ))
+
+        return DataVersion.objects.order_by().annotate(
+            urutan=Window(RowNumber(), partition_by=self._partition(), order_by=F('version').desc()),
+            jumlah=Window(Count('id'), partition_by=self._partition()),
+            batas=Least(*batas) if len(batas) > 1 else batas[0],
+        )
+
+    def kandidat(self) -> List[int]:
+        """ID versi yang akan dihapus"""
+        # is_current disaring di Python: filter biasa ikut masuk WHERE sebelum
+        # window dihitung sehingga mengubah urutan
+        rows = self._dengan_posisi().filter(urutan__gt=F('batas')).values_list('id', 'is_current')
+        return [pk for pk, is_current in rows if not is_current]
+
+    def _batas_delta(self) -> List[Dict]:
+        """
+        Versi tertua yang disimpan, masih berupa delta, dan punya versi lebih
+        lama yang akan dihapus. keyframe_dasar = keyframe terakhir <= version.
+        """
+        rows = (
+            self._dengan_posisi()
+            .annotate(keyframe_dasar=Window(
+                Max(Case(When(is_keyframe=True, then=F('version')))),
+                partition_by=self._partition(),
+                order_by=F('version').asc(),
+            ))
+            .filter(urutan=F('batas'), jumlah__gt=F('batas'))
+            .values('id', 'version', 'is_keyframe', 'keyframe_dasar', *GROUP_FIELDS)
+        )
+        return [row for row in rows if not row['is_keyframe']]
+
+    # ========== KEYFRAME ==========
+
+    def _jadikan_keyframe(self, batas: List[Dict]) -> int:
+        """Rekonstruksi data lengkap versi batas (satu query rantai per chunk) lalu bulk_update"""
+        from .models import DataVersion
+        from .version_control import VersionControlService
+
+        diubah = 0
+        for i in range(0, len(batas), self.chunk_size):
+            chunk = [b for b in batas[i:i + self.chunk_size] if b['keyframe_dasar'] is not None]
+            if not chunk:
+                continue
+
+            filter_rantai = Q()
+            for b in chunk:
+                filter_rantai |= Q(
+                    model_name=b['model_name'], object_id=b['object_id'], branch=b['branch'],
+                    version__gte=b['keyframe_dasar'], version__lte=b['version'],
+                )
+            rantai = {}
+            for v in DataVersion.objects.filter(filter_rantai).order_by('version'):
+                rantai.setdefault((v.model_name, v.object_id, v.branch), []).append(v)
+
+            versions = []
+            for b in chunk:
+                versi_rantai = rantai[(b['model_name'], b['object_id'], b['branch'])]
+                version = versi_rantai[-1]
+                version.data_snapshot = VersionControlService._gabung_rantai(versi_rantai)
+                version.is_keyframe = True
+                versions.append(version)
+
+            DataVersion.objects.bulk_update(versions, ['data_snapshot', 'is_keyframe'])
+            diubah += len(versions)
+        return diubah
+
+    # ========== JALANKAN ==========
+
+    def jalankan(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Hapus versi sesuai kebijakan.
+
+        Returns:
+            Dict 'kandidat' (versi yang memenuhi kebijakan hapus), 'dihapus',
+            'keyframe' (versi yang dijadikan keyframe), 'chunk'
+        """
+        from .models import DataVersion
+
+        ids = self.kandidat()
+        hasil = {'kandidat': len(ids), 'dihapus': 0, 'keyframe': 0, 'chunk': 0}
+        if dry_run or not ids:
+            logger.info(f"Retensi{' [DRY RUN]' if dry_run else ''}: {len(ids)} versi akan dihapus")
+            return hasil
+
+        hasil['keyframe'] = self._jadikan_keyframe(self._batas_delta())
+
+        for i in range(0, len(ids), self.chunk_size):
+            with transaction.atomic():
+                deleted, _ = DataVersion.objects.filter(id__in=ids[i:i + self.chunk_size]).delete()
+            hasil['dihapus'] += deleted
+            hasil['chunk'] += 1
+            if self.progress:
+                self.progress(hasil['dihapus'], len(ids))
+
+        logger.info(
+            f"Retensi: {hasil['dihapus']} versi dihapus dalam {hasil['chunk']} chunk, "
+            f"{hasil['keyframe']} versi dijadikan keyframe"
+        )
+        return hasil
@@ -4,12 +4,18 @@ Views untuk API Notifikasi dan Alert System
 import json
 import logging
 from datetime import date, timedelta
+from typing import Optional
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
-from .models import Notifikasi, Penyewaan, Pelanggan, Mobil, LogAktivitas
+from .models import Notifikasi, Penyewaan, LogAktivitas
 from .services import NotifikasiService
+from .batch_service import PenyewaanBatchService
+from .dashboard import DashboardStatsService
+from .pagination import keyset_page, keyset_queryset
+from .streaming import stream_queryset
+from .middleware import get_current_username
 
 logger = logging.getLogger('rental.notifikasi')
 
@@ -42,9 +48,91 @@ ALERT_CONFIG = {
         'reminder': True,
         'keterlambatan': True,
         'pengembalian': True,
-    }
+    },
+    
+    # Pagination endpoint alert (?page=&page_size=)
+    'page_size': 50,
+    'max_page_size': 500,
 }
 
+# Kolom yang dibutuhkan endpoint alert (str(mobil), nama pelanggan, hitung denda)
+ALERT_FIELDS = (
+    'kode_penyewaan', 'tanggal_kembali', 'mobil', 'pelanggan',
+    'mobil__merk', 'mobil__model', 'mobil__tahun', 'mobil__plat_nomor',
+    'mobil__harga_sewa_per_hari', 'pelanggan__nama',
+)
+
+# Batas limit per halaman endpoint list (cursor pagination).
+# Mode ?stream=json|ndjson tidak dibatasi karena hasilnya tidak ditampung di memori.
+MAX_LIST_LIMIT = 500
+
+# Kolom yang dikirim endpoint list (juga dipakai .values() di mode stream)
+NOTIFIKASI_FIELDS = (
+    'id', 'judul', 'pesan', 'tipe', 'kategori', 'pelanggan_nama',
+    'dibaca', 'dikirim_email', 'created_at',
+)
+LOG_FIELDS = (
+    'id', 'user', 'aksi', 'model_name', 'object_repr', 'perubahan',
+    'ip_address', 'created_at',
+)
+
+
+def _alert_queryset(**filters):
+    """Satu query penyewaan + mobil + pelanggan, hanya kolom yang dipakai"""
+    return (
+        Penyewaan.objects.filter(**filters)
+        .select_related('mobil', 'pelanggan')
+        .only(*ALERT_FIELDS)
+        .order_by('tanggal_kembali', 'id')
+    )
+
+
+def _get_limit(request, default: int, maksimal: Optional[int] = None) -> int:
+    """Parameter ?limit= (ValueError -> 400 jika bukan angka atau kurang dari 1)"""
+    limit = int(request.GET.get('limit', default))
+    if limit < 1:
+        raise ValueError("limit minimal 1")
+    return min(limit, maksimal) if maksimal else limit
+
+
+def _stream_list(request, queryset, fields):
+    """Mode stream endpoint list: semua baris setelah cursor (opsional dibatasi limit)"""
+    queryset = keyset_queryset(queryset, request.GET.get('cursor'))
+    if 'limit' in request.GET:
+        queryset = queryset[:_get_limit(request, 0)]
+    return stream_queryset(queryset, fields, request.GET['stream'])
+
+
+def _paginate(request, queryset):
+    """
+    Pagination dari query param page & page_size.
+    Returns (list object di halaman ini, dict info pagination)
+    """
+    try:
+        page_size = int(request.GET.get('page_size', ALERT_CONFIG['page_size']))
+    except ValueError:
+        page_size = ALERT_CONFIG['page_size']
+    page_size = max(1, min(page_size, ALERT_CONFIG['max_page_size']))
+    
+    page = Paginator(queryset, page_size).get_page(request.GET.get('page'))
+    return list(page.object_list), {
+        'page': page.number,
+        'page_size': page_size,
+        'total_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+        'total': page.paginator.count,
+    }
+
+
+def _klasifikasi_keterlambatan(hari_terlambat: int):
+    """Level & tipe alert berdasarkan threshold keterlambatan"""
+    threshold = ALERT_CONFIG['keterlambatan']
+    if hari_terlambat >= threshold['critical']:
+        return 'critical', 'error'
+    if hari_terlambat >= threshold['danger']:
+        return 'danger', 'error'
+    return 'warning', 'warning'
+
 
 # ==========================================
 # API ENDPOINTS
@@ -58,13 +146,14 @@ def api_notifikasi_list(request):
     Mengambil daftar semua notifikasi
     
     Query params:
-    - limit: jumlah data (default 20)
+    - limit: jumlah data per halaman (default 20, maks MAX_LIST_LIMIT)
+    - cursor: next_cursor dari response sebelumnya (halaman berikutnya)
+    - stream: 'json' atau 'ndjson' untuk streaming response (limit opsional)
     - status: 'dibaca' atau 'belum_dibaca'
     - tipe: info, warning, success, error
     - kategori: penyewaan_baru, pembayaran, dll
     """
     try:
-        limit = int(request.GET.get('limit', 20))
         status = request.GET.get('status', None)
         tipe = request.GET.get('tipe', None)
         kategori = request.GET.get('kategori', None)
@@ -82,7 +171,11 @@ def api_notifikasi_list(request):
         if kategori:
             queryset = queryset.filter(kategori=kategori)
         
-        queryset = queryset.order_by('-created_at')[:limit]
+        if request.GET.get('stream'):
+            return _stream_list(request, queryset, NOTIFIKASI_FIELDS)
+        
+        limit = _get_limit(request, 20, MAX_LIST_LIMIT)
+        notifikasi, next_cursor = keyset_page(queryset, limit, request.GET.get('cursor'))
         
         data = [{
             'id': n.id,
@@ -94,16 +187,23 @@ def api_notifikasi_list(request):
             'dibaca': n.dibaca,
             'dikirim_email': n.dikirim_email,
             'created_at': n.created_at.isoformat() if n.created_at else None,
-        } for n in queryset]
+        } for n in notifikasi]
         
         logger.info(f"API: Mengambil {len(data)} notifikasi")
         
         return JsonResponse({
             'success': True,
             'count': len(data),
+            'next_cursor': next_cursor,
             'data': data
         })
         
+    except ValueError as e:
+        # limit bukan angka / kurang dari 1 atau cursor tidak valid
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
     except Exception as e:
         logger.error(f"API Error: {str(e)}")
         return JsonResponse({
@@ -260,52 +360,44 @@ def api_alert_check_keterlambatan(request):
     """
     GET /api/alert/check-keterlambatan/
     Mengecek semua penyewaan yang terlambat dan mengembalikan alert
+    
+    Query params:
+    - page: nomor halaman (default 1)
+    - page_size: jumlah alert per halaman (default 50, maks 500)
     """
     try:
         today = date.today()
         
-        # Ambil penyewaan aktif yang sudah melewati tanggal kembali
-        penyewaan_terlambat = Penyewaan.objects.filter(
+        # Ambil penyewaan aktif yang sudah melewati tanggal kembali,
+        # paling lama terlambat lebih dulu (tanggal_kembali ascending)
+        penyewaan_terlambat, pagination = _paginate(request, _alert_queryset(
             status__in=['aktif', 'terlambat'],
             tanggal_kembali__lt=today
-        )
+        ))
         
         alerts = []
         for p in penyewaan_terlambat:
             hari_terlambat = (today - p.tanggal_kembali).days
-            estimasi_denda = p.hitung_denda(hari_terlambat)
-            
-            # Tentukan level alert berdasarkan threshold
-            if hari_terlambat >= ALERT_CONFIG['keterlambatan']['critical']:
-                level = 'critical'
-                tipe = 'error'
-            elif hari_terlambat >= ALERT_CONFIG['keterlambatan']['danger']:
-                level = 'danger'
-                tipe = 'error'
-            else:
-                level = 'warning'
-                tipe = 'warning'
+            level, tipe = _klasifikasi_keterlambatan(hari_terlambat)
             
             alerts.append({
                 'kode_penyewaan': p.kode_penyewaan,
-                'pelanggan': p.pelanggan.nama if p.pelanggan else 'Unknown',
-                'mobil': str(p.mobil) if p.mobil else 'Unknown',
+                'pelanggan': p.pelanggan.nama,
+                'mobil': str(p.mobil),
                 'tanggal_kembali': p.tanggal_kembali.isoformat(),
                 'hari_terlambat': hari_terlambat,
-                'estimasi_denda': float(estimasi_denda),
+                'estimasi_denda': float(p.hitung_denda(hari_terlambat)),
                 'level': level,
                 'tipe': tipe,
             })
         
-        # Sort by hari_terlambat descending
-        alerts.sort(key=lambda x: x['hari_terlambat'], reverse=True)
-        
-        logger.info(f"API: Cek keterlambatan - {len(alerts)} alert ditemukan")
+        logger.info(f"API: Cek keterlambatan - {pagination['total']} alert ditemukan")
         
         return JsonResponse({
             'success': True,
-            'total_alerts': len(alerts),
+            'total_alerts': pagination['total'],
             'threshold': ALERT_CONFIG['keterlambatan'],
+            'pagination': pagination,
             'alerts': alerts
         })
         
@@ -323,38 +415,40 @@ def api_alert_check_reminder(request):
     """
     GET /api/alert/check-reminder/
     Mengecek penyewaan yang akan jatuh tempo dan mengembalikan reminder
+    
+    Query params:
+    - page: nomor halaman (default 1)
+    - page_size: jumlah reminder per halaman (default 50, maks 500)
     """
     try:
         today = date.today()
-        reminders = []
         
-        for days in ALERT_CONFIG['reminder_days']:
-            target_date = today + timedelta(days=days)
-            
-            penyewaan_list = Penyewaan.objects.filter(
-                status='aktif',
-                tanggal_kembali=target_date
-            )
-            
-            for p in penyewaan_list:
-                reminders.append({
-                    'kode_penyewaan': p.kode_penyewaan,
-                    'pelanggan': p.pelanggan.nama if p.pelanggan else 'Unknown',
-                    'mobil': str(p.mobil) if p.mobil else 'Unknown',
-                    'tanggal_kembali': p.tanggal_kembali.isoformat(),
-                    'hari_tersisa': days,
-                    'tipe': 'info' if days > 1 else 'warning',
-                })
+        # Semua hari reminder dalam satu query (tanggal_kembali__in),
+        # hari_tersisa terkecil lebih dulu
+        penyewaan_list, pagination = _paginate(request, _alert_queryset(
+            status='aktif',
+            tanggal_kembali__in=[today + timedelta(days=d) for d in ALERT_CONFIG['reminder_days']]
+        ))
         
-        # Sort by hari_tersisa ascending
-        reminders.sort(key=lambda x: x['hari_tersisa'])
+        reminders = []
+        for p in penyewaan_list:
+            days = (p.tanggal_kembali - today).days
+            reminders.append({
+                'kode_penyewaan': p.kode_penyewaan,
+                'pelanggan': p.pelanggan.nama,
+                'mobil': str(p.mobil),
+                'tanggal_kembali': p.tanggal_kembali.isoformat(),
+                'hari_tersisa': days,
+                'tipe': 'info' if days > 1 else 'warning',
+            })
         
-        logger.info(f"API: Cek reminder - {len(reminders)} reminder ditemukan")
+        logger.info(f"API: Cek reminder - {pagination['total']} reminder ditemukan")
         
         return JsonResponse({
             'success': True,
-            'total_reminders': len(reminders),
+            'total_reminders': pagination['total'],
             'reminder_days': ALERT_CONFIG['reminder_days'],
+            'pagination': pagination,
             'reminders': reminders
         })
         
@@ -390,7 +484,7 @@ def api_alert_send_notifications(request):
             'keterlambatan': 0
         }
         
-        # Kirim reminder
+        # Kirim reminder (bulk: select_related + bulk_create per hari reminder)
         if include_reminder and ALERT_CONFIG['enabled_notifications']['reminder']:
             for days in ALERT_CONFIG['reminder_days']:
                 target_date = today + timedelta(days=days)
@@ -399,28 +493,33 @@ def api_alert_send_notifications(request):
                     tanggal_kembali=target_date
                 )
                 
-                for p in penyewaan_list:
-                    NotifikasiService.notifikasi_reminder_pengembalian(p, days)
-                    notifications_sent['reminder'] += 1
+                hasil = NotifikasiService.buat_notifikasi_bulk(
+                    penyewaan_list,
+                    lambda p, days=days: NotifikasiService.pesan_reminder_pengembalian(p, days),
+                    tipe='info',
+                    kategori='reminder'
+                )
+                notifications_sent['reminder'] += hasil['notifikasi']
         
         # Kirim notifikasi keterlambatan
         if include_keterlambatan and ALERT_CONFIG['enabled_notifications']['keterlambatan']:
-            penyewaan_terlambat = Penyewaan.objects.filter(
-                status__in=['aktif', 'terlambat'],
-                tanggal_kembali__lt=today
+            def pesan_keterlambatan(p):
+                hari_terlambat = (today - p.tanggal_kembali).days
+                return NotifikasiService.pesan_keterlambatan(p, hari_terlambat, p.hitung_denda(hari_terlambat))
+            
+            # Yang sudah berstatus terlambat: notifikasi ulang saja
+            hasil = NotifikasiService.buat_notifikasi_bulk(
+                Penyewaan.objects.filter(status='terlambat', tanggal_kembali__lt=today),
+                pesan_keterlambatan,
+                tipe='error',
+                kategori='keterlambatan'
             )
             
-            for p in penyewaan_terlambat:
-                hari_terlambat = (today - p.tanggal_kembali).days
-                estimasi_denda = p.hitung_denda(hari_terlambat)
-                
-                # Update status
-                if p.status != 'terlambat':
-                    p.status = 'terlambat'
-                    p.save()
-                
-                NotifikasiService.notifikasi_keterlambatan(p, hari_terlambat, estimasi_denda)
-                notifications_sent['keterlambatan'] += 1
+            # Yang masih aktif: ubah status, log, dan notifikasi lewat batch service
+            baru_terlambat, _ = PenyewaanBatchService(
+                today=today, user=get_current_username()
+            ).proses_keterlambatan()
+            notifications_sent['keterlambatan'] += hasil['notifikasi'] + baru_terlambat
         
         total = notifications_sent['reminder'] + notifications_sent['keterlambatan']
         logger.info(f"API: {total} notifikasi dikirim")
@@ -445,51 +544,13 @@ def api_dashboard_stats(request):
     """
     GET /api/dashboard/stats/
     Mengambil statistik untuk dashboard monitoring
+    (di-cache RENTAL_DASHBOARD_CACHE_TTL detik, dihapus saat data berubah)
     """
     try:
-        today = date.today()
-        
-        # Statistik penyewaan
-        total_penyewaan = Penyewaan.objects.count()
-        penyewaan_aktif = Penyewaan.objects.filter(status='aktif').count()
-        penyewaan_terlambat = Penyewaan.objects.filter(status='terlambat').count()
-        penyewaan_selesai = Penyewaan.objects.filter(status='selesai').count()
-        
-        # Statistik mobil
-        total_mobil = Mobil.objects.count()
-        mobil_tersedia = Mobil.objects.filter(status='tersedia').count()
-        mobil_disewa = Mobil.objects.filter(status='disewa').count()
-        
-        # Statistik notifikasi
-        notifikasi_belum_dibaca = NotifikasiService.get_jumlah_notifikasi_belum_dibaca()
-        
-        # Alert counts
-        penyewaan_akan_jatuh_tempo = Penyewaan.objects.filter(
-            status='aktif',
-            tanggal_kembali__lte=today + timedelta(days=3),
-            tanggal_kembali__gte=today
-        ).count()
-        
+        # Conditional aggregation (satu query per tabel) + cache TTL pendek
         return JsonResponse({
             'success': True,
-            'stats': {
-                'penyewaan': {
-                    'total': total_penyewaan,
-                    'aktif': penyewaan_aktif,
-                    'terlambat': penyewaan_terlambat,
-                    'selesai': penyewaan_selesai,
-                },
-                'mobil': {
-                    'total': total_mobil,
-                    'tersedia': mobil_tersedia,
-                    'disewa': mobil_disewa,
-                },
-                'alerts': {
-                    'notifikasi_belum_dibaca': notifikasi_belum_dibaca,
-                    'penyewaan_terlambat': penyewaan_terlambat,
-                    'akan_jatuh_tempo': penyewaan_akan_jatuh_tempo,
-                }
-            }
+            'stats': DashboardStatsService.get_stats()
         })
         
     except Exception as e:
@@ -508,12 +569,13 @@ def api_log_aktivitas(request):
     Mengambil log aktivitas terbaru
     
     Query params:
-    - limit: jumlah data (default 50)
+    - limit: jumlah data per halaman (default 50, maks MAX_LIST_LIMIT)
+    - cursor: next_cursor dari response sebelumnya (halaman berikutnya)
+    - stream: 'json' atau 'ndjson' untuk streaming response (limit opsional)
     - aksi: filter berdasarkan aksi (create, update, delete, login, logout)
     - model: filter berdasarkan model_name
     """
     try:
-        limit = int(request.GET.get('limit', 50))
         aksi = request.GET.get('aksi', None)
         model = request.GET.get('model', None)
         
@@ -525,7 +587,11 @@ def api_log_aktivitas(request):
         if model:
             queryset = queryset.filter(model_name__icontains=model)
         
-        queryset = queryset.order_by('-created_at')[:limit]
+        if request.GET.get('stream'):
+            return _stream_list(request, queryset, LOG_FIELDS)
+        
+        limit = _get_limit(request, 50, MAX_LIST_LIMIT)
+        logs, next_cursor = keyset_page(queryset, limit, request.GET.get('cursor'))
         
         data = [{
             'id': log.id,
@@ -536,14 +602,21 @@ def api_log_aktivitas(request):
             'perubahan': log.perubahan,
             'ip_address': log.ip_address,
             'created_at': log.created_at.isoformat() if log.created_at else None,
-        } for log in queryset]
+        } for log in logs]
         
         return JsonResponse({
             'success': True,
             'count': len(data),
+            'next_cursor': next_cursor,
             'data': data
         })
         
+    except ValueError as e:
+        # limit bukan angka / kurang dari 1 atau cursor tidak valid
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
     except Exception as e:
         logger.error(f"API Error: {str(e)}")
         return JsonResponse({
@@ -92,6 +92,13 @@ DATABASES = {
     }
 }
 
+# Koneksi kedua ke database yang sama, untuk reservasi blok kode penyewaan
+# yang harus ter-commit di luar transaksi request (lihat RENTAL_KODE_SEQUENCE_DB)
+DATABASES['kode_sequence'] = {
+    **DATABASES['default'],
+    'TEST': {'MIRROR': 'default'},
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -256,7 +263,73 @@ EMAIL_HOST_USER = ''  # Isi dengan email pengirim
 EMAIL_HOST_PASSWORD = ''  # Isi dengan app password
 DEFAULT_FROM_EMAIL = 'Rental Mobil <noreply@rentalmobil.com>'
 
+# Outbox email: notifikasi hanya mengantrikan email, worker
+# `python manage.py kirim_email_outbox --loop` mengirim per batch lewat satu
+# koneksi SMTP. Gagal kirim dicoba lagi dengan backoff RETRY_BACKOFF * 2^(n-1)
+# detik sampai MAX_ATTEMPTS kali. Batch diklaim (kirim_setelah dimajukan
+# CLAIM_TIMEOUT detik) sebelum dikirim di luar transaksi.
+RENTAL_EMAIL_OUTBOX_BATCH_SIZE = 50
+RENTAL_EMAIL_MAX_ATTEMPTS = 5
+RENTAL_EMAIL_RETRY_BACKOFF = 60
+RENTAL_EMAIL_CLAIM_TIMEOUT = 600
+
 # Admin untuk menerima notifikasi error
 ADMINS = [
     ('Admin', 'admin@rentalmobil.com'),
 ]
+
+# Cache
+# Default locmem (per proses). Untuk beberapa worker gunakan backend bersama, misal:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': BASE_DIR / 'cache'
+#   'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'rental_cache'
+#   (jalankan `python manage.py createcachetable` untuk DatabaseCache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rental-mobil',
+    }
+}
+
+# Statistik dashboard (api_dashboard_stats) di-cache beberapa detik dan
+# dihapus otomatis saat Mobil/Penyewaan/Notifikasi berubah.
+RENTAL_DASHBOARD_CACHE = 'default'
+RENTAL_DASHBOARD_CACHE_TTL = 5
+
+# Streaming response (?stream=json|ndjson): jumlah baris per fetch dari database
+RENTAL_STREAM_CHUNK_SIZE = 2000
+
+# Data pre_save untuk log perubahan (objek tanpa snapshot field tracker):
+# disimpan per thread/request, maksimal sekian entri (LRU), dikosongkan
+# CurrentUserMiddleware di akhir request.
+RENTAL_CHANGE_STORE_MAX_SIZE = 1000
+
+# Audit log (LogAktivitas dari signal) ditulis per batch: bulk_create saat
+# transaksi commit atau di akhir request. RENTAL_AUDIT_LOG_ASYNC = True
+# menyerahkan penulisan ke thread background dengan antrian terbatas;
+# jika antrian penuh lebih dari PUT_TIMEOUT detik, log ditulis sinkron.
+RENTAL_AUDIT_LOG_BATCH_SIZE = 500
+RENTAL_AUDIT_LOG_ASYNC = False
+RENTAL_AUDIT_LOG_QUEUE_SIZE = 100
+RENTAL_AUDIT_LOG_PUT_TIMEOUT = 5
+
+# Version control (DataVersion): 'delta' menyimpan snapshot lengkap (keyframe)
+# tiap KEYFRAME_INTERVAL versi dan hanya field yang berubah di antaranya;
+# 'full' menyimpan snapshot lengkap setiap versi. Data lama dikonversi dengan
+# `python manage.py konversi_data_version`.
+RENTAL_VERSION_STORAGE = 'delta'
+RENTAL_VERSION_KEYFRAME_INTERVAL = 10
+# Retensi versi (`python manage.py bersihkan_data_version`): jumlah versi per DELETE
+RENTAL_VERSION_RETENTION_CHUNK_SIZE = 1000
+
+# Kode Penyewaan
+# Allocator kode penyewaan (RNT-YYYYMMDD-NNNN). CounterKodeAllocator mengambil
+# nomor dari tabel kode_counter di transaksi yang sama dengan INSERT penyewaan.
+# BlockKodeAllocator mereservasi RENTAL_KODE_BLOCK_SIZE nomor sekaligus per worker
+# lewat RENTAL_KODE_SEQUENCE_DB, alias koneksi terpisah agar blok ter-commit sendiri
+# ('default' ditolak karena Penyewaan.save selalu membuka transaksi di sana).
+RENTAL_KODE_ALLOCATOR = 'rental.kode_allocator.CounterKodeAllocator'
+RENTAL_KODE_BLOCK_SIZE = 20
+RENTAL_KODE_SEQUENCE_DB = 'kode_sequence'
+
+# Test runner: tabel managed=False ikut dibuat di database test
+TEST_RUNNER = 'rental.test_runner.UnmanagedModelTestRunner'